@@ -20,13 +20,21 @@ stopwatch = Stopwatch()
 def main():
 	success, args = validate.Validate().validate_args()
 	if success:
-		tool = auto_recon.AutoRecon(args)
-		success, message = tool.setup()
-		if not success:
-			general.print_error(message)
-		else:
-			tool.run()
-			stopwatch.stop()
+		auto_recon.initialize(args)
+		try:
+			if args.domains:
+				auto_recon.batch(args)
+				stopwatch.stop()
+			else:
+				tool = auto_recon.AutoRecon(args)
+				success, message = tool.setup()
+				if not success:
+					general.print_error(message)
+				else:
+					tool.run()
+					stopwatch.stop()
+		finally:
+			auto_recon.shutdown()
 
 if __name__ == "__main__":
 	main()
@@ -1,49 +1,176 @@
 #!/usr/bin/env python3
 
-from . import cert, config, debug, directory, exclusion, file, filter, general, grep, jquery, run, session, wordlist
-
-import argparse, concurrent.futures
+from . import array, cache, checkpoint, config, database, debug, directory, dispatch, exclusion, file, filter, general, grep, jquery, parse, resolver, run, scheduler, session, tls, wordlist
+
+import argparse, concurrent.futures, contextvars, functools, os
+
+def initialize(args: argparse.Namespace):
+	"""
+	Initialize the state shared by all runs of the main tool, that is, the subprocess budget, the work queue, the cache of tool outputs, the DNS resolver and its cache, and the results database.
+	"""
+	run.engine.set_limit(args.max_processes)
+	dispatch.queue.initialize(args.queue)
+	cache.cache.initialize(not args.no_cache, args.refresh_cache)
+	resolver.resolver.initialize(args.resolvers)
+	database.database.initialize(args.database)
+
+def shutdown():
+	"""
+	Release the state shared by all runs of the main tool, that is, close the results database.
+	"""
+	database.database.close()
+
+def batch(args: argparse.Namespace):
+	"""
+	Run the main tool for multiple domains at once, at most `args.parallel_domains` at a time, in a single process.\n
+	Each domain is stored in its own subdirectory of the output directory, and runs in its own context, see `context.Proxy`.
+	"""
+	def run_domain(domain: str):
+		tool = AutoRecon(argparse.Namespace(**{**vars(args), "domain": domain, "out": os.path.join(args.out, domain)}), display = False)
+		success, message = tool.setup()
+		if not success:
+			general.print_error(f"{domain}: {message}")
+		else:
+			print(f"{domain}: started")
+			tool.run()
+			print(f"{domain}: finished")
+	with concurrent.futures.ThreadPoolExecutor(max_workers = args.parallel_domains) as executor:
+		try:
+			domains = [executor.submit(contextvars.copy_context().run, run_domain, domain) for domain in args.domains]
+			concurrent.futures.wait(domains)
+		except KeyboardInterrupt:
+			executor.shutdown(wait = False, cancel_futures = True)
+			run.engine.kill_all()
+			parse.pool.shutdown()
 
 class AutoRecon:
 
-	def __init__(self, args: argparse.Namespace):
+	def __init__(self, args: argparse.Namespace, display = True):
 		"""
-		Initialize a class for managing the main tool.
+		Initialize a class for managing the main tool.\n
+		Call `auto_recon.initialize()` first.
 		"""
 		self.__args = args
+		self.__display = display
 
 	def setup(self):
 		"""
-		Setup the main tool.
+		Setup the main tool.\n
+		Binds new instances of the context-specific singletons to the current context, see `context.Proxy`.
 		"""
 		success = True
 		message = ""
+		for singleton in [directory.directory, debug.debug, session.session, file.file, exclusion.exclusion, checkpoint.checkpoint]:
+			singleton.bind()
 		directory.directory.initialize(self.__args.out)
 		success, message = directory.directory.setup()
 		if success:
 			debug.debug.initialize(self.__args.out)
-			session.session.initialize(self.__args.out)
+			session.session.initialize(self.__args.out, self.__display)
 			success, message = session.session.restore() if self.__args.restore_session else session.session.new()
 			if success:
 				file.file.initialize(self.__args.out)
 				exclusion.exclusion.initialize(self.__args.out, self.__args.exclusions, "" if self.__args.no_filtering else self.__args.domain)
+				checkpoint.checkpoint.initialize(self.__args.out, self.__args.restore_session)
 		return success, message
 
 	def run(self):
 		"""
-		Run the main tool.
+		Run the main tool.\n
+		Each tool is started as soon as all the tools it depends on are completed, and its files in the tools directory are compressed once it completes, if enabled.\n
+		All stores are flushed whenever a tool completes, before it is marked as completed, see `file.Store`.
 		"""
+		runtime = scheduler.Scheduler(session.session.get_tools(), session.session.get_stages())
 		with concurrent.futures.ThreadPoolExecutor(max_workers = self.__args.threads) as executor:
 			try:
-				for stage in session.session.get_stages():
-					subprocesses = []
-					for tool in session.session.get_stage_tools(stage):
-						subprocesses.append(executor.submit(getattr(self, tool.base.name), tool))
-					for subprocess in concurrent.futures.as_completed(subprocesses):
-						identifier: int = subprocess.result()
-						session.session.update(identifier, completed = True)
+				subprocesses = set()
+				while True:
+					for tool in runtime.get_ready():
+						for key in runtime.get_dirty(tool):
+							filter.file(key)
+						subprocesses.add(executor.submit(contextvars.copy_context().run, self.__run, tool))
+					if not subprocesses:
+						break
+					done, subprocesses = concurrent.futures.wait(subprocesses, return_when = concurrent.futures.FIRST_COMPLETED)
+					file.file.flush()
+					for subprocess in done:
+						identifier, timeouts = subprocess.result()
+						session.session.update(identifier, completed = True, timeouts = timeouts)
+						runtime.complete(identifier)
 			except KeyboardInterrupt:
 				executor.shutdown(wait = False, cancel_futures = True)
+				run.engine.kill_all()
+				parse.pool.shutdown()
+				file.file.flush()
+		session.session.compact()
+		session.session.stop()
+		self.__log_contention()
+		self.__log_programs()
+		logs = directory.directory.get(config.Directory.LOGS)
+		self.__compress([os.path.join(logs, filename) for filename in directory.listdir(logs) if not filename.endswith(tuple(file.COMPRESSIONS.values()))], append = True)
+		self.__export()
+
+	def __export(self):
+		"""
+		Generate the TXT and JSON files of the domain from the results database into its subdirectory of the export directory, if enabled, see `database.Database.export()`.
+		"""
+		if self.__args.export and database.database.is_enabled():
+			database.database.export(self.__args.domain, os.path.join(self.__args.export, self.__args.domain))
+
+	def __log_contention(self):
+		"""
+		Log how long threads waited to acquire the lock of each file in the output directory, see `file.Locks`.
+		"""
+		contended = file.locks.get_contended(self.__args.out)
+		if contended:
+			debug.debug.log_debug("utils.auto_recon.AutoRecon().run() > File locks", ("\n").join(f"{os.path.relpath(path, self.__args.out)}: waited for: {lock.wait:.3f}s, contentions: {lock.contentions}, acquisitions: {lock.acquisitions}" for path, lock in contended))
+
+	def __log_programs(self):
+		"""
+		Log how many times a compiled JQ pattern was reused, and how many times a pattern was compiled, see `jquery.Programs`.
+		"""
+		debug.debug.log_debug("utils.auto_recon.AutoRecon().run() > JQ patterns", f"hits: {jquery.programs.hits}, misses: {jquery.programs.misses}")
+
+	def __run(self, tool: session.Tool) -> tuple[int, int]:
+		"""
+		Run a tool within its timeouts, and log how long its subprocesses waited for a free slot in the process-wide subprocess budget.\n
+		Returns the tool's ID and the number of its timed out subprocesses.
+		"""
+		context = run.enter(
+			name               = tool.base.name,
+			invocation_timeout = tool.base.args.get("invocation_timeout", self.__args.invocation_timeout),
+			tool_timeout       = tool.base.args.get("tool_timeout", self.__args.tool_timeout),
+			cache_ttl          = tool.base.args.get("cache_ttl", 0),
+			progress           = functools.partial(session.session.progress, tool.identifier)
+		)
+		tools_files = directory.directory.track_tools_files()
+		identifier = getattr(self, tool.base.name)(tool)
+		self.__record(tool)
+		self.__compress(tools_files)
+		debug.debug.log_debug(f"utils.auto_recon.AutoRecon().__run() > {tool.base.name}", f"Subprocesses: {context.subprocesses}, queued for: {context.queued:.2f}s, timed out: {context.timeouts}, cache hits: {context.cache_hits}")
+		return identifier, context.timeouts
+
+	def __record(self, tool: session.Tool):
+		"""
+		Record the tool's outputs in the results database, if enabled.\n
+		A tool that is not listed in `config.IO_MAPPING` may write to any file, so all files are recorded.
+		"""
+		if database.database.is_enabled():
+			io = scheduler.get_io(tool)
+			for key in sorted(io.outputs if io else config.ALL, key = lambda key: key.value):
+				if isinstance(key, config.TXT):
+					database.database.add_artifacts(self.__args.domain, key, file.read(file.file.get(key)))
+				elif records := jquery.jload(file.file.get(key)):
+					database.database.add_relations(self.__args.domain, key, records)
+
+	def __compress(self, paths: list[str], append = False):
+		"""
+		Compress the specified files, if enabled, see `file.compress()`.\n
+		Set `append` to `True` for files that are only appended to, for example, logs, so that their older compressed lines are kept.
+		"""
+		if self.__args.compress:
+			for path in dict.fromkeys(paths):
+				file.compress(path, self.__args.compress, append)
 
 	# ------------------------------------
 
@@ -87,14 +214,13 @@ class AutoRecon:
 		if directory.listdir(dir):
 			out = directory.directory.init_tools_file("chad_download_exiftool")
 			run.single(
-				out = out,
-				cmd = [
+				out        = out,
+				extractors = [grep.MatchExtractor(file.file.get(config.TXT.META_PEOPLE), r"(?<=Author\:\ ).+")],
+				cmd        = [
 					"exiftool -S",
 					run.set_opt(dir)
 				]
 			)
-			result = file.read(out, array = False)
-			grep.find_append_file(result, file.file.get(config.TXT.META_PEOPLE), r"(?<=Author\:\ ).+")
 		# --------------------------------
 		out   = directory.directory.init_tools_file("chad_directory_listing", "json")
 		query = f'site:*.{self.__args.domain} intitle:"index of /" intext:"parent directory"'
@@ -170,13 +296,14 @@ class AutoRecon:
 				run.set_opt(out.path             , "-o"  )
 			]
 		)
-		res = file.read(out, array = False)
-		grep.find_append_file(res, file.file.get(config.TXT.CNAME            ), r"(?<=cname_record\ \-\-\>\ )[^\s]+"                       )
-		grep.find_append_file(res, file.file.get(config.TXT.DNS_MAIL_EXCHANGE), r"(?<=mx_record\ \-\-\>\ )[^\s]+"                          )
-		grep.find_append_file(res, file.file.get(config.TXT.DNS_NAME_SERVER  ), r"(?<=ns_record\ \-\-\>\ )[^\s]+"                          )
-		grep.find_append_file(res, file.file.get(config.TXT.IP               ), r"(?<=(?:a_record|contains)\ \-\-\>\ )[^\s]+"              )
-		grep.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN        ), r"^[^\s]+(?=\ \(FQDN\))"                                   )
-		grep.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN        ), r"(?<=ptr_record\ \-\-\>\ )[^\s]+"                         )
+		parse.grep_append_files(out, [
+			(file.file.get(config.TXT.CNAME            ), r"(?<=cname_record\ \-\-\>\ )[^\s]+"                       ),
+			(file.file.get(config.TXT.DNS_MAIL_EXCHANGE), r"(?<=mx_record\ \-\-\>\ )[^\s]+"                          ),
+			(file.file.get(config.TXT.DNS_NAME_SERVER  ), r"(?<=ns_record\ \-\-\>\ )[^\s]+"                          ),
+			(file.file.get(config.TXT.IP               ), r"(?<=(?:a_record|contains)\ \-\-\>\ )[^\s]+"              ),
+			(file.file.get(config.TXT.SUBDOMAIN        ), r"^[^\s]+(?=\ \(FQDN\))"                                   ),
+			(file.file.get(config.TXT.SUBDOMAIN        ), r"(?<=ptr_record\ \-\-\>\ )[^\s]+"                         )
+		])
 		"""
 		grep.find_append_file(res, file.file.get(config.TXT.WHOIS_ASN        ), r"^\d+(?=\ \(ASN\))"                                       )
 		grep.find_append_file(res, file.file.get(config.TXT.WHOIS_CIDR       ), r"^[^\s]+(?=\ \(Netblock\))|(?<=announces\ \-\-\>\ )[^\s]+")
@@ -240,7 +367,9 @@ class AutoRecon:
 			self.__dnsrecon_parse_result(out)
 
 	def __dnsrecon_parse_result(self, out: file.SafeFile | str):
-		res = jquery.find(jquery.jload(out), exclusion.exclusion.get(exclusion.JQ.DNSRECON)) if exclusion.exclusion.should_filter() else jquery.jload(out)
+		res = jquery.jload(out)
+		if exclusion.exclusion.should_filter():
+			res = exclusion.exclusion.filter_records(jquery.find(res, exclusion.exclusion.get(exclusion.JQ.DNSRECON)), ["address", "exchange", "name", "target"]) + jquery.find(res, exclusion.exclusion.get(exclusion.JQ.DNSRECON_TXT))
 		jquery.find_append_file(res, file.file.get(config.TXT.DNS_MAIL_EXCHANGE), '.[] | select(.type | test("^MX$")) | .exchange // empty'                     )
 		jquery.find_append_file(res, file.file.get(config.TXT.DNS_NAME_SERVER  ), '.[] | select(.type | test("^NS$")) | .target // empty'                       )
 		jquery.find_append_file(res, file.file.get(config.TXT.DNS_TEXT         ), '.[] | select(.type | test("^TXT$")) | .strings // empty'                     )
@@ -252,19 +381,17 @@ class AutoRecon:
 	def dig(self, tool: session.Tool):
 		session.session.update(tool.identifier)
 		# --------------------------------
-		filter.file(config.TXT.SUBDOMAIN)
 		out = directory.directory.init_tools_file("dig")
-		res = run.multiple(
+		res = resolver.resolver.resolve(
+			entries = file.read(file.file.get(config.TXT.SUBDOMAIN)),
+			type    = config.DNS.A,
 			threads = tool.base.args["threads"],
-			out     = out,
-			key     = config.TXT.SUBDOMAIN,
-			cmd     = [
-				f"dig -t A +noall +comments",
-				run.set_opt(tool.base.args["timeout"], "+timeout="),
-				run.set_opt(run.PLACEHOLDER)
-			]
+			timeout = tool.base.args["timeout"],
+			retries = tool.base.args["retries"],
+			rate    = tool.base.args["rate"],
+			out     = out
 		)
-		res = grep.results(res, "subdomain", "status", r"(?<=status\:\ )[^\s]+(?<!\,)")
+		res = [{"subdomain": subdomain, "status": [answer.status]} for subdomain, answer in res.items()]
 		res = jquery.find_insert_file(res, file.file.get(config.JSON.SUBDOMAIN_TO_STATUS), 'group_by(.status[]) | map({status: .[0].status[0], subdomain: map(.subdomain)}) | .[]', dump = True)
 		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN      ), '.[] | select(.status == "NOERROR").subdomain[]')
 		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_ERROR), '.[] | select(.status != "NOERROR").subdomain[]')
@@ -278,56 +405,51 @@ class AutoRecon:
 			tool          = tool,
 			primary_key   = config.TXT.SUBDOMAIN_ERROR,
 			secondary_key = config.TXT.CNAME,
-			type          = config.DNS.CNAME,
-			regex         = r"(?<=is\ an\ alias\ for\ )[^\s]+(?<!\.)"
+			type          = config.DNS.CNAME
 		)
-		self.__host(
+		res = self.__host(
 			tool          = tool,
 			primary_key   = config.TXT.SUBDOMAIN,
 			secondary_key = config.TXT.IP,
-			type          = config.DNS.A,
-			regex         = r"(?<=has\ address\ )[^\s]+(?<!\.)"
+			type          = config.DNS.A
 		)
 		self.__host(
 			tool          = tool,
 			primary_key   = config.TXT.IP,
 			secondary_key = config.TXT.SUBDOMAIN,
-			type          = config.DNS.PTR,
-			regex         = r"(?<=domain\ name\ pointer\ )[^\s]+(?<!\.)"
+			type          = config.DNS.PTR
 		)
 		self.__host(
 			tool          = tool,
 			primary_key   = config.TXT.SUBDOMAIN,
 			secondary_key = config.TXT.CNAME,
-			type          = config.DNS.CNAME,
-			regex         = r"(?<=is\ an\ alias\ for\ )[^\s]+(?<!\.)"
+			type          = config.DNS.CNAME
 		)
-		jquery.find_append_file(jquery.jload(file.file.get(config.JSON.SUBDOMAIN_TO_IP)), file.file.get(config.TXT.IP_SUBDOMAIN), '.[].ip[]')
+		jquery.find_append_file(res, file.file.get(config.TXT.IP_SUBDOMAIN), '.[].ip[]')
 		# --------------------------------
 		return tool.identifier
 
-	def __host(self, tool: session.Tool, primary_key: config.TXT, secondary_key: config.TXT, type: config.DNS, regex: str):
+	def __host(self, tool: session.Tool, primary_key: config.TXT, secondary_key: config.TXT, type: config.DNS):
 		filter.file(primary_key)
 		out = directory.directory.init_tools_file("host")
-		res = run.multiple(
+		res = resolver.resolver.resolve(
+			entries = file.read(file.file.get(primary_key)),
+			type    = type,
 			threads = tool.base.args["threads"],
-			out     = out,
-			key     = primary_key,
-			cmd     = [
-				f"host -s -t {type.value}",
-				run.set_opt(tool.base.args["timeout"], "-W"),
-				run.set_opt(run.PLACEHOLDER)
-			]
+			timeout = tool.base.args["timeout"],
+			retries = tool.base.args["retries"],
+			rate    = tool.base.args["rate"],
+			out     = out
 		)
-		res = grep.results(res, primary_key.value, secondary_key.value, regex)
-		res = jquery.find(res, exclusion.JQ.replace_key(exclusion.exclusion.get(exclusion.JQ.HOST), secondary_key.value)) if exclusion.exclusion.should_filter() else res
+		res = [{primary_key.value: entry, secondary_key.value: array.unique(answer.records)} for entry, answer in res.items() if answer.records]
+		res = exclusion.exclusion.filter_records(res, [secondary_key.value]) if exclusion.exclusion.should_filter() else res
 		jquery.find_append_file(res, file.file.get(secondary_key), f'.[].{secondary_key.value}[]')
 		file.insert(jquery.jdump(res), file.file.get(config.JSON(primary_key.value + config.NAME_SEP + secondary_key.value)))
+		return res
 
 	def httpx(self, tool: session.Tool):
 		session.session.update(tool.identifier)
 		# --------------------------------
-		filter.file(config.TXT.SUBDOMAIN)
 		out   = directory.directory.init_tools_file("httpx", "json")
 		input = file.file.get(config.TXT.SUBDOMAIN)
 		run.single(
@@ -341,17 +463,23 @@ class AutoRecon:
 				run.set_opt(out.path                 , "-json -o")
 			]
 		)
-		res = jquery.jload_array(out)
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG        ), '.[] | select(."status_code" | tostring | test("^2|^3|^4")).url')
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_2XX    ), '.[] | select(."status_code" | tostring | test("^2")).url'      )
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_2XX_4XX), '.[] | select(."status_code" | tostring | test("^2|^4")).url'   )
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_3XX    ), '.[] | select(."status_code" | tostring | test("^3")).url'      )
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_401    ), '.[] | select(."status_code" | tostring | test("^401$")).url'   )
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_403    ), '.[] | select(."status_code" | tostring | test("^403$")).url'   )
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_4XX    ), '.[] | select(."status_code" | tostring | test("^4")).url'      )
-		jquery.find_append_file(res, file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_5XX    ), '.[] | select(."status_code" | tostring | test("^5")).url'      )
-		# --------------------------------
-		res = jquery.find_insert_file(res, file.file.get(config.JSON.SUBDOMAIN_TO_CSP), 'group_by(.url) | map({subdomain: .[0].url, csp: map(.csp.domains // empty | .[])}) | map(select(.csp | length > 0)) | .[]', dump = True)
+		res = parse.jq_append_files(out, [
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG        ), '.[] | select(."status_code" | tostring | test("^2|^3|^4")).url'),
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_2XX    ), '.[] | select(."status_code" | tostring | test("^2")).url'      ),
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_2XX_4XX), '.[] | select(."status_code" | tostring | test("^2|^4")).url'   ),
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_3XX    ), '.[] | select(."status_code" | tostring | test("^3")).url'      ),
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_401    ), '.[] | select(."status_code" | tostring | test("^401$")).url'   ),
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_403    ), '.[] | select(."status_code" | tostring | test("^403$")).url'   ),
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_4XX    ), '.[] | select(."status_code" | tostring | test("^4")).url'      ),
+			(file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_5XX    ), '.[] | select(."status_code" | tostring | test("^5")).url'      ),
+			(None                                                 , 'group_by(.url) | map({subdomain: .[0].url, csp: map(.csp.domains // empty | .[])}) | map(select(.csp | length > 0)) | .[]'),
+			*([(None, database.HTTP_RECORDS)] if database.database.is_enabled() else [])
+		], lines = True)
+		if database.database.is_enabled():
+			database.database.add_http(self.__args.domain, res.pop())
+		# --------------------------------
+		res = jquery.jdump(res[-1])
+		file.insert(res, file.file.get(config.JSON.SUBDOMAIN_TO_CSP))
 		jquery.find_append_file(res, file.file.get(config.TXT.CSP), '.[].csp[]')
 		# --------------------------------
 		filter.file(config.TXT.SUBDOMAIN_LIVE_LONG)
@@ -370,17 +498,16 @@ class AutoRecon:
 		# --------------------------------
 		out = directory.directory.init_tools_file("gau")
 		run.multiple(
-			threads = tool.base.args["threads"],
-			out     = out,
-			key     = config.TXT.SUBDOMAIN_LIVE,
-			cmd     = [
+			threads    = tool.base.args["threads"],
+			out        = out,
+			key        = config.TXT.SUBDOMAIN_LIVE,
+			batch      = run.Batch(tool.base.args["batch"], stdin = True),
+			extractors = [run.Extractor(file.file.get(config.TXT.URL))],
+			cmd        = [
 				"gau",
-				run.set_opt(tool.base.args["retries"], "--retries"),
-				run.set_opt(run.PLACEHOLDER)
+				run.set_opt(tool.base.args["retries"], "--retries")
 			]
 		)
-		res = file.read(out, array = False)
-		file.append(res, file.file.get(config.TXT.URL))
 		# --------------------------------
 		return tool.identifier
 
@@ -392,10 +519,10 @@ class AutoRecon:
 			threads = tool.base.args["threads"],
 			out     = out,
 			key     = config.TXT.IP,
+			batch   = run.Batch(tool.base.args["batch"], stdin = True),
 			cmd     = [
 				"asnmap -silent -j",
-				run.set_opt(self.__args.resolvers, "-r"),
-				run.set_opt(run.PLACEHOLDER      , "-i")
+				run.set_opt(self.__args.resolvers, "-r")
 			]
 		)
 		res = jquery.find_insert_file(jquery.jload_array(out), file.file.get(config.JSON.IP_TO_WHOIS_ASN), 'map({ip: .input, asn: .as_number, org: .as_name, cidr: .as_range}) | .[]', dump = True)
@@ -405,43 +532,23 @@ class AutoRecon:
 		# --------------------------------
 		return tool.identifier
 
-	def openssl(self, tool: session.Tool):
+	def tls(self, tool: session.Tool):
 		session.session.update(tool.identifier)
 		# --------------------------------
-		out = directory.directory.init_tools_file("openssl")
-		res = run.multiple(
+		out = directory.directory.init_tools_file("tls")
+		res = tls.collect_all(
+			entries = file.read(file.file.get(config.TXT.SUBDOMAIN_LIVE_SHORT_HTTPS)),
 			threads = tool.base.args["threads"],
-			out     = out,
-			key     = config.TXT.SUBDOMAIN_LIVE_SHORT_HTTPS,
-			cmd     = [
-				"echo Q | openssl s_client",
-				run.set_opt(run.PLACEHOLDER, "-connect")
-			]
-		)
-		res = grep.results(res, "subdomain", "heartbleed", r"server\ extension\ \"heartbeat\"\ \(id\=15\)")
-		jquery.find_append_file(res, file.file.get(config.TXT.CERT_OPENSSL_HEARTBLEED), '.[].subdomain')
-		# --------------------------------
-		return tool.identifier
-
-	def keytool(self, tool: session.Tool):
-		session.session.update(tool.identifier)
-		# --------------------------------
-		out = directory.directory.init_tools_file("keytool")
-		res = run.multiple(
-			threads = tool.base.args["threads"],
-			out     = out,
-			key     = config.TXT.SUBDOMAIN_LIVE_SHORT_HTTPS,
-			cmd     = [
-				"keytool -printcert -rfc",
-				run.set_opt(run.PLACEHOLDER, "-sslserver")
-			]
+			timeout = tool.base.args["timeout"],
+			out     = out
 		)
+		file.append([subdomain for subdomain, handshake in res.items() if handshake.heartbeat], file.file.get(config.TXT.CERT_OPENSSL_HEARTBLEED))
 		dir = directory.directory.init_tools_subdirectory("certificates")
-		tmp = []
-		for result in res:
-			out = directory.directory.init_tools_file(result.data.replace(".", "_").replace(":", "_"), "txt", dir)
-			tmp.append(cert.Certificate(result.data, result.response, out).to_dict())
-		res = jquery.jdump(tmp)
+		res = parse.certificates(
+			chains = {subdomain: handshake.chain for subdomain, handshake in res.items()},
+			outs   = {subdomain: directory.directory.init_tools_file(subdomain.replace(".", "_").replace(":", "_"), "txt", dir) for subdomain in res}
+		)
+		res = jquery.jdump(res)
 		jquery.find_append_file(res, file.file.get(config.TXT.CERT_SUBJECT_COMMON_NAME), '.[].subject_common_name // empty | .[]')
 		file.insert(res, file.file.get(config.JSON.SUBDOMAIN_TO_CERT))
 		# --------------------------------
@@ -560,8 +667,7 @@ class AutoRecon:
 				run.set_opt(run.PLACEHOLDER)
 			]
 		)
-		res = jquery.jload_array(out)
-		jquery.find_append_file(res, file.file.get(config.TXT.DIRECTORY_SENSITIVE), '.[].[].url')
+		parse.jq_append_files(out, [(file.file.get(config.TXT.DIRECTORY_SENSITIVE), '.[].[].url')], lines = True)
 
 	def trufflehog(self, tool: session.Tool):
 		session.session.update(tool.identifier)
@@ -570,15 +676,15 @@ class AutoRecon:
 		dir2 = directory.directory.init_tools_subdirectory("chad_download")
 		out  = directory.directory.init_tools_file("trufflehog")
 		run.single(
-			out = out,
-			cmd = [
+			out        = out,
+			extractors = [run.Extractor(file.file.get(config.TXT.SAST_SECRET))],
+			cmd        = [
 				f"trufflehog filesystem --no-color --log-level=-1 --only-verified",
 				run.set_opt(tool.base.args["threads"], "--concurrency="),
 				run.set_opt(dir1),
 				run.set_opt(dir2)
 			]
 		)
-		file.copy_append(out, file.file.get(config.TXT.SAST_SECRET))
 		# --------------------------------
 		return tool.identifier
 
@@ -590,8 +696,9 @@ class AutoRecon:
 		paths      = wordlist.wordlist.get(config.Wordlist.LEAKY_PATHS)
 		user_agent = general.get_random_user_agent()
 		run.single(
-			cmd = [
-				f"cat {run.set_opt(input.path)} | feroxbuster --stdin --no-state --silent -k -n --auto-bail -m GET -s 200,301,302,401,403",
+			stdin = input.path,
+			cmd   = [
+				"feroxbuster --stdin --no-state --silent -k -n --auto-bail -m GET -s 200,301,302,401,403",
 				run.set_opt(tool.base.args["threads"   ], "-t"       ),
 				run.set_opt(tool.base.args["subthreads"], "-L"       ),
 				run.set_opt(tool.base.args["timeout"   ], "-T"       ),
@@ -600,13 +707,14 @@ class AutoRecon:
 				run.set_opt(out.path                    , "--json -o")
 			]
 		)
-		result = jquery.jload_array(out)
-		jquery.find_append_file(result, file.file.get(config.TXT.LEAKY_PATHS        ), '.[] | select(."status" | tostring | test("^2|^3|^401$|^403$")).url')
-		jquery.find_append_file(result, file.file.get(config.TXT.LEAKY_PATHS_2XX    ), '.[] | select(."status" | tostring | test("^2")).url'               )
-		jquery.find_append_file(result, file.file.get(config.TXT.LEAKY_PATHS_2XX_4XX), '.[] | select(."status" | tostring | test("^2|^401$|^403$")).url'   )
-		jquery.find_append_file(result, file.file.get(config.TXT.LEAKY_PATHS_3XX    ), '.[] | select(."status" | tostring | test("^3")).url'               )
-		jquery.find_append_file(result, file.file.get(config.TXT.LEAKY_PATHS_401    ), '.[] | select(."status" | tostring | test("^401$")).url'            )
-		jquery.find_append_file(result, file.file.get(config.TXT.LEAKY_PATHS_403    ), '.[] | select(."status" | tostring | test("^403$")).url'            )
+		parse.jq_append_files(out, [
+			(file.file.get(config.TXT.LEAKY_PATHS        ), '.[] | select(."status" | tostring | test("^2|^3|^401$|^403$")).url'),
+			(file.file.get(config.TXT.LEAKY_PATHS_2XX    ), '.[] | select(."status" | tostring | test("^2")).url'               ),
+			(file.file.get(config.TXT.LEAKY_PATHS_2XX_4XX), '.[] | select(."status" | tostring | test("^2|^401$|^403$")).url'   ),
+			(file.file.get(config.TXT.LEAKY_PATHS_3XX    ), '.[] | select(."status" | tostring | test("^3")).url'               ),
+			(file.file.get(config.TXT.LEAKY_PATHS_401    ), '.[] | select(."status" | tostring | test("^401$")).url'            ),
+			(file.file.get(config.TXT.LEAKY_PATHS_403    ), '.[] | select(."status" | tostring | test("^403$")).url'            )
+		], lines = True)
 		# --------------------------------
 		return tool.identifier
 
@@ -635,8 +743,9 @@ class AutoRecon:
 			input      = file.file.get(config.TXT.SUBDOMAIN_LIVE_LONG_4XX)
 			user_agent = general.get_random_user_agent()
 			run.single(
-				cmd = [
-					f"cat {run.set_opt(input.path)} | feroxbuster --stdin --no-state --silent -k -n --auto-bail -m GET -s 200,301,302,401,403",
+				stdin = input.path,
+				cmd   = [
+					"feroxbuster --stdin --no-state --silent -k -n --auto-bail -m GET -s 200,301,302,401,403",
 					run.set_opt(tool.base.args["threads"   ], "-t"       ),
 					run.set_opt(tool.base.args["subthreads"], "-L"       ),
 					run.set_opt(tool.base.args["timeout"   ], "-T"       ),
@@ -645,13 +754,14 @@ class AutoRecon:
 					run.set_opt(out.path                    , "--json -o")
 				]
 			)
-			res = jquery.jload_array(out)
-			jquery.find_append_file(res, file.file.get(config.TXT.DIRECTORY        ), '.[] | select(."status" | tostring | test("^2|^3|^401$|^403$")).url')
-			jquery.find_append_file(res, file.file.get(config.TXT.DIRECTORY_2XX    ), '.[] | select(."status" | tostring | test("^2")).url'               )
-			jquery.find_append_file(res, file.file.get(config.TXT.DIRECTORY_2XX_4XX), '.[] | select(."status" | tostring | test("^2|^401$|^403$")).url'   )
-			jquery.find_append_file(res, file.file.get(config.TXT.DIRECTORY_3XX    ), '.[] | select(."status" | tostring | test("^3")).url'               )
-			jquery.find_append_file(res, file.file.get(config.TXT.DIRECTORY_401    ), '.[] | select(."status" | tostring | test("^401$")).url'            )
-			jquery.find_append_file(res, file.file.get(config.TXT.DIRECTORY_403    ), '.[] | select(."status" | tostring | test("^403$")).url'            )
+			parse.jq_append_files(out, [
+				(file.file.get(config.TXT.DIRECTORY        ), '.[] | select(."status" | tostring | test("^2|^3|^401$|^403$")).url'),
+				(file.file.get(config.TXT.DIRECTORY_2XX    ), '.[] | select(."status" | tostring | test("^2")).url'               ),
+				(file.file.get(config.TXT.DIRECTORY_2XX_4XX), '.[] | select(."status" | tostring | test("^2|^401$|^403$")).url'   ),
+				(file.file.get(config.TXT.DIRECTORY_3XX    ), '.[] | select(."status" | tostring | test("^3")).url'               ),
+				(file.file.get(config.TXT.DIRECTORY_401    ), '.[] | select(."status" | tostring | test("^401$")).url'            ),
+				(file.file.get(config.TXT.DIRECTORY_403    ), '.[] | select(."status" | tostring | test("^403$")).url'            )
+			], lines = True)
 		# --------------------------------
 		return tool.identifier
 
@@ -667,8 +777,7 @@ class AutoRecon:
 				run.set_opt(out.path  , "-oG")
 			]
 		)
-		res = file.read(out, array = False)
-		grep.find_append_file(res, file.file.get(config.TXT.IP_SUBDOMAIN_LIVE), r"(?<=Host\:\ ).[^\s]+")
+		parse.grep_append_files(out, [(file.file.get(config.TXT.IP_SUBDOMAIN_LIVE), r"(?<=Host\:\ ).[^\s]+")])
 		# --------------------------------
 		out   = directory.directory.init_tools_file("nmap_tcp")
 		input = file.file.get(config.TXT.IP_SUBDOMAIN_LIVE)
@@ -722,22 +831,22 @@ class AutoRecon:
 		return tool.identifier
 
 	def __forbidden(self, tool: session.Tool, key: config.TXT, cmd: list[str]):
-		with concurrent.futures.ThreadPoolExecutor(max_workers = tool.base.args["threads"]) as executor:
-			dir = directory.directory.init_tools_subdirectory("forbidden")
-			for url in file.read(file.file.get(key)):
-				filename = url.replace("//", "_").replace(".", "_").replace(":", "_").replace("/", "_").strip("_")
-				out = directory.directory.init_tools_file(filename, "json", dir)
-				executor.submit(
-					run.single,
-					cmd = [
-						"forbidden -st -a random",
-						run.set_opt(tool.base.args["subthreads"], "-th"),
-						run.set_opt(tool.base.args["timeout"   ], "-rt"),
-						*cmd,
-						run.set_opt(out.path, "-o"),
-						run.set_opt(url     , "-u"),
-					],
-				)
+		dir  = directory.directory.init_tools_subdirectory("forbidden")
+		jobs = []
+		for url in file.read(file.file.get(key)):
+			filename = url.replace("//", "_").replace(".", "_").replace(":", "_").replace("/", "_").strip("_")
+			out = directory.directory.init_tools_file(filename, "json", dir)
+			jobs.append(run.Job(
+				cmd = [
+					"forbidden -st -a random",
+					run.set_opt(tool.base.args["subthreads"], "-th"),
+					run.set_opt(tool.base.args["timeout"   ], "-rt"),
+					*cmd,
+					run.set_opt(out.path, "-o"),
+					run.set_opt(url     , "-u"),
+				]
+			))
+		run.many(jobs, tool.base.args["threads"])
 
 	def nuclei(self, tool: session.Tool):
 		session.session.update(tool.identifier)
@@ -761,7 +870,8 @@ class AutoRecon:
 	def cleanup(self, tool: session.Tool):
 		session.session.update(tool.identifier)
 		# --------------------------------
-		filter.files()
+		# NOTE: All files are filtered by the scheduler beforehand, as they are the tool's inputs.
+		file.file.flush()
 		directory.directory.cleanup()
 		# --------------------------------
 		return tool.identifier
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+from . import config, debug, file
+
+import hashlib, os, regex as re, threading, time, uuid
+
+ROOT_PLACEHOLDER = "<root/>"
+"""
+A placeholder that replaces the output directory in cache keys, so that the same command from a different run has the same key.
+"""
+
+ERROR_PATTERNS = [
+	r"^\s*\[(?:err|error|ftl|fatal)\]",
+	r"^\s*(?:error|fatal|panic)\s*:",
+	r"^\s*level=(?:error|fatal)\b",
+	r"\b(?:quota|credits?)\s+(?:has\s+been\s+|have\s+been\s+)?(?:exceeded|exhausted)\b",
+	r"\b(?:rate\s+limit(?:ed)?|too\s+many\s+requests)\b",
+	r"\b(?:invalid|missing|no)\s+api\s+key\b"
+]
+"""
+Regular expressions matching a tool output that looks like an error, for example, an exceeded API quota or a rate limit, which is not cached.\n
+Edit or add more patterns here.
+"""
+
+__ERROR = re.compile(("|").join(f"(?:{pattern})" for pattern in ERROR_PATTERNS).encode(), re.MULTILINE | re.IGNORECASE)
+
+def is_error(output: bytes):
+	"""
+	Returns `True` if a chunk of a tool output looks like an error, see `cache.ERROR_PATTERNS`.
+	"""
+	return bool(__ERROR.search(output))
+
+def get_directory():
+	"""
+	Get the cache directory, that is, `$XDG_CACHE_HOME/auto-recon` or `~/.cache/auto-recon`.
+	"""
+	return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), config.APP_NAME)
+
+def __replace_root(arg: str, root_directory: str):
+	"""
+	Replace the output directory with `cache.ROOT_PLACEHOLDER` if it is a path prefix of an argument or of an `--option=value` argument value.
+	"""
+	option, value = arg.split("=", 1) if arg.startswith("-") and "=" in arg else ("", arg)
+	root_directory = root_directory.rstrip(os.path.sep)
+	if value == root_directory or value.startswith(root_directory + os.path.sep):
+		value = ROOT_PLACEHOLDER + value[len(root_directory):]
+		arg = f"{option}={value}" if option else value
+	return arg
+
+def get_key(argv: list[str], stdin: str | bytes = None, data = "", root_directory = ""):
+	"""
+	Get a cache key for a tool invocation from its normalized command, standard input, and input entry.\n
+	The command is normalized by splitting it into arguments and replacing the output directory with `cache.ROOT_PLACEHOLDER` where it is a path prefix of an argument or of an `--option=value` argument value.\n
+	If `stdin` is a path to a file, the content of the file is hashed.
+	"""
+	hash = hashlib.sha256()
+	for arg in argv:
+		if root_directory:
+			arg = __replace_root(arg, root_directory)
+		hash.update(arg.encode(file.ENCODING) + b"\0")
+	hash.update(b"\0")
+	if isinstance(stdin, bytes):
+		hash.update(stdin)
+	elif stdin:
+		with open(stdin, "rb") as stream:
+			while chunk := stream.read(65536):
+				hash.update(chunk)
+	hash.update(b"\0" + data.encode(file.ENCODING))
+	return hash.hexdigest()
+
+class Writer:
+
+	def __init__(self, cache: "Cache", key: str):
+		"""
+		Initialize a class for writing a tool output to the cache.\n
+		The output is written to a temporary file, which replaces the cached output only on `commit()`.
+		"""
+		self.__cache = cache
+		self.__key = key
+		self.__path = f"{cache.get_path(key)}.{uuid.uuid4().hex}.tmp"
+		self.__stream = None
+		self.__size = 0
+		self.__error = False
+
+	def write(self, data: bytes):
+		"""
+		Write a chunk of the tool output.
+		"""
+		self.__size += len(data)
+		self.__error = self.__error or is_error(data)
+		try:
+			if not self.__stream:
+				os.makedirs(os.path.dirname(self.__path), exist_ok = True)
+				self.__stream = open(self.__path, "wb")
+			self.__stream.write(data)
+		except Exception as ex:
+			debug.debug.log_error(f"utils.cache.Writer().write() > {self.__path}", ex)
+
+	def commit(self):
+		"""
+		Store the tool output in the cache.\n
+		An empty tool output, or a tool output that looks like an error, is discarded instead, see `cache.is_error()`.
+		"""
+		if not self.__size or self.__error:
+			debug.debug.log_debug(f"utils.cache.Writer().commit() > Not caching {'an empty' if not self.__size else 'an error-looking'} output", self.__key)
+			self.discard()
+			return
+		if self.__stream:
+			self.__stream.close()
+			self.__cache.store(self.__key, self.__path)
+
+	def discard(self):
+		"""
+		Discard the tool output, for example, if the tool invocation has failed or timed out.
+		"""
+		if self.__stream:
+			self.__stream.close()
+			file.remove_silent(self.__path)
+
+class Cache:
+
+	def __init__(self):
+		"""
+		Initialize a class for caching tool outputs across runs.
+		"""
+		self.__lock = threading.Lock()
+		self.initialize(enabled = False)
+
+	def initialize(self, enabled = True, refresh = False, max_size = config.CACHE_MAX_SIZE, directory = ""):
+		"""
+		[Re]initialize.\n
+		If `refresh` is `True`, cached outputs are not read, but are still overwritten with new outputs.
+		"""
+		self.__enabled = enabled
+		self.__refresh = refresh
+		self.__max_size = max_size
+		self.__directory = directory or get_directory()
+		self.__size: int = None
+
+	def is_enabled(self):
+		"""
+		Returns `True` if caching is enabled.
+		"""
+		return self.__enabled
+
+	def get_path(self, key: str):
+		"""
+		Get the full path to a cached output.
+		"""
+		return os.path.join(self.__directory, key[:2], key)
+
+	def get(self, key: str, ttl: int) -> str | None:
+		"""
+		Get the full path to a cached output if it is not older than `ttl` seconds, and mark it as recently used.\n
+		Returns `None` on a cache miss, or if refreshing the cache.
+		"""
+		tmp = None
+		if self.__enabled and not self.__refresh:
+			path = self.get_path(key)
+			try:
+				stat = os.stat(path)
+				now = time.time()
+				if stat.st_mtime + ttl >= now:
+					os.utime(path, (now, stat.st_mtime))
+					tmp = path
+			except FileNotFoundError:
+				pass
+			except Exception as ex:
+				debug.debug.log_error(f"utils.cache.Cache().get() > {path}", ex)
+		return tmp
+
+	def writer(self, key: str) -> Writer | None:
+		"""
+		Get a writer for a tool output.\n
+		Returns `None` if caching is disabled.
+		"""
+		return Writer(self, key) if self.__enabled else None
+
+	def store(self, key: str, temporary: str):
+		"""
+		Replace the cached output with a temporary file, and evict the least recently used outputs if the cache exceeds its maximum size.
+		"""
+		path = self.get_path(key)
+		with self.__lock:
+			try:
+				size = self.__get_size()
+				if os.path.isfile(path):
+					size -= os.path.getsize(path)
+				os.replace(temporary, path)
+				self.__size = size + os.path.getsize(path)
+				if self.__size > self.__max_size:
+					self.__evict()
+			except Exception as ex:
+				file.remove_silent(temporary)
+				debug.debug.log_error(f"utils.cache.Cache().store() > {path}", ex)
+
+	def __list(self) -> list[os.DirEntry]:
+		"""
+		List all cached outputs, excluding temporary files.
+		"""
+		tmp = []
+		if os.path.isdir(self.__directory):
+			for subdirectory in os.scandir(self.__directory):
+				if subdirectory.is_dir():
+					tmp.extend(entry for entry in os.scandir(subdirectory.path) if entry.is_file() and not entry.name.endswith(".tmp"))
+		return tmp
+
+	def __get_size(self):
+		"""
+		Get the total size of the cache, and scan the cache directory on the first use.\n
+		Must be called while holding the lock.
+		"""
+		if self.__size is None:
+			self.__size = sum(entry.stat().st_size for entry in self.__list())
+		return self.__size
+
+	def __evict(self):
+		"""
+		Remove the least recently used outputs until the cache is within its maximum size.\n
+		Must be called while holding the lock.
+		"""
+		for entry in sorted(self.__list(), key = lambda entry: entry.stat().st_atime):
+			if self.__size <= self.__max_size:
+				break
+			self.__size -= entry.stat().st_size
+			file.remove_silent(entry.path)
+
+cache = Cache()
+"""
+Singleton class instance for caching tool outputs across runs.
+"""
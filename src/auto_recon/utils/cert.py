@@ -30,6 +30,23 @@ def decode_pem(text: str, out: file.SafeFile | str = None) -> list[cryptography.
 		file.insert(("\n").join(stringified), out)
 	return tmp
 
+def decode_der(ders: list[bytes], out: file.SafeFile | str = None) -> list[cryptography.x509.Certificate]:
+	"""
+	Deserialize DER certificates into objects, then, dump the stringified objects into a file.
+	"""
+	tmp = []
+	stringified = []
+	for der in ders:
+		try:
+			tmp.append(cryptography.x509.load_der_x509_certificate(der))
+			if out:
+				stringified.append(OpenSSL.crypto.dump_certificate(OpenSSL.crypto.FILETYPE_TEXT, OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_ASN1, der)).decode(ENCODING))
+		except Exception as ex:
+			debug.debug.log_error(f"utils.cert.decode_der() > {out}" if out else "utils.cert.decode_der()", ex)
+	if stringified:
+		file.insert(("\n").join(stringified), out)
+	return tmp
+
 def __get_attribute(cert: cryptography.x509.Certificate, attribute: cryptography.x509.ObjectIdentifier, subject: bool) -> list[str]:
 	"""
 	Get an attribute from a certificate.\n
@@ -119,9 +136,10 @@ def get_issuer_org_unit_name(cert: cryptography.x509.Certificate):
 
 class Certificate:
 
-	def __init__(self, subdomain: str, text: str, out: file.SafeFile | str = None):
+	def __init__(self, subdomain: str, certs: list[cryptography.x509.Certificate]):
 		"""
-		Class for storing certificate details.
+		Class for storing certificate details.\n
+		Use `cert.decode_pem()` or `cert.decode_der()` to deserialize the certificates.
 		"""
 		self.subdomain            : str       = subdomain
 		self.subject_common_name  : list[str] = []
@@ -130,7 +148,7 @@ class Certificate:
 		self.issuer_common_name   : list[str] = []
 		self.issuer_org_name      : list[str] = []
 		self.issuer_org_unit_name : list[str] = []
-		for cert in decode_pem(text, out):
+		for cert in certs:
 			self.subject_common_name.extend(get_subject_common_name(cert))
 			self.subject_org_name.extend(get_subject_org_name(cert))
 			self.subject_org_unit_name.extend(get_subject_org_unit_name(cert))
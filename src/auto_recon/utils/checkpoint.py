@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+from . import array, config, context, debug, file
+
+import hashlib, json, os, threading
+
+def get_key(name: str, parts: list[str]):
+	"""
+	Get a checkpoint key for a tool and the parts that identify its tool invocations, for example, the `config.TXT` key of its entries.\n
+	Do not include the command itself, since it may contain volatile options, for example, a random user agent, which would never match on restore.
+	"""
+	return hashlib.sha256(f"{name}\0{array.join(parts)}".encode(file.ENCODING)).hexdigest()[:16]
+
+class Checkpoint:
+
+	__CHECKPOINT_FILENAME = "checkpoint.jsonl"
+
+	def __init__(self):
+		"""
+		Initialize a class for journaling completed tool invocations, so that a restored session does not run them again.
+		"""
+		self.__lock = threading.Lock()
+		self.initialize("")
+
+	def initialize(self, root_directory: str, restore = False):
+		"""
+		[Re]initialize.\n
+		If not restoring a session, the journal is cleared.
+		"""
+		self.__root_directory = root_directory
+		self.__checkpoint_file = self.__init_safe_file(self.__CHECKPOINT_FILENAME)
+		self.__journal: dict[str, dict[str, str]] = None
+		if root_directory and not restore:
+			file.remove_silent(self.__checkpoint_file.path)
+
+	def __init_safe_file(self, filename: str):
+		"""
+		Initialize a thread-safe file in the config directory.
+		"""
+		return file.SafeFile(os.path.join(self.__root_directory, config.Directory.CONFIG.value, filename))
+
+	def __load(self) -> dict[str, dict[str, str]]:
+		"""
+		Load the journal from the checkpoint file in the config directory, if not already loaded.\n
+		Must be called while holding the lock.
+		"""
+		if self.__journal is None:
+			self.__journal = {}
+			for line in file.read(self.__checkpoint_file) if file.validate_silent(self.__checkpoint_file.path) else []:
+				try:
+					record = json.loads(line)
+					self.__journal.setdefault(record["key"], {})[record["data"]] = record["response"]
+				except Exception as ex:
+					debug.debug.log_error(f"utils.checkpoint.Checkpoint().__load() > {self.__checkpoint_file.path}", ex)
+		return self.__journal
+
+	def get(self, key: str) -> dict[str, str]:
+		"""
+		Get the data and responses of the completed tool invocations for the specified key.
+		"""
+		with self.__lock:
+			return dict(self.__load().get(key, {}))
+
+	def restore(self, key: str, entries: list[str]) -> tuple[dict[str, str], list[str]]:
+		"""
+		Split entries into the completed tool invocations for the specified key, and the entries that still need to be run.\n
+		The data of a tool invocation may contain multiple entries separated by newlines, in which case the tool invocation is restored only if all of its entries are present.\n
+		Returns the data and responses of the completed tool invocations, and the remaining entries.
+		"""
+		journal = self.get(key)
+		if not journal:
+			return {}, entries
+		unique = set(entries)
+		tmp = {data: response for data, response in journal.items() if unique.issuperset(data.split("\n"))}
+		completed = {entry for data in tmp for entry in data.split("\n")}
+		return tmp, [entry for entry in entries if entry not in completed]
+
+	def add(self, key: str, results: dict[str, str]):
+		"""
+		Journal the data and responses of completed tool invocations for the specified key.
+		"""
+		if results:
+			with self.__lock:
+				self.__load().setdefault(key, {}).update(results)
+				file.append([json.dumps({"key": key, "data": data, "response": response}) for data, response in results.items()], self.__checkpoint_file)
+
+checkpoint: Checkpoint = context.Proxy("checkpoint", Checkpoint)
+"""
+Context-specific singleton class instance for journaling completed tool invocations.
+"""
@@ -2,6 +2,8 @@
 
 import dataclasses, enum
 
+APP_NAME = "auto-recon"
+
 APP_VERSION = "v1.1.0"
 
 HEADING = f"Auto Recon {APP_VERSION} ( github.com/ivan-sincek/auto-recon )"
@@ -143,19 +145,74 @@ class Tool:
 	active   : bool                    = False
 	intrusive: Intrusive               = Intrusive.NOT
 
+@dataclasses.dataclass
+class IO:
+	"""
+	Class for storing tool inputs and outputs.\n
+	Use `inputs` and `outputs` attributes to specify the TXT and JSON files that the tool reads and writes.\n
+	Use `after` attribute to specify the tools whose other artifacts, for example, downloaded files, the tool reads.
+	"""
+	inputs : set[TXT | JSON] = dataclasses.field(default_factory = set)
+	outputs: set[TXT | JSON] = dataclasses.field(default_factory = set)
+	after  : set[str]        = dataclasses.field(default_factory = set)
+
 # ----------------------------------------
 
 THREADS_LOW    = 5
 THREADS_MEDIUM = 15
 THREADS_HIGH   = 30
 
+THREADS_DNS = 500
+"""
+Number of concurrent in-process DNS queries.
+"""
+
+RATE_DNS = 1000
+"""
+Maximum number of DNS queries per second to send to each DNS resolver, zero means unlimited.
+"""
+
 TIMEOUT_LOW    = 5
 TIMEOUT_MEDIUM = 15
 TIMEOUT_HIGH   = 30
 
+TIMEOUT_INVOCATION = 0
+"""
+Default maximum number of seconds a single tool invocation may run before its process group is killed, zero means unlimited.\n
+Override it for all tools with the `-it` CLI option, or per tool with the `invocation_timeout` argument.
+"""
+
+TIMEOUT_TOOL = 0
+"""
+Default maximum number of seconds all tool invocations of a single tool may run in total, zero means unlimited.\n
+Override it for all tools with the `-tt` CLI option, or per tool with the `tool_timeout` argument.
+"""
+
+CACHE_TTL_DAY   = 24 * 60 * 60
+CACHE_TTL_WEEK  = 7 * CACHE_TTL_DAY
+CACHE_TTL_MONTH = 30 * CACHE_TTL_DAY
+
+CACHE_MAX_SIZE = 1024 * 1024 * 1024
+"""
+Maximum size of the cache in bytes, after which the least recently used tool outputs are evicted.\n
+Tool outputs are cached only for tools with the `cache_ttl` argument.
+"""
+
+PORT_RULES = [
+	(80, 443)
+]
+"""
+Rules for filtering redundant ports, as pairs of a port to ignore and a port to keep; an entry on the port to ignore is removed if the same FQDN is also present on the port to keep.\n
+Edit or add more rules here, for example, `(8080, 8443)`; note that alternative ports often serve different services.
+"""
+
 RETRIES_MIN = 1
 RETRIES_MAX = 3
 
+BATCH_LOW    = 10
+BATCH_MEDIUM = 100
+BATCH_HIGH   = 500
+
 RUNTIME = {
 	"S-01": [
 		Tool(
@@ -171,7 +228,8 @@ RUNTIME = {
 			args = {"threads": THREADS_MEDIUM, "timeout": TIMEOUT_HIGH}
 		),
 		Tool(
-			name = "amass"
+			name = "amass",
+			args = {"invocation_timeout": 2 * 60 * 60}
 		)
 	],
 	"S-02": [
@@ -184,13 +242,13 @@ RUNTIME = {
 	"S-03": [
 		Tool(
 			name = "dig",
-			args = {"threads": THREADS_HIGH, "timeout": TIMEOUT_LOW}
+			args = {"threads": THREADS_DNS, "timeout": TIMEOUT_LOW, "retries": RETRIES_MAX, "rate": RATE_DNS}
 		)
 	],
 	"S-04": [
 		Tool(
 			name = "host",
-			args = {"threads": THREADS_HIGH, "timeout": TIMEOUT_LOW}
+			args = {"threads": THREADS_DNS, "timeout": TIMEOUT_LOW, "retries": RETRIES_MAX, "rate": RATE_DNS}
 		)
 	],
 	"S-05": [
@@ -201,27 +259,17 @@ RUNTIME = {
 		)
 	],
 	"S-06": [
-		Tool(
-			name = "cleanup"
-		)
-	],
-	"S-07": [
 		Tool(
 			name = "gau",
-			args = {"threads": THREADS_LOW, "retries": RETRIES_MAX}
+			args = {"threads": THREADS_LOW, "retries": RETRIES_MAX, "batch": BATCH_LOW, "cache_ttl": CACHE_TTL_WEEK}
 		),
 		Tool(
 			name = "asnmap",
-			args = {"threads": THREADS_LOW}
-		),
-		Tool(
-			name = "openssl",
-			args = {"threads": THREADS_LOW},
-			active = True
+			args = {"threads": THREADS_LOW, "batch": BATCH_HIGH, "cache_ttl": CACHE_TTL_MONTH}
 		),
 		Tool(
-			name = "keytool",
-			args = {"threads": THREADS_LOW},
+			name = "tls",
+			args = {"threads": THREADS_HIGH, "timeout": TIMEOUT_LOW},
 			active = True
 		),
 		Tool(
@@ -236,10 +284,10 @@ RUNTIME = {
 			intrusive = Intrusive.LOW
 		)
 	],
-	"S-08": [
+	"S-07": [
 		Tool(
 			name = "uncover",
-			args = {"total": 200, "threads": THREADS_LOW, "timeout": TIMEOUT_HIGH, "retries": RETRIES_MIN}
+			args = {"total": 200, "threads": THREADS_LOW, "timeout": TIMEOUT_HIGH, "retries": RETRIES_MIN, "invocation_timeout": 30 * 60, "cache_ttl": CACHE_TTL_WEEK}
 		),
 		Tool(
 			name = "snallygaster",
@@ -252,7 +300,7 @@ RUNTIME = {
 			args = {"threads": THREADS_MEDIUM},
 		)
 	],
-	"S-09": [
+	"S-08": [
 		Tool(
 			name = "leaky_paths",
 			args = {"threads": THREADS_HIGH, "subthreads": THREADS_MEDIUM, "timeout": TIMEOUT_MEDIUM},
@@ -260,12 +308,12 @@ RUNTIME = {
 			intrusive = Intrusive.HIGH
 		)
 	],
-	"S-10": [
+	"S-09": [
 		Tool(
 			name = "urlhunter"
 		)
 	],
-	"S-11": [
+	"S-10": [
 		Tool(
 			name = "feroxbuster",
 			args = {"threads": THREADS_HIGH, "subthreads": THREADS_MEDIUM, "timeout": TIMEOUT_MEDIUM},
@@ -273,14 +321,14 @@ RUNTIME = {
 			intrusive = Intrusive.HIGH
 		)
 	],
-	"S-12": [
+	"S-11": [
 		Tool(
 			name = "nmap",
 			active = True,
 			intrusive = Intrusive.MEDIUM
 		)
 	],
-	"S-13": [
+	"S-12": [
 		Tool(
 			name = "forbidden",
 			args = {"threads": THREADS_HIGH, "subthreads": THREADS_MEDIUM, "timeout": TIMEOUT_MEDIUM},
@@ -288,7 +336,7 @@ RUNTIME = {
 			intrusive = Intrusive.HIGH
 		)
 	],
-	"S-14": [
+	"S-13": [
 		Tool(
 			name = "nuclei",
 			args = {"threads": THREADS_HIGH, "subthreads": THREADS_MEDIUM, "timeout": TIMEOUT_MEDIUM, "retries": RETRIES_MIN},
@@ -296,9 +344,118 @@ RUNTIME = {
 			intrusive = Intrusive.HIGH
 		)
 	],
-	"S-15": [
+	"S-14": [
 		Tool(
 			name = "cleanup"
 		)
 	]
 }
+
+ALL = {*TXT, *JSON}
+
+IO_MAPPING = {
+	"chad": IO(
+		outputs = {TXT.SUBDOMAIN, TXT.META_PEOPLE, TXT.DIRECTORY_LISTING}
+	),
+	"theharvester": IO(
+		outputs = {TXT.IP, TXT.META_EMAIL, TXT.SUBDOMAIN}
+	),
+	"subfinder": IO(
+		outputs = {TXT.SUBDOMAIN}
+	),
+	"amass": IO(
+		outputs = {TXT.CNAME, TXT.DNS_MAIL_EXCHANGE, TXT.DNS_NAME_SERVER, TXT.IP, TXT.SUBDOMAIN}
+	),
+	"dnsrecon": IO(
+		outputs = {TXT.CNAME, TXT.DNS_MAIL_EXCHANGE, TXT.DNS_NAME_SERVER, TXT.DNS_TEXT, TXT.IP, TXT.SUBDOMAIN}
+	),
+	"dig": IO(
+		inputs  = {TXT.SUBDOMAIN},
+		outputs = {TXT.SUBDOMAIN, TXT.SUBDOMAIN_ERROR, JSON.SUBDOMAIN_TO_STATUS}
+	),
+	"host": IO(
+		inputs  = {TXT.CNAME, TXT.IP, TXT.SUBDOMAIN, TXT.SUBDOMAIN_ERROR},
+		outputs = {TXT.CNAME, TXT.IP, TXT.IP_SUBDOMAIN, TXT.SUBDOMAIN, JSON.IP_TO_SUBDOMAIN, JSON.SUBDOMAIN_ERROR_TO_CNAME, JSON.SUBDOMAIN_TO_CNAME, JSON.SUBDOMAIN_TO_IP}
+	),
+	"httpx": IO(
+		inputs  = {TXT.SUBDOMAIN},
+		outputs = {
+			TXT.CSP,
+			TXT.SUBDOMAIN_LIVE,
+			TXT.SUBDOMAIN_LIVE_LONG,
+			TXT.SUBDOMAIN_LIVE_LONG_2XX,
+			TXT.SUBDOMAIN_LIVE_LONG_2XX_4XX,
+			TXT.SUBDOMAIN_LIVE_LONG_3XX,
+			TXT.SUBDOMAIN_LIVE_LONG_401,
+			TXT.SUBDOMAIN_LIVE_LONG_403,
+			TXT.SUBDOMAIN_LIVE_LONG_4XX,
+			TXT.SUBDOMAIN_LIVE_LONG_5XX,
+			TXT.SUBDOMAIN_LIVE_LONG_HTTP,
+			TXT.SUBDOMAIN_LIVE_LONG_HTTPS,
+			TXT.SUBDOMAIN_LIVE_SHORT,
+			TXT.SUBDOMAIN_LIVE_SHORT_HTTP,
+			TXT.SUBDOMAIN_LIVE_SHORT_HTTPS,
+			JSON.SUBDOMAIN_TO_CSP
+		}
+	),
+	"gau": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE},
+		outputs = {TXT.URL}
+	),
+	"asnmap": IO(
+		inputs  = {TXT.IP},
+		outputs = {TXT.WHOIS_ASN, TXT.WHOIS_CIDR, TXT.WHOIS_ORG, JSON.IP_TO_WHOIS_ASN}
+	),
+	"tls": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_SHORT_HTTPS},
+		outputs = {TXT.CERT_OPENSSL_HEARTBLEED, TXT.CERT_SUBJECT_COMMON_NAME, JSON.SUBDOMAIN_TO_CERT}
+	),
+	"sslscan": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_SHORT_HTTPS}
+	),
+	"scrapy_scraper": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_LONG_2XX},
+		outputs = {TXT.LINK_IN_SCOPE, TXT.LINK_OUT_OF_SCOPE}
+	),
+	"uncover": IO(
+		inputs  = {TXT.CERT_SUBJECT_COMMON_NAME},
+		outputs = {JSON.CERT_SUBJECT_COMMON_NAME_TO_IP}
+	),
+	"snallygaster": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_SHORT_HTTP, TXT.SUBDOMAIN_LIVE_SHORT_HTTPS},
+		outputs = {TXT.DIRECTORY_SENSITIVE}
+	),
+	"trufflehog": IO(
+		outputs = {TXT.SAST_SECRET},
+		after   = {"chad", "scrapy_scraper"}
+	),
+	"leaky_paths": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_LONG_2XX_4XX},
+		outputs = {TXT.LEAKY_PATHS, TXT.LEAKY_PATHS_2XX, TXT.LEAKY_PATHS_2XX_4XX, TXT.LEAKY_PATHS_3XX, TXT.LEAKY_PATHS_401, TXT.LEAKY_PATHS_403}
+	),
+	"urlhunter": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE}
+	),
+	"feroxbuster": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_LONG_4XX},
+		outputs = {TXT.DIRECTORY, TXT.DIRECTORY_2XX, TXT.DIRECTORY_2XX_4XX, TXT.DIRECTORY_3XX, TXT.DIRECTORY_401, TXT.DIRECTORY_403}
+	),
+	"nmap": IO(
+		inputs  = {TXT.IP_SUBDOMAIN, TXT.IP_SUBDOMAIN_LIVE},
+		outputs = {TXT.IP_SUBDOMAIN_LIVE}
+	),
+	"forbidden": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_LONG_2XX, TXT.SUBDOMAIN_LIVE_LONG_401, TXT.SUBDOMAIN_LIVE_LONG_403}
+	),
+	"nuclei": IO(
+		inputs  = {TXT.SUBDOMAIN_LIVE_LONG_2XX_4XX}
+	),
+	"cleanup": IO(
+		inputs  = ALL,
+		outputs = ALL
+	)
+}
+"""
+Mapping of tool names to their inputs and outputs.\n
+Edit or add more tools here; a tool without an entry is scheduled after all tools from the previous stages.
+"""
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import contextvars, typing
+
+class Proxy:
+
+	def __init__(self, name: str, factory: typing.Callable[[], typing.Any]):
+		"""
+		Initialize a class for accessing a singleton class instance that is specific to the current context, for example, to a single run of the main tool.\n
+		Attribute access is forwarded to the instance bound to the current context, or to a default instance if none is bound.\n
+		Use `bind()` to bind a new instance, and `contextvars.copy_context().run()` to pass the bound instances on to other threads.
+		"""
+		self.__factory = factory
+		self.__default = factory()
+		self.__variable: contextvars.ContextVar = contextvars.ContextVar(name, default = None)
+
+	def get_instance(self) -> typing.Any:
+		"""
+		Get the instance bound to the current context, or the default instance if none is bound.
+		"""
+		return self.__variable.get() or self.__default
+
+	def bind(self) -> typing.Any:
+		"""
+		Bind a new instance to the current context, and return it.
+		"""
+		instance = self.__factory()
+		self.__variable.set(instance)
+		return instance
+
+	def __getattr__(self, name: str):
+		return getattr(self.get_instance(), name)
+
+async def within(context: contextvars.Context, coroutine: typing.Coroutine):
+	"""
+	Await a coroutine with the context variables set to the values from the specified context.\n
+	Intended to pass the caller's context on to a coroutine that is submitted to an event loop running in another thread.
+	"""
+	for variable, value in context.items():
+		variable.set(value)
+	return await coroutine
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+from . import config, debug, file, jquery
+
+import json, os, sqlite3, threading, time, typing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+	domain     TEXT NOT NULL,
+	key        TEXT NOT NULL,
+	value      TEXT NOT NULL,
+	first_seen REAL NOT NULL,
+	last_seen  REAL NOT NULL,
+	PRIMARY KEY (domain, key, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS artifacts_first_seen ON artifacts (key, first_seen);
+CREATE INDEX IF NOT EXISTS artifacts_value ON artifacts (value);
+
+CREATE TABLE IF NOT EXISTS hosts (
+	domain     TEXT    NOT NULL,
+	name       TEXT    NOT NULL,
+	live       INTEGER NOT NULL DEFAULT 0,
+	first_seen REAL    NOT NULL,
+	last_seen  REAL    NOT NULL,
+	PRIMARY KEY (domain, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hosts_first_seen ON hosts (first_seen);
+
+CREATE TABLE IF NOT EXISTS ips (
+	domain     TEXT NOT NULL,
+	address    TEXT NOT NULL,
+	first_seen REAL NOT NULL,
+	last_seen  REAL NOT NULL,
+	PRIMARY KEY (domain, address)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ips_address ON ips (address);
+
+CREATE TABLE IF NOT EXISTS relations (
+	domain     TEXT NOT NULL,
+	kind       TEXT NOT NULL,
+	source     TEXT NOT NULL,
+	target     TEXT NOT NULL,
+	first_seen REAL NOT NULL,
+	last_seen  REAL NOT NULL,
+	PRIMARY KEY (domain, kind, source, target)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS relations_target ON relations (kind, target);
+
+CREATE TABLE IF NOT EXISTS certificates (
+	domain     TEXT NOT NULL,
+	subdomain  TEXT NOT NULL,
+	data       TEXT NOT NULL,
+	first_seen REAL NOT NULL,
+	last_seen  REAL NOT NULL,
+	PRIMARY KEY (domain, subdomain)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS http (
+	domain     TEXT NOT NULL,
+	url        TEXT NOT NULL,
+	status     INTEGER,
+	title      TEXT,
+	webserver  TEXT,
+	data       TEXT NOT NULL,
+	first_seen REAL NOT NULL,
+	last_seen  REAL NOT NULL,
+	PRIMARY KEY (domain, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS http_status ON http (status);
+"""
+"""
+Database schema; every table is keyed by the domain, so that a single database can be shared across runs and domains.
+"""
+
+HOST_KEYS = {
+	config.TXT.SUBDOMAIN     : False,
+	config.TXT.SUBDOMAIN_LIVE: True
+}
+"""
+Mapping of `config.TXT` keys to the `hosts` table, and whether their subdomains are live.
+"""
+
+TIMEOUT = 30
+"""
+Number of seconds to wait for a lock on the database, for example, while another run is writing to it, before failing.
+"""
+
+IP_KEYS = {
+	config.TXT.IP
+}
+"""
+`config.TXT` keys mapped to the `ips` table.
+"""
+
+HTTP_RECORDS = ".[] | select(.url)"
+"""
+JQ pattern that extracts the HTTP results from the JSON lines of the `httpx` output, in the same pass as the other patterns, see `parse.jq_append_files()`.
+"""
+
+class Database:
+
+	def __init__(self):
+		"""
+		Initialize a class for recording results in an SQLite database, alongside the TXT and JSON files.\n
+		The database uses the WAL journal mode, so that it can be read, for example, with the `sqlite3` CLI, while it is being written.
+		"""
+		self.__lock = threading.Lock()
+		self.__connection: sqlite3.Connection = None
+
+	def initialize(self, path: str):
+		"""
+		[Re]initialize.\n
+		If `path` is empty, results are not recorded.
+		"""
+		with self.__lock:
+			if self.__connection:
+				self.__connection.close()
+				self.__connection = None
+			if path:
+				os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+				self.__connection = sqlite3.connect(path, timeout = TIMEOUT, check_same_thread = False, isolation_level = None)
+				self.__connection.execute("PRAGMA journal_mode = WAL")
+				self.__connection.execute("PRAGMA synchronous = NORMAL")
+				self.__connection.executescript(SCHEMA)
+
+	def is_enabled(self):
+		"""
+		Returns `True` if results are recorded.
+		"""
+		return self.__connection is not None
+
+	def __upsert(self, statement: str, rows: list[tuple], update = "last_seen = excluded.last_seen"):
+		"""
+		Insert rows in a single transaction, or if a row already exists, update its columns, by default, only the `last_seen` column.\n
+		The statement must end with the `ON CONFLICT` target.
+		"""
+		if self.__connection and rows:
+			with self.__lock:
+				try:
+					self.__connection.execute("BEGIN")
+					self.__connection.executemany(f"{statement} DO UPDATE SET {update}", rows)
+					self.__connection.execute("COMMIT")
+				except Exception as ex:
+					if self.__connection.in_transaction:
+						self.__connection.execute("ROLLBACK")
+					debug.debug.log_error(f"utils.database.Database().__upsert() > {statement}", ex)
+
+	def add_artifacts(self, domain: str, key: config.TXT, values: list[str]):
+		"""
+		Record the lines of a `config.TXT` file, and the hosts and IPs among them.
+		"""
+		now = time.time()
+		self.__upsert("INSERT INTO artifacts VALUES (?, ?, ?, ?, ?) ON CONFLICT (domain, key, value)", [(domain, key.value, value, now, now) for value in values])
+		if key in HOST_KEYS:
+			live = int(HOST_KEYS[key])
+			self.__upsert("INSERT INTO hosts VALUES (?, ?, ?, ?, ?) ON CONFLICT (domain, name)", [(domain, value, live, now, now) for value in values], "live = MAX(live, excluded.live), last_seen = excluded.last_seen")
+		elif key in IP_KEYS:
+			self.__upsert("INSERT INTO ips VALUES (?, ?, ?, ?) ON CONFLICT (domain, address)", [(domain, value, now, now) for value in values])
+
+	def add_relations(self, domain: str, key: config.JSON, records: list[dict[str, typing.Any]]):
+		"""
+		Record the content of a `config.JSON` file.\n
+		Each record maps a primary key to a secondary key, for example, a subdomain to a list of IPs, and is recorded as one relation per pair of primary and secondary values, except certificates, which are recorded as a whole.
+		"""
+		now = time.time()
+		primary_key, secondary_key = key.value.split(config.NAME_SEP, 1)
+		if key == config.JSON.SUBDOMAIN_TO_CERT:
+			self.__upsert("INSERT INTO certificates VALUES (?, ?, ?, ?, ?) ON CONFLICT (domain, subdomain)", [(domain, record[primary_key], json.dumps(record), now, now) for record in records if primary_key in record], "data = excluded.data, last_seen = excluded.last_seen")
+		else:
+			rows = []
+			for record in records:
+				sources, targets = record.get(primary_key), record.get(secondary_key)
+				if sources is not None and targets is not None:
+					for source in sources if isinstance(sources, list) else [sources]:
+						for target in targets if isinstance(targets, list) else [targets]:
+							rows.append((domain, key.value, str(source), target if isinstance(target, str) else json.dumps(target), now, now))
+			self.__upsert("INSERT INTO relations VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (domain, kind, source, target)", rows)
+
+	def add_http(self, domain: str, records: list[dict[str, typing.Any]]):
+		"""
+		Record HTTP results, that is, the JSON lines of the `httpx` output, as extracted by `database.HTTP_RECORDS`.
+		"""
+		now = time.time()
+		self.__upsert("INSERT INTO http VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (domain, url)", [(domain, record["url"], record.get("status_code"), record.get("title"), record.get("webserver"), json.dumps(record), now, now) for record in records if record.get("url")], "status = excluded.status, title = excluded.title, webserver = excluded.webserver, data = excluded.data, last_seen = excluded.last_seen")
+
+	def export(self, domain: str, root_directory: str):
+		"""
+		Generate the TXT and JSON files of a domain from the database, in the same layout as the output directory.
+		"""
+		if self.__connection:
+			os.makedirs(root_directory, exist_ok = True)
+			with self.__lock:
+				for key in config.TXT:
+					values = [row[0] for row in self.__connection.execute("SELECT value FROM artifacts WHERE domain = ? AND key = ? ORDER BY value", (domain, key.value))]
+					file.insert(values, os.path.join(root_directory, f"{key.value}.txt"))
+				for key in config.JSON:
+					primary_key, secondary_key = key.value.split(config.NAME_SEP, 1)
+					if key == config.JSON.SUBDOMAIN_TO_CERT:
+						records = [json.loads(row[0]) for row in self.__connection.execute("SELECT data FROM certificates WHERE domain = ? ORDER BY subdomain", (domain,))]
+					else:
+						records = {}
+						for source, target in self.__connection.execute("SELECT source, target FROM relations WHERE domain = ? AND kind = ? ORDER BY source, target", (domain, key.value)):
+							records.setdefault(source, {primary_key: source, secondary_key: []})[secondary_key].append(target)
+						records = list(records.values())
+					file.insert(jquery.jdump(records), os.path.join(root_directory, f"{key.value}.json"))
+
+	def close(self):
+		"""
+		Close the database.
+		"""
+		self.initialize("")
+
+database = Database()
+"""
+Singleton class instance for recording results in an SQLite database.
+"""
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from . import config, file, general
+from . import config, context, file, general
 
 import os, typing
 
@@ -74,7 +74,7 @@ class Debug:
 				text = f"{text}\n{str(body)}"
 			file.append(text, out)
 
-debug = Debug()
+debug: Debug = context.Proxy("debug", Debug)
 """
-Singleton class instance for debugging and error tracking.
+Context-specific singleton class instance for debugging and error tracking.
 """
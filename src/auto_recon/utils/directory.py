@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
-from . import config, debug, file
+from . import config, context, debug, file
 
-import os, shutil
+import contextvars, os, shutil
 
 def validate(directory: str):
 	"""
@@ -132,13 +132,14 @@ class Directory:
 		"""
 		Initialize a class for managing directories.
 		"""
+		self.__tools_files: contextvars.ContextVar[list[str]] = contextvars.ContextVar("tools_files", default = None)
 		self.initialize("")
 
 	def initialize(self, root_directory: str):
 		"""
 		[Re]initialize.
 		"""
-		self.__root_directory: str = root_directory
+		self.__root_directory: str = os.path.abspath(root_directory) if root_directory else ""
 		self.__directories: dict[config.Directory, str] = {}
 		for key in config.Directory:
 			self.__directories[key] = self.__init_subdirectory(key.value)
@@ -149,6 +150,12 @@ class Directory:
 		"""
 		return os.path.join(self.__root_directory, dirname)
 
+	def get_root(self):
+		"""
+		Get the full path to the root directory.
+		"""
+		return self.__root_directory
+
 	def get(self, key: config.Directory):
 		"""
 		Get the full path to a directory for the specified key.\n
@@ -163,11 +170,10 @@ class Directory:
 
 	def setup(self):
 		"""
-		Create the required directory structure and change the working directory to the root directory.
+		Create the required directory structure.\n
+		The working directory is not changed, as multiple runs may share the process; instead, subprocesses are started in the root directory, see `run.execute()`.
 		"""
 		success, message = create_multiple([self.__root_directory, *self.__directories.values()])
-		if success:
-			os.chdir(self.__root_directory)
 		return success, message
 
 	def cleanup(self):
@@ -190,11 +196,23 @@ class Directory:
 
 	def init_tools_file(self, filename: str, extension = "txt", tools_subdirname = ""):
 		"""
-		Get the full path to a file in the tools directory or its subdirectory.
+		Get the full path to a file in the tools directory or its subdirectory.\n
+		If tracking is started in the current context, the path is tracked, see `track_tools_files()`.
+		"""
+		safe_file = file.SafeFile(os.path.join(self.__directories[config.Directory.TOOLS], tools_subdirname, f"{filename}.{extension}"))
+		if (tmp := self.__tools_files.get()) is not None:
+			tmp.append(safe_file.path)
+		return safe_file
+
+	def track_tools_files(self) -> list[str]:
+		"""
+		Start tracking the files in the tools directory that are initialized in the current context, for example, by a single tool, and return the list to which their paths are added.
 		"""
-		return file.SafeFile(os.path.join(self.__directories[config.Directory.TOOLS], tools_subdirname, f"{filename}.{extension}"))
+		tmp = []
+		self.__tools_files.set(tmp)
+		return tmp
 
-directory = Directory()
+directory: Directory = context.Proxy("directory", Directory)
 """
-Singleton class instance for managing directories.
+Context-specific singleton class instance for managing directories.
 """
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+from . import debug, file
+
+import asyncio, dataclasses, hashlib, json, os, shutil, time, uuid
+
+ROOT_PLACEHOLDER = "<root/>"
+"""
+A placeholder that replaces the coordinator's output directory in a dispatched command, and is replaced with the worker's scratch directory.
+"""
+
+QUEUE_PLACEHOLDER = "<queue/>"
+"""
+A placeholder that replaces the path to the queue directory in a dispatched command, since the queue directory may be mounted at a different path on each host.
+"""
+
+POLL_INTERVAL = 1
+"""
+Number of seconds between checks of the queue directory.
+"""
+
+LEASE = 60
+"""
+Number of seconds after which a claimed work item, whose worker has stopped renewing its lease, is put back into the queue.
+"""
+
+@dataclasses.dataclass
+class Item:
+	"""
+	Class for storing a work item claimed by a worker.\n
+	`argv` still contains `dispatch.ROOT_PLACEHOLDER`, and `stdin` is a path to a file in the item's directory, if any.
+	"""
+	id     : str
+	path   : str
+	argv   : list[str]
+	stdin  : str   = None
+	timeout: float = None
+
+@dataclasses.dataclass
+class Completion:
+	"""
+	Class for storing the outcome of a completed work item.\n
+	`output` is a path to a file containing the combined standard output and standard error, while `files` is a path to a directory containing the files the tool has written to the root directory.
+	"""
+	output    : str
+	files     : str
+	timed_out : bool = False
+	error     : str  = ""
+	returncode: int  = 0
+
+class Queue:
+
+	__ITEM_FILENAME   = "item.json"
+	__RESULT_FILENAME = "result.json"
+	__STDIN_FILENAME  = "stdin"
+	__OUTPUT_FILENAME = "output"
+	__LEASE_FILENAME  = "lease"
+	__ROOT_DIRNAME    = "root"
+	__FILES_DIRNAME   = "files"
+
+	def __init__(self):
+		"""
+		Initialize a class for distributing tool invocations to workers on multiple hosts through a shared directory.\n
+		Each work item is a directory that moves from `staging` to `pending`, `running`, and `done`, and each move is an atomic rename, so that only one worker can claim a work item.\n
+		Input files that are referenced by a command, but are outside the root directory, for example, wordlists, are stored once in `inputs`.
+		"""
+		self.initialize("")
+
+	def initialize(self, queue_directory: str):
+		"""
+		[Re]initialize.\n
+		If `queue_directory` is empty, tool invocations are not dispatched.
+		"""
+		self.__queue_directory: str = os.path.abspath(queue_directory) if queue_directory else ""
+		self.__directories: dict[str, str] = {}
+		if self.__queue_directory:
+			for dirname in ["staging", "pending", "running", "done", "inputs"]:
+				self.__directories[dirname] = os.path.join(self.__queue_directory, dirname)
+				os.makedirs(self.__directories[dirname], exist_ok = True)
+
+	def is_enabled(self):
+		"""
+		Returns `True` if tool invocations are dispatched to workers.
+		"""
+		return bool(self.__queue_directory)
+
+	def __get_path(self, state: str, id: str):
+		"""
+		Get the full path to a work item in the specified state.
+		"""
+		return os.path.join(self.__directories[state], id)
+
+	# ------------------------------------
+
+	def put(self, argv: list[str], stdin: str | bytes = None, timeout: float = None, root_directory = "") -> str:
+		"""
+		Add a tool invocation to the queue, and return its ID.\n
+		Files and directories in the root directory that are referenced by the command are copied along with the work item, while other files are stored in the shared inputs.\n
+		A path can be an argument on its own, or the value of an option in the `--option=path` format; the parent directories of paths in the root directory are created, even if the paths do not exist yet, for example, output files.
+		"""
+		id = uuid.uuid4().hex
+		staging = self.__get_path("staging", id)
+		root = os.path.join(staging, self.__ROOT_DIRNAME)
+		os.makedirs(root)
+		tmp = []
+		for arg in argv:
+			option, value = arg.split("=", 1) if arg.startswith("-") and "=" in arg else ("", arg)
+			if root_directory and value.startswith(root_directory + os.path.sep):
+				relative = os.path.relpath(value, root_directory)
+				destination = os.path.join(root, relative)
+				os.makedirs(os.path.dirname(destination), exist_ok = True)
+				if os.path.isdir(value):
+					shutil.copytree(value, destination)
+				elif os.path.isfile(value):
+					shutil.copy2(value, destination)
+				value = ROOT_PLACEHOLDER + value[len(root_directory):]
+			elif root_directory and value == root_directory:
+				value = ROOT_PLACEHOLDER
+			elif os.path.isabs(value) and os.path.isfile(value):
+				value = self.__put_input(value)
+			tmp.append(f"{option}={value}" if option else value)
+		if isinstance(stdin, bytes):
+			with open(os.path.join(staging, self.__STDIN_FILENAME), "wb") as stream:
+				stream.write(stdin)
+		elif stdin:
+			shutil.copyfile(stdin, os.path.join(staging, self.__STDIN_FILENAME))
+		with open(os.path.join(staging, self.__ITEM_FILENAME), "w", encoding = file.ENCODING) as stream:
+			json.dump({"argv": tmp, "stdin": stdin is not None, "timeout": timeout}, stream)
+		os.rename(staging, self.__get_path("pending", id))
+		return id
+
+	def __put_input(self, path: str):
+		"""
+		Store an input file in the shared inputs, unless an unchanged copy is already stored, and return its path in the `dispatch.QUEUE_PLACEHOLDER` format.
+		"""
+		stat = os.stat(path)
+		key = hashlib.sha256(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode(file.ENCODING)).hexdigest()[:16]
+		destination = os.path.join(self.__directories["inputs"], key, os.path.basename(path))
+		if not os.path.isfile(destination):
+			os.makedirs(os.path.dirname(destination), exist_ok = True)
+			temporary = f"{destination}.{uuid.uuid4().hex}.tmp"
+			shutil.copyfile(path, temporary)
+			os.replace(temporary, destination)
+		return destination.replace(self.__queue_directory, QUEUE_PLACEHOLDER, 1)
+
+	async def wait(self, id: str, timeout: float = None) -> Completion:
+		"""
+		Wait for a work item to complete, and put it back into the queue if its worker has stopped renewing the lease.\n
+		If no worker has claimed the work item within `timeout` seconds, the work item is withdrawn and `TimeoutError` is raised.
+		"""
+		start = time.monotonic()
+		while not (completion := await asyncio.to_thread(self.__poll, id, timeout is not None and time.monotonic() - start > timeout)):
+			await asyncio.sleep(POLL_INTERVAL)
+		return completion
+
+	def __poll(self, id: str, withdraw: bool) -> Completion | None:
+		"""
+		Check a work item once; intended to run in a worker thread, since the queue directory may be on a network file system, so that the event loop is not blocked.\n
+		Returns `None` if the work item has not completed yet.
+		"""
+		done = self.__get_path("done", id)
+		if os.path.isdir(done):
+			with open(os.path.join(done, self.__RESULT_FILENAME), "r", encoding = file.ENCODING) as stream:
+				result = json.load(stream)
+			return Completion(os.path.join(done, self.__OUTPUT_FILENAME), os.path.join(done, self.__FILES_DIRNAME), result["timed_out"], result["error"], result.get("returncode", 0))
+		if withdraw and self.__withdraw(id):
+			raise TimeoutError("The tool invocation was not claimed by any worker in time")
+		self.__expire(id)
+		return None
+
+	def __withdraw(self, id: str):
+		"""
+		Remove a pending work item from the queue.\n
+		Returns `False` if a worker has already claimed it.
+		"""
+		staging = self.__get_path("staging", id)
+		try:
+			os.rename(self.__get_path("pending", id), staging)
+		except FileNotFoundError:
+			return False
+		shutil.rmtree(staging, ignore_errors = True)
+		return True
+
+	def __expire(self, id: str):
+		"""
+		Put a claimed work item back into the queue if its lease has expired.
+		"""
+		running = self.__get_path("running", id)
+		try:
+			if time.time() - os.stat(os.path.join(running, self.__LEASE_FILENAME)).st_mtime > LEASE:
+				for filename in [self.__OUTPUT_FILENAME, self.__LEASE_FILENAME]:
+					file.remove_silent(os.path.join(running, filename))
+				shutil.rmtree(os.path.join(running, self.__FILES_DIRNAME), ignore_errors = True)
+				os.rename(running, self.__get_path("pending", id))
+				debug.debug.log_error(f"utils.dispatch.Queue().__expire() > {id}", "The worker has stopped renewing the lease, the work item was put back into the queue")
+		except FileNotFoundError:
+			pass
+
+	def remove(self, id: str):
+		"""
+		Remove a completed work item.
+		"""
+		shutil.rmtree(self.__get_path("done", id), ignore_errors = True)
+
+	# ------------------------------------
+
+	def claim(self) -> Item | None:
+		"""
+		Claim the oldest pending work item, and start its lease.\n
+		Returns `None` if the queue is empty.
+		"""
+		pending = self.__directories["pending"]
+		entries = []
+		for entry in os.scandir(pending):
+			try:
+				entries.append((entry.stat().st_mtime, entry.name))
+			except FileNotFoundError:
+				pass
+		for ignored, id in sorted(entries):
+			running = self.__get_path("running", id)
+			try:
+				os.rename(os.path.join(pending, id), running)
+			except (FileNotFoundError, OSError):
+				continue
+			self.renew(id)
+			with open(os.path.join(running, self.__ITEM_FILENAME), "r", encoding = file.ENCODING) as stream:
+				item = json.load(stream)
+			argv = [arg.replace(QUEUE_PLACEHOLDER, self.__queue_directory) for arg in item["argv"]]
+			stdin = os.path.join(running, self.__STDIN_FILENAME) if item["stdin"] else None
+			return Item(id, running, argv, stdin, item["timeout"])
+		return None
+
+	def renew(self, id: str):
+		"""
+		Renew the lease of a claimed work item.
+		"""
+		with open(os.path.join(self.__get_path("running", id), self.__LEASE_FILENAME), "w"):
+			pass
+
+	def get_root(self, item: Item):
+		"""
+		Get the full path to the directory containing the files in the root directory that are referenced by the command of a work item.
+		"""
+		return os.path.join(item.path, self.__ROOT_DIRNAME)
+
+	def get_output(self, item: Item):
+		"""
+		Get the full path to the file to write the output of a work item to.
+		"""
+		return os.path.join(item.path, self.__OUTPUT_FILENAME)
+
+	def complete(self, item: Item, files: str = "", timed_out = False, error = "", returncode = 0):
+		"""
+		Move the files the tool has written to the root directory into the work item, and mark it as done.\n
+		If the lease has expired in the meantime, and the work item was put back into the queue, the result is discarded.
+		"""
+		try:
+			if files and os.path.isdir(files):
+				shutil.move(files, os.path.join(item.path, self.__FILES_DIRNAME))
+			with open(os.path.join(item.path, self.__RESULT_FILENAME), "w", encoding = file.ENCODING) as stream:
+				json.dump({"timed_out": timed_out, "error": error, "returncode": returncode}, stream)
+			os.rename(item.path, self.__get_path("done", item.id))
+		except FileNotFoundError as ex:
+			debug.debug.log_error(f"utils.dispatch.Queue().complete() > {item.id}", ex)
+
+queue = Queue()
+"""
+Singleton class instance for distributing tool invocations to workers.
+"""
@@ -1,65 +1,117 @@
 #!/usr/bin/env python3
 
-from . import array, config, debug, file
+from . import array, config, context, debug, file
 
-import enum, os, threading
+import bisect, enum, ipaddress, os, threading, typing
 
-PLACEHOLDER_EXCLUSIONS = "<exclusions/>"
-PLACEHOLDER_DOMAIN     = "<domain/>"
-PLACEHOLDER_KEY        = "<key/>"
+PLACEHOLDER_DOMAIN = "<domain/>"
+
+WILDCARD = "*."
+"""
+Prefix of a wildcard domain in the exclusions, which excludes all subdomains of the domain, but not the domain itself.
+"""
 
 class RegEx(enum.Enum):
 	"""
-	Enum containing RegEx filter keys.\n
+	Enum containing RegEx filter keys; entries matching a filter are then checked against exclusions, see `exclusion.Exclusion.is_excluded()`.\n
 	Edit or add more RegEx filters here.
 	"""
-	SUBDOMAIN = rf"^{PLACEHOLDER_EXCLUSIONS}(?:[^\s\.]+\.)*{PLACEHOLDER_DOMAIN}$"
-	IP        = rf"^{PLACEHOLDER_EXCLUSIONS}(?:[^\s\.\:]+\.)*[^\s\.\:]+$" # NOTE: Excludes IPv6.
-	EMAIL     = rf"^(?:[^\s\.]+\.)*[^\s\.]+\@{PLACEHOLDER_EXCLUSIONS}(?:[^\s\.]+\.)*{PLACEHOLDER_DOMAIN}$"
+	SUBDOMAIN = rf"^(?:[^\s\.]+\.)*{PLACEHOLDER_DOMAIN}$"
+	IP        = r"^(?:[^\s\.\:]+\.)*[^\s\.\:]+$" # NOTE: Excludes IPv6.
+	EMAIL     = rf"^(?:[^\s\.]+\.)*[^\s\.]+\@(?:[^\s\.]+\.)*{PLACEHOLDER_DOMAIN}$"
 
-	def set(self, exclusions: list[str] = None, domain = ""):
+	def set(self, domain = ""):
 		"""
 		Set the filter.
 		"""
 		domain = domain.replace(r".", r"\.") if domain else r"[^\s\.]+"
-		if not exclusions:
-			exclusions = ""
-		else:
-			exclusions = ("|").join([f"{entry}$" for entry in exclusions])
-			exclusions = exclusions.replace(r".", r"\.").replace(r"*\.", r".+\.")
-			exclusions = f"(?!{exclusions})"
 		value = self.value
 		value = value.replace(PLACEHOLDER_DOMAIN, domain)
-		value = value.replace(PLACEHOLDER_EXCLUSIONS, exclusions)
 		return value
 
 class JQ(enum.Enum):
 	"""
-	Enum containing JQ filter keys.\n
+	Enum containing JQ filter keys; records selected by a filter may then be checked against exclusions, see `exclusion.Exclusion.filter_records()`.\n
 	Edit or add more JQ filters here.
 	"""
-	DNSRECON = f'(map(select(.type | test("^A$|^AAAA$|^CNAME$|^MX$|^NX$|^PTR$|^SRV$"))) | . - map(select(.address // "" | test("{PLACEHOLDER_EXCLUSIONS}"))) | . - map(select(.exchange // "" | test("{PLACEHOLDER_EXCLUSIONS}"))) | . - map(select(.name // "" | test("{PLACEHOLDER_EXCLUSIONS}"))) | . - map(select(.target // "" | test("{PLACEHOLDER_EXCLUSIONS}")))) + (map(select(.type | test("^TXT$")))) | .[]'
-	HOST     = f'. - map(select(.{PLACEHOLDER_KEY}[] | test("{PLACEHOLDER_EXCLUSIONS}"))) | .[]'
+	DNSRECON     = 'map(select(.type | test("^A$|^AAAA$|^CNAME$|^MX$|^NX$|^PTR$|^SRV$"))) | .[]'
+	DNSRECON_TXT = 'map(select(.type | test("^TXT$"))) | .[]'
 
-	def set(self, exclusions: list[str] = None):
+	def set(self):
 		"""
 		Set the filter.
 		"""
-		if not exclusions:
-			exclusions = "^$"
-		else:
-			exclusions = ("|").join([f"^{entry}$" for entry in exclusions])
-			exclusions = exclusions.replace(r".", r"\.").replace(r"*\.", r".+\.").replace(r"\.", r"\\.")
-		value = self.value
-		value = value.replace(PLACEHOLDER_EXCLUSIONS, exclusions)
-		return value
-
-	@classmethod
-	def replace_key(cls, query: str, new: str):
-		"""
-		Replace all occurrences of `exclusion.PLACEHOLDER_KEY` in a filter with a new value.
-		"""
-		return query.replace(PLACEHOLDER_KEY, new)
+		return self.value
+
+class Matcher:
+
+	__TERMINAL = "."
+
+	def __init__(self, exclusions: list[str] = None):
+		"""
+		Initialize a class for checking entries against exclusions.\n
+		Wildcard domains are stored in a trie of reversed labels, IPs and CIDR ranges as sorted, merged intervals of integers per IP version, and other entries in a set, so that a check depends on the number of labels in an entry, not on the number of exclusions.
+		"""
+		self.__exact: set[str] = set()
+		self.__wildcards: dict[str, dict] = {}
+		self.__intervals: dict[int, tuple[list[int], list[int]]] = {}
+		ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+		for entry in exclusions or []:
+			entry = entry.strip().lower()
+			if not entry:
+				continue
+			elif network := self.__to_network(entry):
+				ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+			elif entry.startswith(WILDCARD):
+				node = self.__wildcards
+				for label in reversed(entry[len(WILDCARD):].split(".")):
+					node = node.setdefault(label, {})
+				node[self.__TERMINAL] = {}
+			else:
+				self.__exact.add(entry)
+		for version, tmp in ranges.items():
+			starts, ends = [], []
+			for start, end in sorted(tmp):
+				if ends and start <= ends[-1] + 1:
+					ends[-1] = max(ends[-1], end)
+				else:
+					starts.append(start)
+					ends.append(end)
+			self.__intervals[version] = (starts, ends)
+
+	def __to_network(self, entry: str):
+		"""
+		Parse an IP or a CIDR range.\n
+		Returns `None` on failure.
+		"""
+		network = None
+		if entry[:1].isdigit() or ":" in entry:
+			try:
+				network = ipaddress.ip_network(entry, strict = False)
+			except ValueError:
+				pass
+		return network
+
+	def is_excluded(self, entry: str):
+		"""
+		Returns `True` if a domain name, IP, or other entry is excluded.
+		"""
+		entry = entry.strip().lower()
+		if entry in self.__exact:
+			return True
+		elif network := self.__to_network(entry):
+			address = int(network.network_address)
+			starts, ends = self.__intervals[network.version]
+			i = bisect.bisect_right(starts, address) - 1
+			return i >= 0 and int(network.broadcast_address) <= ends[i]
+		node = self.__wildcards
+		labels = entry.split(".")
+		for i, label in enumerate(reversed(labels)):
+			if not (node := node.get(label)):
+				break
+			elif self.__TERMINAL in node and i < len(labels) - 1:
+				return True
+		return False
 
 # ----------------------------------------
 
@@ -84,6 +136,8 @@ class Exclusion:
 		self.__save()
 		self.__domain = domain
 		self.__filters = self.__set()
+		self.__matcher = Matcher(self.__exclusions)
+		self.__revision = 0
 
 	def __init_safe_file(self, filename: str):
 		"""
@@ -115,9 +169,9 @@ class Exclusion:
 		"""
 		tmp = {}
 		for key in RegEx:
-			tmp[key] = key.set(self.__exclusions, self.__domain)
+			tmp[key] = key.set(self.__domain)
 		for key in JQ:
-			tmp[key] = key.set(self.__exclusions)
+			tmp[key] = key.set()
 		return tmp
 
 	def get(self, key: RegEx | JQ):
@@ -132,9 +186,30 @@ class Exclusion:
 			debug.debug.log_error(f"utils.filter.Filter().get() > {key}", ex)
 		return filter
 
+	def is_excluded(self, entry: str):
+		"""
+		Returns `True` if a domain name, IP, or other entry is excluded, see `exclusion.Matcher`.
+		"""
+		return self.__matcher.is_excluded(entry)
+
+	def filter_records(self, records: list[dict[str, typing.Any]], keys: list[str]) -> list[dict[str, typing.Any]]:
+		"""
+		Remove all records in which the value of any of the specified keys, or any element of the value if it is a list, is excluded.
+		"""
+		tmp = []
+		matcher = self.__matcher
+		for record in records:
+			values = []
+			for key in keys:
+				value = record.get(key)
+				values.extend(value if isinstance(value, list) else [value])
+			if not any(isinstance(value, str) and matcher.is_excluded(value) for value in values):
+				tmp.append(record)
+		return tmp
+
 	def update(self, exclusions: list[str] | str):
 		"""
-		Update exclusions and filters.
+		Update exclusions.
 		"""
 		if exclusions:
 			with self.__lock:
@@ -142,7 +217,14 @@ class Exclusion:
 					exclusions = [exclusions]
 				self.__exclusions = array.unique(self.__exclusions + exclusions)
 				self.__save()
-				self.__filters = self.__set()
+				self.__matcher = Matcher(self.__exclusions)
+				self.__revision += 1
+
+	def get_revision(self):
+		"""
+		Get the number of times the exclusions have been updated.
+		"""
+		return self.__revision
 
 	def should_filter(self):
 		"""
@@ -150,7 +232,7 @@ class Exclusion:
 		"""
 		return bool(self.__exclusions)
 
-exclusion = Exclusion()
+exclusion: Exclusion = context.Proxy("exclusion", Exclusion)
 """
-Singleton class instance for managing exclusions and filters.
+Context-specific singleton class instance for managing exclusions and filters.
 """
@@ -1,20 +1,105 @@
 #!/usr/bin/env python3
 
-from . import array, config, debug
+from . import array, config, context, debug
 
-import dataclasses, os, threading
+import atexit, contextlib, dataclasses, gzip, io, mmap, os, shutil, threading, time, typing, uuid
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
 
 ENCODING = "ISO-8859-1"
 
+WRITE_INTERVAL = 1
+"""
+Number of seconds between writes of the buffered appends in the background, see `file.Writer`.
+"""
+
+WRITE_BUFFER = 1024 * 1024
+"""
+Maximum number of characters buffered per file; once exceeded, the appending thread writes the buffer itself.
+"""
+
+COMPRESSIONS = {
+	"gzip": ".gz",
+	"zstd": ".zst"
+}
+"""
+Supported compression formats, and the extensions of the compressed files, see `file.compress()`.
+"""
+
 # ----------------------------------------
 
+class Lock:
+
+	def __init__(self):
+		"""
+		Initialize a class for locking a file, and measuring how long threads waited to acquire the lock.\n
+		The lock is reentrant, and the metrics are updated while holding the lock.
+		"""
+		self.__lock = threading.RLock()
+		self.acquisitions = 0
+		self.contentions = 0
+		self.wait = 0.0
+
+	def __enter__(self):
+		if not self.__lock.acquire(blocking = False):
+			start = time.perf_counter()
+			self.__lock.acquire()
+			self.contentions += 1
+			self.wait += time.perf_counter() - start
+		self.acquisitions += 1
+		return self
+
+	def __exit__(self, *args):
+		self.__lock.release()
+
+class Locks:
+
+	def __init__(self):
+		"""
+		Initialize a class for registering one lock per file path, so that writes to unrelated files do not block each other, while all instances of `SafeFile` class for the same path share the same lock.
+		"""
+		self.__lock = threading.Lock()
+		self.__locks: dict[str, Lock] = {}
+
+	def get(self, path: str) -> Lock:
+		"""
+		Get the lock for the specified path, and register it if not already registered.
+		"""
+		path = os.path.abspath(path)
+		with self.__lock:
+			if path not in self.__locks:
+				self.__locks[path] = Lock()
+			return self.__locks[path]
+
+	def get_contended(self, root_directory: str) -> list[tuple[str, Lock]]:
+		"""
+		Get the locks of the files in the specified directory that threads had to wait for, sorted by the total wait time in descending order.
+		"""
+		root_directory = os.path.join(os.path.abspath(root_directory), "")
+		with self.__lock:
+			tmp = [(path, lock) for path, lock in self.__locks.items() if path.startswith(root_directory) and lock.contentions]
+		return sorted(tmp, key = lambda entry: entry[1].wait, reverse = True)
+
+locks = Locks()
+"""
+Singleton class instance for registering one lock per file path.
+"""
+
 @dataclasses.dataclass
 class SafeFile:
 	"""
-	Initialize a thread-safe file.
+	Initialize a thread-safe file.\n
+	If `lock` is not specified, the lock registered for the path is used, see `file.Locks`.
 	"""
 	path: str
-	lock: threading.Lock = threading.Lock()
+	lock: Lock = None
+
+	def __post_init__(self):
+		if self.lock is None:
+			self.lock = locks.get(self.path)
 
 def get_path(file: SafeFile | str):
 	"""
@@ -22,6 +107,97 @@ def get_path(file: SafeFile | str):
 	"""
 	return file.path if isinstance(file, SafeFile) else file
 
+class Writer:
+
+	def __init__(self):
+		"""
+		Initialize a class for buffering appends to files, and writing them in a background thread, so that frequent appends, for example, to the logs, are coalesced, and do not open and close a file each time.\n
+		Each file is kept open between writes until `flush()` is called without references, or until the file is overwritten or removed through this module.\n
+		Each file is written while holding its lock, see `file.Locks`, and the background thread is started on the first append.
+		"""
+		self.__lock = threading.Lock()
+		self.__buffers: dict[str, list[str]] = {}
+		self.__sizes: dict[str, int] = {}
+		self.__streams: dict[str, typing.TextIO] = {}
+		self.__thread: threading.Thread = None
+		atexit.register(self.flush)
+
+	def add(self, text: str, out: str):
+		"""
+		Buffer a text to append to a file.\n
+		If the file's buffer is full, the buffer is written in the calling thread.
+		"""
+		with self.__lock:
+			self.__buffers.setdefault(out, []).append(text)
+			self.__sizes[out] = self.__sizes.get(out, 0) + len(text)
+			full = self.__sizes[out] > WRITE_BUFFER
+			if not self.__thread:
+				self.__thread = threading.Thread(target = self.__run, daemon = True)
+				self.__thread.start()
+		if full:
+			self.__write(out)
+
+	def __run(self):
+		"""
+		Write the buffered appends periodically.
+		"""
+		while True:
+			time.sleep(WRITE_INTERVAL)
+			for out in self.__get_paths():
+				self.__write(out)
+
+	def __get_paths(self, references: list[str] = None):
+		"""
+		Get the paths to all files with buffered appends, or only to those that appear in the references.
+		"""
+		with self.__lock:
+			return [out for out in self.__buffers if references is None or any(out in reference for reference in references)]
+
+	def __write(self, out: str, close = False):
+		"""
+		Write the buffered appends of a file, and optionally close the file.
+		"""
+		with locks.get(out):
+			with self.__lock:
+				tmp = self.__buffers.pop(out, [])
+				self.__sizes.pop(out, None)
+			try:
+				if tmp:
+					if out not in self.__streams:
+						self.__streams[out] = open(out, "a", encoding = ENCODING)
+					self.__streams[out].write(("").join(tmp))
+					self.__streams[out].flush()
+			except Exception as ex:
+				debug.debug.log_error(f"utils.file.Writer().__write() > {out}", ex)
+			finally:
+				if close and out in self.__streams:
+					self.__streams.pop(out).close()
+
+	def flush(self, references: list[str] = None):
+		"""
+		Write the buffered appends of all files, and close them.\n
+		If `references` are specified, for example, the arguments of a command, only the files whose paths appear in them are written, and are kept open.
+		"""
+		for out in self.__get_paths(references) if references is not None else dict.fromkeys([*self.__get_paths(), *self.__streams.copy()]):
+			self.__write(out, close = references is None)
+
+	def discard(self, out: str):
+		"""
+		Discard the buffered appends of a file, and close it.\n
+		Must be called before the file is overwritten or removed.
+		"""
+		with locks.get(out):
+			with self.__lock:
+				self.__buffers.pop(out, None)
+				self.__sizes.pop(out, None)
+			if out in self.__streams:
+				self.__streams.pop(out).close()
+
+writer = Writer()
+"""
+Singleton class instance for buffering appends to files.
+"""
+
 # ----------------------------------------
 
 def validate(file: str):
@@ -56,6 +232,7 @@ def remove(file: str):
 	success = True
 	message = ""
 	try:
+		writer.discard(file)
 		if os.path.exists(file):
 			os.remove(file)
 	except Exception:
@@ -70,28 +247,85 @@ def remove_silent(file: str):
 	success, ignored = remove(file)
 	return success
 
+def resolve(file: str):
+	"""
+	Get the path to a file, or if it does not exist, to its compressed version, see `file.compress()`.\n
+	If the file was written again after it was compressed, for example, when a tool is run again on restore, the file supersedes its compressed version.
+	"""
+	if not os.path.isfile(file):
+		for extension in COMPRESSIONS.values():
+			if os.path.isfile(file + extension):
+				return file + extension
+	return file
+
+def is_compressed(file: str):
+	"""
+	Returns `True` if a file is read from its compressed version, see `file.resolve()`.
+	"""
+	return resolve(file) != file
+
+def __open(file: str) -> typing.TextIO:
+	"""
+	Open a file for reading as text; if the file is compressed, it is decompressed as a stream.
+	"""
+	if file.endswith(COMPRESSIONS["gzip"]):
+		return gzip.open(file, "rt", encoding = ENCODING)
+	elif file.endswith(COMPRESSIONS["zstd"]):
+		return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(file, "rb"), read_across_frames = True, closefd = True), encoding = ENCODING)
+	return open(file, "r", encoding = ENCODING)
+
+def compress(file: str, compression: str, append = False):
+	"""
+	Replace a file with its compressed version, see `file.COMPRESSIONS`.\n
+	If the compressed version already exists, for example, when restoring a session, it is atomically replaced, or if `append` is set to `True`, for example, for logs, the file is compressed into a new member or frame that is appended to it; both formats decompress consecutive members or frames as a single stream.\n
+	Empty files are not compressed.
+	"""
+	destination = file + COMPRESSIONS[compression]
+	temporary = f"{destination}.{uuid.uuid4().hex}.tmp"
+	try:
+		writer.flush([file])
+		writer.discard(file)
+		if validate_silent(file):
+			with locks.get(file):
+				with open(file, "rb") as source, open(temporary, "wb") as stream:
+					with gzip.open(stream, "wb") if compression == "gzip" else zstandard.ZstdCompressor().stream_writer(stream, closefd = False) as compressor:
+						shutil.copyfileobj(source, compressor)
+				if append and os.path.isfile(destination):
+					with open(temporary, "rb") as source, open(destination, "ab") as stream:
+						shutil.copyfileobj(source, stream)
+					os.remove(temporary)
+				else:
+					os.replace(temporary, destination)
+				os.remove(file)
+	except Exception as ex:
+		remove_silent(temporary)
+		debug.debug.log_error(f"utils.file.compress() > {file}", ex)
+
 def __read(file: str):
 	"""
-	Silently validate and read a file as text.\n
+	Silently validate and read a file as text, decompressing it if needed, see `file.resolve()`.\n
 	Whitespace will be stripped from the text.
 	"""
 	tmp = ""
 	try:
-		if validate_silent(file):
-			tmp = open(file, "r", encoding = ENCODING).read().strip()
+		path = resolve(file)
+		if validate_silent(path):
+			with __open(path) as stream:
+				tmp = stream.read().strip()
 	except Exception as ex:
 		debug.debug.log_error(f"utils.file.__read() > {file}", ex)
 	return tmp
 
 def __read_array(file: str) -> list[str]:
 	"""
-	Silently validate and read a file line by line, and append the lines to a list.\n
+	Silently validate and read a file line by line, decompressing it if needed, see `file.resolve()`, and append the lines to a list.\n
 	Whitespace will be stripped from each line, and empty lines removed.
 	"""
 	tmp = []
 	try:
-		if validate_silent(file):
-			with open(file, "r", encoding = ENCODING) as stream:
+		path = resolve(file)
+		if validate_silent(path):
+			with __open(path) as stream:
 				for line in stream:
 					line = line.strip()
 					if line:
@@ -105,34 +339,89 @@ def read(file: SafeFile | str, array = True):
 	Silently validate and read a file as text or line by line, and append the lines to a list.\n
 	Whitespace will be stripped from the text, or, if `array` is set to `True`, from each line, and empty lines will be removed.
 	"""
+	if isinstance(file, Store):
+		return file.get(array)
+	writer.flush([get_path(file)])
 	if isinstance(file, SafeFile):
 		with file.lock:
 			return __read_array(file.path) if array else __read(file.path)
 	else:
 		return __read_array(file) if array else __read(file)
 
+def read_lines(file: SafeFile | str) -> typing.Iterator[str]:
+	"""
+	Silently validate and read a file line by line, without reading the whole file into memory; if the file is compressed, it is decompressed as a stream, see `file.resolve()`.\n
+	Whitespace will be stripped from each line, and empty lines will be removed.
+	"""
+	if isinstance(file, Store):
+		yield from file.get()
+		return
+	path = get_path(file)
+	writer.flush([path])
+	try:
+		path = resolve(path)
+		if validate_silent(path):
+			with __open(path) as stream:
+				for line in stream:
+					line = line.strip()
+					if line:
+						yield line
+	except Exception as ex:
+		debug.debug.log_error(f"utils.file.read_lines() > {path}", ex)
+
+@contextlib.contextmanager
+def read_mmap(file: SafeFile | str) -> typing.Iterator[mmap.mmap | bytes]:
+	"""
+	Silently validate and memory-map a file for reading, so that it can be searched without reading the whole file into memory, see `grep.find()`.\n
+	Yields empty bytes if the file cannot be mapped, for example, if it does not exist, is empty, or is compressed; use `file.read_lines()` for compressed files, see `file.is_compressed()`.
+	"""
+	if isinstance(file, Store):
+		file.flush()
+	path = get_path(file)
+	writer.flush([path])
+	stream, buffer = None, None
+	try:
+		if validate_silent(path) and not is_compressed(path):
+			stream = open(path, "rb")
+			buffer = mmap.mmap(stream.fileno(), 0, access = mmap.ACCESS_READ)
+	except Exception as ex:
+		debug.debug.log_error(f"utils.file.read_mmap() > {path}", ex)
+	try:
+		yield buffer if buffer is not None else b""
+	finally:
+		if buffer is not None:
+			buffer.close()
+		if stream:
+			stream.close()
+
 def __write(text: str, out: str, flags = "w"):
 	"""
-	Write a text to an output file.\n
+	Write a text to an output file, or if appending, buffer it, see `file.Writer`.\n
 	Whitespace will be stripped from the text.\n
 	If the text is empty, nothing will be written.
 	"""
 	try:
 		text = text.strip()
-		if text:
+		if flags == "a":
+			if text:
+				writer.add(f"{text}\n", out)
+		elif text:
 			open(out, flags, encoding = ENCODING).write(f"{text}\n")
 	except Exception as ex:
 		debug.debug.log_error(f"utils.file.__write() > {out}", ex)
 
 def __write_array(text_array: list[str], out: str, flags = "w"):
 	"""
-	Write a text array to an output file.\n
+	Write a text array to an output file, or if appending, buffer it, see `file.Writer`.\n
 	Whitespace will be stripped from each string in the text array, and empty strings will be removed.\n
 	If the text array is empty, nothing will be written.
 	"""
 	try:
 		text_array = array.remove_empty_strings(text_array)
-		if text_array:
+		if flags == "a":
+			if text_array:
+				writer.add(("").join(f"{entry}\n" for entry in text_array), out)
+		elif text_array:
 			with open(out, flags, encoding = ENCODING) as stream:
 				for entry in text_array:
 					stream.write(f"{entry}\n")
@@ -145,10 +434,16 @@ def write(data: list[str] | str, out: SafeFile | str, flags = "w"):
 	Whitespace will be stripped from data, or if data is a list, from each string in the list, and empty strings will be removed.\n
 	If data is empty, nothing will be written.
 	"""
-	if isinstance(out, SafeFile):
+	if isinstance(out, Store):
+		out.add(data, replace = flags == "w")
+	elif flags == "a":
+		__write_array(data, get_path(out), flags) if isinstance(data, list) else __write(data, get_path(out), flags)
+	elif isinstance(out, SafeFile):
+		writer.discard(out.path)
 		with out.lock:
 			__write_array(data, out.path, flags) if isinstance(data, list) else __write(data, out.path, flags)
 	else:
+		writer.discard(out)
 		__write_array(data, out, flags) if isinstance(data, list) else __write(data, out, flags)
 
 def append(data: list[str] | str, out: SafeFile | str):
@@ -167,6 +462,16 @@ def insert(data: list[str] | str, out: SafeFile | str):
 	"""
 	write(data, out, "w")
 
+def append_chunk(text: str, out: SafeFile | str):
+	"""
+	Append a chunk of text to an output file as is, see `file.Writer`.\n
+	Intended for streamed tool outputs, where whitespace and line boundaries must be preserved.
+	"""
+	if isinstance(out, Store):
+		out.add(text)
+	elif text:
+		writer.add(text, get_path(out))
+
 def copy_append(source: SafeFile | str, destination: SafeFile | str, array = True):
 	"""
 	Copy the content of the source, append it to the destination, and return the appended content.\n
@@ -189,6 +494,126 @@ def copy_insert(source: SafeFile | str, destination: SafeFile | str, array = Tru
 	insert(tmp, destination)
 	return tmp
 
+def clear(file: SafeFile | str):
+	"""
+	Remove a file, or if `file` is an instance of `Store` class, remove all of its lines.
+	"""
+	if isinstance(file, Store):
+		file.clear()
+	else:
+		remove_silent(get_path(file))
+
+# ----------------------------------------
+
+class Store(SafeFile):
+
+	def __init__(self, path: str):
+		"""
+		Initialize a class for storing the unique lines of a file in memory, in insertion order.\n
+		Lines are deduplicated on insert, and are written to the file only on `flush()`; new lines are appended to the file, while the file is atomically replaced only if its lines were replaced, for example, by filtering.\n
+		The file is read on the first use, for example, when restoring a session.
+		"""
+		super().__init__(path)
+		self.__entries: dict[str, None] = None
+		self.__pending: list[str] = []
+		self.__rewrite = False
+		self.__filtered: int = None
+
+	def __load(self):
+		"""
+		Read the file, if not already read.\n
+		Must be called while holding the lock.
+		"""
+		if self.__entries is None:
+			self.__entries = dict.fromkeys(read(self.path))
+		return self.__entries
+
+	def get(self, array = True) -> list[str] | str:
+		"""
+		Get the lines as a list, or as a text if `array` is set to `False`.
+		"""
+		with self.lock:
+			tmp = list(self.__load())
+		return tmp if array else ("\n").join(tmp)
+
+	def add(self, data: list[str] | str, replace = False):
+		"""
+		Add new lines, or if `replace` is set to `True`, replace all lines.\n
+		Whitespace will be stripped from each line, and empty lines will be removed.\n
+		If data is empty, nothing will be changed.
+		"""
+		try:
+			data = array.remove_empty_strings(data.splitlines() if isinstance(data, str) else data)
+			if data:
+				with self.lock:
+					if replace:
+						self.__entries = dict.fromkeys(data)
+						self.__pending = []
+						self.__rewrite = True
+						self.__filtered = None
+					else:
+						entries = self.__load()
+						for entry in data:
+							if entry not in entries:
+								entries[entry] = None
+								self.__pending.append(entry)
+								self.__filtered = None
+		except Exception as ex:
+			debug.debug.log_error(f"utils.file.Store().add() > {self.path}", ex)
+
+	def clear(self):
+		"""
+		Remove all lines; the file is removed on `flush()`.
+		"""
+		with self.lock:
+			self.__entries = {}
+			self.__pending = []
+			self.__rewrite = True
+
+	def is_dirty(self):
+		"""
+		Returns `True` if the file is not up to date.
+		"""
+		return self.__rewrite or bool(self.__pending)
+
+	def is_filtered(self, revision: int):
+		"""
+		Returns `True` if no lines were added since the lines were last filtered with the specified revision of the exclusions.
+		"""
+		return self.__filtered == revision
+
+	def set_filtered(self, revision: int):
+		"""
+		Mark the lines as filtered with the specified revision of the exclusions.
+		"""
+		with self.lock:
+			self.__filtered = revision
+
+	def flush(self):
+		"""
+		Append the new lines to the file, or atomically replace the file if the lines were replaced.\n
+		If there are no lines, the file is removed.
+		"""
+		with self.lock:
+			try:
+				if self.__rewrite:
+					if not self.__entries:
+						remove_silent(self.path)
+					else:
+						temporary = f"{self.path}.{uuid.uuid4().hex}.tmp"
+						with open(temporary, "w", encoding = ENCODING) as stream:
+							for entry in self.__entries:
+								stream.write(f"{entry}\n")
+						os.replace(temporary, self.path)
+				elif self.__pending:
+					with open(self.path, "a", encoding = ENCODING) as stream:
+						for entry in self.__pending:
+							stream.write(f"{entry}\n")
+				self.__pending = []
+				self.__rewrite = False
+			except Exception as ex:
+				debug.debug.log_error(f"utils.file.Store().flush() > {self.path}", ex)
+
 # ----------------------------------------
 
 class File:
@@ -206,7 +631,7 @@ class File:
 		self.__root_directory: str = root_directory
 		self.__files: dict[config.TXT | config.JSON, SafeFile] = {}
 		for key in config.TXT:
-			self.__files[key] = self.__init_safe_file(f"{key.value}.txt")
+			self.__files[key] = Store(os.path.join(self.__root_directory, f"{key.value}.txt"))
 		for key in config.JSON:
 			self.__files[key] = self.__init_safe_file(f"{key.value}.json")
 
@@ -228,7 +653,18 @@ class File:
 			debug.debug.log_error(f"utils.file.File().get() > {key}", ex)
 		return file
 
-file = File()
+	def flush(self, references: list[str] = None):
+		"""
+		Write the lines of all stores that are not up to date to their files, see `file.Store`, and the buffered appends of all files, see `file.Writer`.\n
+		If `references` are specified, for example, the arguments of a command, only the stores and the files whose paths appear in them are flushed.
+		"""
+		for safe_file in self.__files.values():
+			if isinstance(safe_file, Store) and safe_file.is_dirty():
+				if references is None or any(safe_file.path in reference for reference in references):
+					safe_file.flush()
+		writer.flush(references)
+
+file: File = context.Proxy("file", File)
 """
-Singleton class instance for managing files.
+Context-specific singleton class instance for managing files.
 """
@@ -66,12 +66,12 @@ def prepend_asn_array(text_array: list[str], sort = True):
 
 def __insert_or_remove(file: __file.SafeFile, array: list[str]):
 	"""
-	Write an array to a file, or remove the file if the array is empty.
+	Write an array to a file, or clear the file if the array is empty.
 	"""
 	if array:
 		__file.insert(__array.unique(array), file)
 	else:
-		__file.remove_silent(file.path)
+		__file.clear(file)
 
 # ----------------------------------------
 
@@ -85,7 +85,7 @@ def subdomains(key: config.TXT):
 			broken.append(entry)
 		elif not (fqdn := url.extract_fqdn(entry)):
 			invalid.append(entry)
-		elif not grep.search(fqdn, exclusion.exclusion.get(exclusion.RegEx.SUBDOMAIN)):
+		elif not grep.search(fqdn, exclusion.exclusion.get(exclusion.RegEx.SUBDOMAIN)) or exclusion.exclusion.is_excluded(fqdn):
 			ignored.append(entry)
 		else:
 			valid.append(entry)
@@ -99,16 +99,21 @@ def subdomains(key: config.TXT):
 	if ignored:
 		debug.debug.log_filter(f"utils.filter.subdomains() > {safe_file.path}", f"Ignored subdomains:\n{chr(10).join(__array.unique(ignored))}")
 
-def ports(key: config.TXT, port_ignore: int, port_keep: int):
+def ports(key: config.TXT, rules: list[tuple[int, int]] = config.PORT_RULES):
 	"""
-	Filter ports.
+	Filter ports.\n
+	All entries are indexed by their FQDN and port number in a single pass, then, an entry is redundant if, for any of the rules, it is on the port to ignore, and the same FQDN is also present on the port to keep, see `config.PORT_RULES`.
 	"""
-	valid, invalid, ignored = [], [], []; safe_file = __file.file.get(key); text = __file.read(safe_file, array = False)
+	valid, invalid, ignored = [], [], []; safe_file = __file.file.get(key); entries = []
 	for entry in __file.read(safe_file):
 		domain, port = url.extract_netloc(entry)
 		if not domain or not port:
 			invalid.append(entry)
-		elif port == port_ignore and grep.search(text, f"{domain}:{port_keep}"):
+		else:
+			entries.append((entry, domain, port))
+	index = {(domain, port) for entry, domain, port in entries}
+	for entry, domain, port in entries:
+		if any(port == port_ignore and (domain, port_keep) in index for port_ignore, port_keep in rules):
 			ignored.append(entry)
 		else:
 			valid.append(entry)
@@ -131,7 +136,7 @@ def ips(key: config.TXT):
 			broken.append(entry)
 		elif not ip.validate_silent(entry):
 			invalid.append(entry)
-		elif not grep.search(entry, exclusion.exclusion.get(exclusion.RegEx.IP)):
+		elif not grep.search(entry, exclusion.exclusion.get(exclusion.RegEx.IP)) or exclusion.exclusion.is_excluded(entry):
 			ignored.append(entry)
 		else:
 			valid.append(entry)
@@ -151,7 +156,7 @@ def emails(key: config.TXT):
 	"""
 	valid, ignored = [], []; safe_file = __file.file.get(key)
 	for entry in __file.read(safe_file):
-		if not grep.search(entry, exclusion.exclusion.get(exclusion.RegEx.EMAIL)):
+		if not grep.search(entry, exclusion.exclusion.get(exclusion.RegEx.EMAIL)) or exclusion.exclusion.is_excluded(entry.rsplit("@", 1)[-1]):
 			ignored.append(entry)
 		else:
 			valid.append(entry)
@@ -212,31 +217,15 @@ def files():
 
 def file(key: config.TXT | config.JSON):
 	"""
-	Filter a file.
+	Filter a file.\n
+	A `config.TXT` file is not filtered again if no lines were added to it since it was last filtered with the current exclusions, see `file.Store`.
 	"""
 	if isinstance(key, config.TXT):
-		# --------------------------------
-		if key in SUBDOMAIN_KEYS:
-			subdomains(key)
-			if key in PORT_KEYS:
-				ports(key, 80, 443)
-			return
-		# --------------------------------
-		if key in IP_KEYS:
-			ips(key)
-			return
-		# --------------------------------
-		if key in EMAIL_KEYS:
-			emails(key)
-			return
-		# --------------------------------
-		if key in ASN_KEYS:
-			asns(key)
-			return
-		# --------------------------------
 		safe_file = __file.file.get(key)
-		__file.insert(__array.unique(__file.read(safe_file)), safe_file)
-		# --------------------------------
+		revision = exclusion.exclusion.get_revision()
+		if not safe_file.is_filtered(revision):
+			__txt(key)
+			safe_file.set_filtered(revision)
 	elif isinstance(key, config.JSON):
 		# --------------------------------
 		safe_file = __file.file.get(key)
@@ -247,3 +236,30 @@ def file(key: config.TXT | config.JSON):
 		else:
 			jquery.find_insert_file(data, safe_file, f"unique_by(.{keys[0]}) | sort_by(.{keys[0]}) | reverse | .[]", sort = False, dump = True, log = False)
 		# --------------------------------
+
+def __txt(key: config.TXT):
+	"""
+	Filter a `config.TXT` file.
+	"""
+	# --------------------------------
+	if key in SUBDOMAIN_KEYS:
+		subdomains(key)
+		if key in PORT_KEYS:
+			ports(key)
+		return
+	# --------------------------------
+	if key in IP_KEYS:
+		ips(key)
+		return
+	# --------------------------------
+	if key in EMAIL_KEYS:
+		emails(key)
+		return
+	# --------------------------------
+	if key in ASN_KEYS:
+		asns(key)
+		return
+	# --------------------------------
+	safe_file = __file.file.get(key)
+	__file.insert(__array.unique(__file.read(safe_file)), safe_file)
+	# --------------------------------
@@ -2,21 +2,39 @@
 
 from . import array, debug, file, run
 
-import regex as re
+import mmap, regex as re, typing
 
 FLAGS = re.MULTILINE | re.IGNORECASE
 
+__NON_ASCII = re.compile(rb"[^\x00-\x7F]")
+
 # ----------------------------------------
 
-def find(text: str, query: str, sort = True, log = True) -> list[str]:
+def is_ascii(text: bytes | mmap.mmap):
+	"""
+	Returns `True` if bytes, or a memory-mapped file, contain only ASCII characters.\n
+	On ASCII-only text, a pattern matches the same in bytes as in text; otherwise, word characters, word boundaries, and case-insensitive matching differ, because they are ASCII-only in bytes.
+	"""
+	return not __NON_ASCII.search(text)
+
+def __decode(matches: list[bytes | tuple[bytes, ...]]) -> list[str | tuple[str, ...]]:
+	"""
+	Decode the matches found in bytes.
+	"""
+	return [match.decode(file.ENCODING) if isinstance(match, bytes) else tuple(group.decode(file.ENCODING) for group in match) for match in matches]
+
+def find(text: str | bytes | mmap.mmap, query: str, sort = True, log = True) -> list[str]:
 	"""
 	Extract all matches from a text using the specified RegEx pattern.\n
+	The text can also be bytes, or a memory-mapped file, see `file.read_mmap()`, in which case the matches are decoded; if it is not ASCII-only, it is decoded before matching instead, see `grep.is_ascii()`.\n
 	Returns a unique [sorted] list if the result is not a nested list.
 	"""
 	tmp = []
 	try:
 		if text:
-			tmp = re.findall(query, text, flags = FLAGS)
+			if not isinstance(text, str) and not is_ascii(text):
+				text = text[:].decode(file.ENCODING)
+			tmp = re.findall(query, text, flags = FLAGS) if isinstance(text, str) else __decode(re.findall(query.encode(file.ENCODING), text, flags = FLAGS))
 			if tmp:
 				if not array.is_nested(tmp):
 					tmp = array.unique(tmp, sort)
@@ -26,6 +44,29 @@ def find(text: str, query: str, sort = True, log = True) -> list[str]:
 		debug.debug.log_error(f"utils.grep.find() > {query}", ex)
 	return tmp
 
+def find_lines(lines: typing.Iterable[str], queries: list[str], sort = True, log = True) -> list[list[str]]:
+	"""
+	Extract all matches from multiple lines, for example, lines of a file, using each of the specified RegEx patterns, without keeping the lines in memory.\n
+	Each pattern is matched against one line at a time, so a match cannot span multiple lines, and if a pattern fails, its result is empty.\n
+	Returns a unique [sorted] list per pattern if the result is not a nested list.
+	"""
+	tmp = [[] for query in queries]
+	patterns = {}
+	for i, query in enumerate(queries):
+		try:
+			patterns[i] = re.compile(query, flags = FLAGS)
+		except Exception as ex:
+			debug.debug.log_error(f"utils.grep.find_lines() > {query}", ex)
+	for line in lines:
+		for i, pattern in patterns.items():
+			tmp[i].extend(pattern.findall(line))
+	for i, pattern in patterns.items():
+		if tmp[i] and not array.is_nested(tmp[i]):
+			tmp[i] = array.unique(tmp[i], sort)
+		if log:
+			debug.debug.log_extraction(f"utils.grep.find_lines() > {queries[i]} > {'Extracted' if tmp[i] else 'Empty'}")
+	return tmp
+
 def find_append_file(text: str, out: file.SafeFile | str, query: str, sort = True, log = True):
 	"""
 	Extract all matches from a text using the specified RegEx pattern, append them to a file, and return the result.\n
@@ -68,6 +109,48 @@ def replace(text: str, query: str, new = "", count = 0):
 		debug.debug.log_error(f"utils.grep.replace() > {query}", ex)
 	return text
 
+class MatchExtractor(run.Extractor):
+
+	def __init__(self, out: file.SafeFile | str, query: str, sort = True, log = True):
+		"""
+		Initialize a class for extracting all matches from a streamed tool output using the specified RegEx pattern, line by line, and appending them to a file, see `run.Extractor`.\n
+		Matches are appended once the tool invocation completes, as a unique [sorted] list.
+		"""
+		super().__init__(out, batch = 0)
+		self.__query = query
+		self.__pattern = re.compile(query, flags = FLAGS)
+		self.__sort = sort
+		self.__log = log
+
+	def extract(self, line: str) -> list[str]:
+		"""
+		Extract all matches from a line.
+		"""
+		return [match for match in self.__pattern.findall(line) if isinstance(match, str)]
+
+	def prepare(self, matches: list[str]) -> list[str]:
+		"""
+		Get the unique [sorted] matches.
+		"""
+		tmp = array.unique(matches, self.__sort)
+		if self.__log:
+			debug.debug.log_extraction(f"utils.grep.MatchExtractor() > {self.__query} > {'Extracted' if tmp else 'Empty'}")
+		return tmp
+
+def unbatch(results: list[run.Result], separator: str, key: str) -> list[run.Result]:
+	"""
+	Split the responses of batched tool invocations into one result per entry, see `run.Batch`.\n
+	The separator RegEx pattern matches the start of each entry's response, while the key RegEx pattern extracts the entry from it.\n
+	Entries are matched case-insensitively and without a trailing dot; responses that cannot be matched to an entry are dropped.
+	"""
+	tmp = []
+	for result in results:
+		entries = {entry.lower().rstrip("."): entry for entry in result.data.splitlines()}
+		for response in re.split(f"(?={separator})", result.response, flags = FLAGS):
+			if (keys := find(response, key, sort = False, log = False)) and (entry := entries.get(keys[0].lower().rstrip("."))):
+				tmp.append(run.Result(response, entry))
+	return tmp
+
 def results(results: list[run.Result], primary_key: str, secondary_key: str, query = "") -> list[dict[str, list[str] | str]]:
 	"""
 	Parse results.\n
@@ -2,7 +2,68 @@
 
 from . import array, debug, file, run
 
-import jq, json, typing
+import collections, jq, json, threading, typing
+
+try:
+	import orjson
+	loads = orjson.loads
+except ImportError:
+	loads = json.loads
+"""
+Function for deserializing a JSON string; uses `orjson` if installed, which is considerably faster on large tool outputs.
+"""
+
+RECORD_PREFIX = ".[]"
+"""
+JQ patterns that start with this prefix are applied to each element of an array on its own, and can be evaluated one record at a time, see `jquery.find_lines()`.
+"""
+
+RECORD_BATCH = 1000
+"""
+Number of records passed to a compiled JQ pattern at once, see `jquery.find_lines()`.
+"""
+
+PROGRAMS_SIZE = 256
+"""
+Maximum number of compiled JQ patterns kept in memory, see `jquery.Programs`.
+"""
+
+class Programs:
+
+	def __init__(self, size = PROGRAMS_SIZE):
+		"""
+		Initialize a class for caching compiled JQ patterns by their query, so that a pattern used repeatedly is compiled only once per process.\n
+		Once the cache is full, the least recently used pattern is evicted.
+		"""
+		self.__lock = threading.Lock()
+		self.__size = size
+		self.__programs: collections.OrderedDict[str, typing.Any] = collections.OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def compile(self, query: str) -> typing.Any:
+		"""
+		Get a compiled JQ pattern, and compile it if not already cached.\n
+		Raises an exception if the pattern is invalid; invalid patterns are not cached.
+		"""
+		with self.__lock:
+			if query in self.__programs:
+				self.__programs.move_to_end(query)
+				self.hits += 1
+				return self.__programs[query]
+			self.misses += 1
+		program = jq.compile(query)
+		with self.__lock:
+			self.__programs[query] = program
+			self.__programs.move_to_end(query)
+			while len(self.__programs) > self.__size:
+				self.__programs.popitem(last = False)
+		return program
+
+programs = Programs()
+"""
+Singleton class instance for caching compiled JQ patterns.
+"""
 
 def jload(path: file.SafeFile | str) -> typing.Any:
 	"""
@@ -12,23 +73,26 @@ def jload(path: file.SafeFile | str) -> typing.Any:
 	try:
 		text = file.read(path, array = False)
 		if text:
-			tmp = json.loads(text)
+			tmp = loads(text)
 	except Exception as ex:
 		debug.debug.log_error(f"utils.jquery.jload() > {file.get_path(path)}", ex)
 	return tmp
 
-def jload_array(path: file.SafeFile | str) -> list[typing.Any]:
+def iload_array(path: file.SafeFile | str) -> typing.Iterator[typing.Any]:
 	"""
-	Deserialize multiple JSON strings from a file, separated by newlines, and append the data to a list.
+	Deserialize multiple JSON strings from a file, separated by newlines, and yield the data one record at a time.
 	"""
-	tmp = []
-	for line in file.read(path, array = True):
+	for line in file.read_lines(path):
 		try:
-			if line:
-				tmp.append(json.loads(line))
+			yield loads(line)
 		except Exception as ex:
-			debug.debug.log_error(f"utils.jquery.jload_array() > {file.get_path(path)}", ex)
-	return tmp
+			debug.debug.log_error(f"utils.jquery.iload_array() > {file.get_path(path)}", ex)
+
+def jload_array(path: file.SafeFile | str) -> list[typing.Any]:
+	"""
+	Deserialize multiple JSON strings from a file, separated by newlines, and append the data to a list.
+	"""
+	return list(iload_array(path))
 
 def jdump(data: typing.Any):
 	"""
@@ -52,7 +116,7 @@ def find(data: typing.Any | str, query: str, sort = True, dump = False, log = Tr
 	tmp = []
 	try:
 		if data:
-			tmp = jq.compile(query).input_text(data).all() if isinstance(data, str) else jq.compile(query).input_value(data).all()
+			tmp = programs.compile(query).input_text(data).all() if isinstance(data, str) else programs.compile(query).input_value(data).all()
 			if tmp:
 				if not array.is_nested(tmp):
 					tmp = array.unique(tmp, sort)
@@ -64,6 +128,59 @@ def find(data: typing.Any | str, query: str, sort = True, dump = False, log = Tr
 		tmp = jdump(tmp)
 	return tmp
 
+def __find_records(compiled: dict[int, typing.Any], queries: list[str], results: list[list[typing.Any]], lines: list[str]):
+	"""
+	Evaluate each compiled JQ pattern on each of the valid JSON strings, as if each JSON string was the only element of an array, and extend the results.\n
+	If a pattern fails, it is removed, and its result is emptied.
+	"""
+	text = ("\n").join(f"[{line}]" for line in lines)
+	for i, program in list(compiled.items()):
+		try:
+			results[i].extend(program.input_text(text).all())
+		except Exception as ex:
+			debug.debug.log_error(f"utils.jquery.find_lines() > {queries[i]}", ex)
+			del compiled[i]
+			results[i] = []
+
+def find_lines(lines: typing.Iterable[str], queries: list[str], sort = True, log = True) -> list[typing.Any]:
+	"""
+	Extract all matches from multiple JSON strings, for example, lines of a file, using each of the specified JQ patterns, as if the JSON strings were elements of an array.\n
+	Each pattern is compiled once; patterns that start with `jquery.RECORD_PREFIX` are evaluated on `jquery.RECORD_BATCH` records at a time, so the records are kept in memory only if there are other patterns.\n
+	Invalid JSON strings are skipped, and if a pattern fails, its result is empty.\n
+	Returns a unique [sorted] list per pattern if the result is not a nested list.
+	"""
+	tmp = [[] for query in queries]
+	compiled, aggregates = {}, [i for i, query in enumerate(queries) if not query.lstrip().startswith(RECORD_PREFIX)]
+	for i, query in enumerate(queries):
+		if i not in aggregates:
+			try:
+				compiled[i] = programs.compile(query)
+			except Exception as ex:
+				debug.debug.log_error(f"utils.jquery.find_lines() > {query}", ex)
+	records, batch = [], []
+	for line in lines:
+		try:
+			record = loads(line)
+		except Exception as ex:
+			debug.debug.log_error(f"utils.jquery.find_lines() > {line[:100]}", ex)
+			continue
+		if aggregates:
+			records.append(record)
+		batch.append(line)
+		if len(batch) >= RECORD_BATCH:
+			__find_records(compiled, queries, tmp, batch)
+			batch = []
+	if batch:
+		__find_records(compiled, queries, tmp, batch)
+	for i, program in compiled.items():
+		if tmp[i] and not array.is_nested(tmp[i]):
+			tmp[i] = array.unique(tmp[i], sort)
+		if log:
+			debug.debug.log_extraction(f"utils.jquery.find_lines() > {queries[i]} > {'Extracted' if tmp[i] else 'Empty'}")
+	for i in aggregates:
+		tmp[i] = find(records, queries[i], sort, log = log)
+	return tmp
+
 def find_append_file(data: typing.Any | str, out: file.SafeFile | str, query: str, sort = True, dump = False, log = True):
 	"""
 	Extract all matches from data using the specified JQ pattern, append them to a file, and return the result.\n
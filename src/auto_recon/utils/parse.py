@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+from . import cert, debug, directory, file, grep, jquery
+
+import concurrent.futures, multiprocessing, os, threading, typing
+
+MAX_PARSERS = os.cpu_count() or 1
+"""
+Default number of processes for parsing tool outputs.
+"""
+
+def execute(root_directory: str, function: typing.Callable, args: tuple) -> typing.Any:
+	"""
+	Run a parsing function, and log to the same files as the main process.\n
+	Intended to run in a parser process, see `parse.Pool`.
+	"""
+	debug.debug.initialize(root_directory or None)
+	try:
+		return function(*args)
+	finally:
+		file.writer.flush()
+
+class Pool:
+
+	def __init__(self):
+		"""
+		Initialize a class for parsing tool outputs in a pool of processes, so that the parsing of multiple tools does not serialize on the GIL.\n
+		The processes are spawned, not forked, since the main process runs threads, and are started on the first use.
+		"""
+		self.__lock = threading.Lock()
+		self.__executor: concurrent.futures.ProcessPoolExecutor = None
+		self.__workers = MAX_PARSERS
+
+	def set_workers(self, workers: int):
+		"""
+		Set the number of parser processes; if one or less, tool outputs are parsed in the calling thread.\n
+		Must be called before the first use.
+		"""
+		self.__workers = workers
+
+	def __get_executor(self):
+		"""
+		Get the process pool, and start it if not already started.
+		"""
+		with self.__lock:
+			if not self.__executor:
+				self.__executor = concurrent.futures.ProcessPoolExecutor(max_workers = self.__workers, mp_context = multiprocessing.get_context("spawn"))
+		return self.__executor
+
+	def run(self, function: typing.Callable, *args) -> typing.Any:
+		"""
+		Run a parsing function in a parser process, and wait for its result.\n
+		The function and its arguments must be picklable, for example, pass paths instead of `file.SafeFile`; the files whose paths are passed are flushed beforehand, see `file.File.flush()`.\n
+		If the process pool is disabled or broken, the function is run in the calling thread instead.
+		"""
+		if self.__workers > 1:
+			file.file.flush([arg for arg in args if isinstance(arg, str)])
+			try:
+				return self.__get_executor().submit(execute, directory.directory.get_root(), function, args).result()
+			except concurrent.futures.BrokenExecutor as ex:
+				debug.debug.log_error(f"utils.parse.Pool().run() > {function.__name__}", ex)
+		return function(*args)
+
+	def shutdown(self):
+		"""
+		Stop the parser processes.
+		"""
+		with self.__lock:
+			if self.__executor:
+				self.__executor.shutdown(wait = False, cancel_futures = True)
+				self.__executor = None
+
+pool = Pool()
+"""
+Singleton class instance for parsing tool outputs in a pool of processes.
+"""
+
+# ----------------------------------------
+
+def __grep(path: str, queries: list[str], sort: bool) -> list[list[str]]:
+	"""
+	Memory-map a file once, and extract all matches using each of the specified RegEx patterns.\n
+	If the file is not ASCII-only, it is decoded once before matching, see `grep.is_ascii()`, and if the file is compressed, it is read one line at a time instead, see `grep.find_lines()`.
+	"""
+	if file.is_compressed(path):
+		return grep.find_lines(file.read_lines(path), queries, sort)
+	with file.read_mmap(path) as buffer:
+		text = buffer if grep.is_ascii(buffer) else buffer[:].decode(file.ENCODING)
+		return [grep.find(text, query, sort) for query in queries]
+
+def grep_file(path: file.SafeFile | str, queries: list[str], sort = True) -> list[list[str]]:
+	"""
+	Extract all matches from a file using each of the specified RegEx patterns, in a parser process.\n
+	Returns a unique [sorted] list per pattern if the result is not a nested list.
+	"""
+	return pool.run(__grep, file.get_path(path), queries, sort)
+
+def grep_append_files(path: file.SafeFile | str, queries: list[tuple[file.SafeFile | str, str]], sort = True) -> list[list[str]]:
+	"""
+	Extract all matches from a file using each of the specified RegEx patterns, in a parser process, and append them to the file paired with each pattern - if specified.\n
+	Returns a unique [sorted] list per pattern if the result is not a nested list.
+	"""
+	tmp = grep_file(path, [query for out, query in queries], sort)
+	for (out, query), matches in zip(queries, tmp):
+		if out:
+			file.append(matches, out)
+	return tmp
+
+def __jq(path: str, queries: list[str], lines: bool, sort: bool) -> list[typing.Any]:
+	"""
+	Deserialize a file once, and extract all matches using each of the specified JQ patterns.\n
+	If `lines` is `True`, the file is read one record at a time, see `jquery.find_lines()`.
+	"""
+	if lines:
+		return jquery.find_lines(file.read_lines(path), queries, sort)
+	data = jquery.jload(path)
+	return [jquery.find(data, query, sort) for query in queries]
+
+def jq_file(path: file.SafeFile | str, queries: list[str], lines = False, sort = True) -> list[typing.Any]:
+	"""
+	Extract all matches from a JSON file using each of the specified JQ patterns, in a parser process.\n
+	If `lines` is `True`, the file contains multiple JSON strings separated by newlines, see `jquery.jload_array()`.\n
+	Returns a unique [sorted] list per pattern if the result is not a nested list.
+	"""
+	return pool.run(__jq, file.get_path(path), queries, lines, sort)
+
+def jq_append_files(path: file.SafeFile | str, queries: list[tuple[file.SafeFile | str, str]], lines = False, sort = True) -> list[typing.Any]:
+	"""
+	Extract all matches from a JSON file using each of the specified JQ patterns, in a parser process, and append them to the file paired with each pattern - if specified.\n
+	If `lines` is `True`, the file contains multiple JSON strings separated by newlines, see `jquery.jload_array()`.\n
+	Returns a unique [sorted] list per pattern if the result is not a nested list.
+	"""
+	tmp = jq_file(path, [query for out, query in queries], lines, sort)
+	for (out, query), matches in zip(queries, tmp):
+		if out:
+			file.append(matches, out)
+	return tmp
+
+def __certificates(chains: dict[str, list[bytes]], outs: dict[str, str]) -> list[dict[str, list[str] | str]]:
+	"""
+	Deserialize the DER certificates of each subdomain, dump them into the subdomain's file, and return their details.
+	"""
+	return [cert.Certificate(subdomain, cert.decode_der(chain, outs.get(subdomain))).to_dict() for subdomain, chain in chains.items()]
+
+def certificates(chains: dict[str, list[bytes]], outs: dict[str, file.SafeFile | str] = None) -> list[dict[str, list[str] | str]]:
+	"""
+	Deserialize the DER certificates of each subdomain, in a parser process, then, dump the stringified certificates into the file of each subdomain - if specified.\n
+	Returns the details of each subdomain's certificates, see `cert.Certificate`.
+	"""
+	return pool.run(__certificates, chains, {subdomain: file.get_path(out) for subdomain, out in (outs or {}).items()})
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+
+from . import checkpoint, config, debug, file, run
+
+import asyncio, dataclasses, ipaddress, json, random, socket, struct
+
+DNS_PORT = 53
+
+FALLBACK_RESOLVERS = ["8.8.8.8", "1.1.1.1"]
+"""
+DNS resolvers to use if neither the resolvers file nor `/etc/resolv.conf` specify any.
+"""
+
+SYSTEM_RESOLVERS_FILE = "/etc/resolv.conf"
+
+STATUS = {
+	0 : "NOERROR",
+	1 : "FORMERR",
+	2 : "SERVFAIL",
+	3 : "NXDOMAIN",
+	4 : "NOTIMP",
+	5 : "REFUSED",
+	6 : "YXDOMAIN",
+	7 : "YXRRSET",
+	8 : "NXRRSET",
+	9 : "NOTAUTH",
+	10: "NOTZONE"
+}
+"""
+DNS response codes mapped to the status names as printed by `dig`.
+"""
+
+RETRY_STATUS = ["SERVFAIL", "REFUSED"]
+"""
+Statuses for which a query is retried using the next DNS resolver.
+"""
+
+TYPE = {
+	config.DNS.A    : 1,
+	config.DNS.NS   : 2,
+	config.DNS.CNAME: 5,
+	config.DNS.PTR  : 12,
+	config.DNS.MX   : 15,
+	config.DNS.TXT  : 16,
+	config.DNS.AAAA : 28,
+	config.DNS.SRV  : 33
+}
+
+CLASS_IN = 1
+
+FLAG_TRUNCATED = 0x0200
+"""
+Flag set in a DNS response that did not fit into a UDP datagram, in which case the query is sent again over TCP.
+"""
+
+EDNS_UDP_SIZE = 4096
+
+CHECKPOINT_BATCH = 1000
+"""
+Number of answers after which they are journaled, see `checkpoint.Checkpoint`.
+"""
+
+MAX_POINTERS = 64
+"""
+Maximum number of compression pointers to follow when reading a domain name, in order to prevent loops.
+"""
+
+@dataclasses.dataclass
+class Answer:
+	"""
+	Class for storing a DNS status and the records of the queried type, without a trailing dot.
+	"""
+	status : str
+	records: list[str] = dataclasses.field(default_factory = list)
+
+# ----------------------------------------
+
+def build_query(identifier: int, name: str, type: config.DNS) -> bytes:
+	"""
+	Build a recursive DNS query with an EDNS(0) OPT record.\n
+	Raises an exception if the domain name is invalid.
+	"""
+	qname = b""
+	for label in name.rstrip(".").split("."):
+		label = label.encode("idna") if not label.isascii() else label.encode()
+		if not 0 < len(label) < 64:
+			raise ValueError(f"Invalid label length: {name}")
+		qname += struct.pack("!B", len(label)) + label
+	qname += b"\x00"
+	if len(qname) > 255:
+		raise ValueError(f"Invalid domain name length: {name}")
+	header = struct.pack("!HHHHHH", identifier, 0x0100, 1, 0, 0, 1)
+	opt = b"\x00" + struct.pack("!HHIH", 41, EDNS_UDP_SIZE, 0, 0)
+	return header + qname + struct.pack("!HH", TYPE[type], CLASS_IN) + opt
+
+def __read_name(data: bytes, offset: int) -> tuple[str, int]:
+	"""
+	Read a possibly compressed domain name, and return it together with the offset right after it.
+	"""
+	labels, end, pointers = [], None, 0
+	while True:
+		length = data[offset]
+		if length & 0xC0 == 0xC0:
+			pointers += 1
+			if pointers > MAX_POINTERS:
+				raise ValueError("Too many compression pointers")
+			if end is None:
+				end = offset + 2
+			offset = ((length & 0x3F) << 8) | data[offset + 1]
+		elif length:
+			labels.append(data[offset + 1:offset + 1 + length].decode("ascii", errors = "replace"))
+			offset += 1 + length
+		else:
+			offset += 1
+			break
+	return (".").join(labels), offset if end is None else end
+
+def __read_strings(data: bytes, offset: int, length: int) -> str:
+	"""
+	Read all character strings of the record data, and concatenate them, for example, a TXT record longer than 255 characters.
+	"""
+	tmp, end = [], offset + length
+	while offset < end:
+		tmp.append(data[offset + 1:offset + 1 + data[offset]])
+		offset += 1 + data[offset]
+	return (b"").join(tmp).decode("utf-8", errors = "replace")
+
+def __read_record(data: bytes, offset: int, length: int, type: int) -> str:
+	"""
+	Read the record data of the specified type.\n
+	SRV records are read as the target and the port, separated by a colon; an empty string means that the service is not available.
+	"""
+	if type == TYPE[config.DNS.A]:
+		return socket.inet_ntop(socket.AF_INET, data[offset:offset + length])
+	elif type == TYPE[config.DNS.AAAA]:
+		return socket.inet_ntop(socket.AF_INET6, data[offset:offset + length])
+	elif type == TYPE[config.DNS.MX]:
+		return __read_name(data, offset + 2)[0]
+	elif type == TYPE[config.DNS.TXT]:
+		return __read_strings(data, offset, length)
+	elif type == TYPE[config.DNS.SRV]:
+		priority, weight, port = struct.unpack_from("!HHH", data, offset)
+		target = __read_name(data, offset + 6)[0]
+		return f"{target}:{port}" if target else ""
+	return __read_name(data, offset)[0]
+
+def parse_response(data: bytes, name: str, type: config.DNS) -> Answer:
+	"""
+	Parse a DNS response to a query for the specified domain name and type.\n
+	Raises an exception if the response is malformed or does not match the query.
+	"""
+	_, flags, qdcount, ancount, _, _ = struct.unpack_from("!HHHHHH", data)
+	offset = 12
+	for _ in range(qdcount):
+		qname, offset = __read_name(data, offset)
+		if qname.lower() != name.rstrip(".").lower():
+			raise ValueError(f"Mismatched question: {qname}")
+		offset += 4
+	tmp = Answer(STATUS.get(flags & 0x000F, str(flags & 0x000F)))
+	for _ in range(ancount):
+		_, offset = __read_name(data, offset)
+		rtype, _, _, length = struct.unpack_from("!HHIH", data, offset)
+		offset += 10
+		if rtype == TYPE[type] and (record := __read_record(data, offset, length, rtype).rstrip(".")):
+			tmp.records.append(record)
+		offset += length
+	return tmp
+
+def get_name(entry: str, type: config.DNS):
+	"""
+	Get the domain name to query.\n
+	For PTR queries, the entry must be an IP address, and its reverse domain name is returned.\n
+	Returns an empty string on failure.
+	"""
+	name = entry
+	if type == config.DNS.PTR:
+		try:
+			name = ipaddress.ip_address(entry).reverse_pointer
+		except ValueError:
+			name = ""
+	return name
+
+def __parse_address(text: str) -> tuple[str, int] | None:
+	"""
+	Parse a DNS resolver in the `ip`, `ip:port`, or `[ip]:port` format.\n
+	Returns `None` on failure.
+	"""
+	tmp = None
+	host, port = text, DNS_PORT
+	if text.startswith("["):
+		host, _, port = text[1:].partition("]")
+		port = port.lstrip(":") or DNS_PORT
+	elif text.count(":") == 1:
+		host, port = text.split(":")
+	try:
+		tmp = (str(ipaddress.ip_address(host)), int(port))
+	except ValueError:
+		pass
+	return tmp
+
+def read_resolvers(resolvers_file = "") -> list[tuple[str, int]]:
+	"""
+	Read DNS resolvers from a resolvers file.\n
+	If no resolvers file is specified, read DNS resolvers from `/etc/resolv.conf`, and if there are none, use `resolver.FALLBACK_RESOLVERS`.
+	"""
+	tmp = []
+	if resolvers_file:
+		tmp = [address for line in file.read(resolvers_file) if (address := __parse_address(line.strip()))]
+	elif file.validate_silent(SYSTEM_RESOLVERS_FILE):
+		for line in file.read(SYSTEM_RESOLVERS_FILE):
+			line = line.split()
+			if len(line) > 1 and line[0] == "nameserver" and (address := __parse_address(line[1])):
+				tmp.append(address)
+	if not tmp:
+		tmp = [__parse_address(address) for address in FALLBACK_RESOLVERS]
+	return list(dict.fromkeys(tmp))
+
+# ----------------------------------------
+
+class Protocol(asyncio.DatagramProtocol):
+
+	def __init__(self):
+		"""
+		Initialize a class for matching DNS responses received on a UDP socket with pending queries by their IDs.
+		"""
+		self.__pending: dict[int, asyncio.Future] = {}
+
+	def datagram_received(self, data: bytes, address: tuple):
+		if len(data) >= 12 and (future := self.__pending.pop(struct.unpack_from("!H", data)[0], None)) and not future.done():
+			future.set_result(data)
+
+	def error_received(self, ex: Exception):
+		pass
+
+	def register(self) -> tuple[int, asyncio.Future]:
+		"""
+		Register a pending query, and return its unique ID and a future for its response.
+		"""
+		identifier = random.randrange(0x10000)
+		while identifier in self.__pending:
+			identifier = random.randrange(0x10000)
+		future = asyncio.get_running_loop().create_future()
+		self.__pending[identifier] = future
+		return identifier, future
+
+	def unregister(self, identifier: int):
+		"""
+		Unregister a pending query.
+		"""
+		self.__pending.pop(identifier, None)
+
+class Server:
+
+	def __init__(self, address: tuple[str, int]):
+		"""
+		Initialize a class for sending DNS queries to a DNS resolver over a single UDP socket, at a limited rate.
+		"""
+		self.address = address
+		self.rate = 0
+		self.__next = 0.0
+		self.__transport: asyncio.DatagramTransport = None
+		self.__protocol: Protocol = None
+
+	async def __wait(self):
+		"""
+		Wait for the next free slot if the rate is limited.
+		"""
+		if self.rate > 0:
+			now = asyncio.get_running_loop().time()
+			start = max(self.__next, now)
+			self.__next = start + 1 / self.rate
+			if start > now:
+				await asyncio.sleep(start - now)
+
+	async def open(self):
+		"""
+		Open the UDP socket if not already opened.
+		"""
+		if not self.__transport:
+			self.__transport, self.__protocol = await asyncio.get_running_loop().create_datagram_endpoint(Protocol, remote_addr = self.address)
+
+	async def __query_tcp(self, identifier: int, name: str, type: config.DNS) -> bytes:
+		"""
+		Send a DNS query over TCP, and return the response.\n
+		Raises an exception if the response does not match the query ID.
+		"""
+		reader, writer = await asyncio.open_connection(*self.address)
+		try:
+			query = build_query(identifier, name, type)
+			writer.write(struct.pack("!H", len(query)) + query)
+			await writer.drain()
+			length, = struct.unpack("!H", await reader.readexactly(2))
+			data = await reader.readexactly(length)
+			if len(data) < 12 or struct.unpack_from("!H", data)[0] != identifier:
+				raise ValueError(f"Mismatched response: {name}")
+			return data
+		finally:
+			writer.close()
+
+	async def query(self, name: str, type: config.DNS, timeout: float) -> Answer | None:
+		"""
+		Send a DNS query and wait for the response.\n
+		If the response is truncated, the query is sent again over TCP, see `resolver.FLAG_TRUNCATED`.\n
+		Must be called after `open()`.\n
+		Returns `None` on timeout or a malformed response.
+		"""
+		await self.__wait()
+		identifier, future = self.__protocol.register()
+		answer = None
+		try:
+			self.__transport.sendto(build_query(identifier, name, type))
+			data = await asyncio.wait_for(future, timeout)
+			if struct.unpack_from("!H", data, 2)[0] & FLAG_TRUNCATED:
+				data = await asyncio.wait_for(self.__query_tcp(identifier, name, type), timeout)
+			answer = parse_response(data, name, type)
+		except (asyncio.TimeoutError, EOFError, IndexError, OSError, struct.error, ValueError):
+			pass
+		finally:
+			self.__protocol.unregister(identifier)
+		return answer
+
+class Resolver:
+
+	def __init__(self):
+		"""
+		Initialize a class for resolving DNS records in-process.
+		"""
+		self.initialize()
+
+	def initialize(self, resolvers_file = ""):
+		"""
+		[Re]initialize.
+		"""
+		self.__servers = [Server(address) for address in read_resolvers(resolvers_file)]
+		self.__cache: dict[tuple[str, config.DNS], Answer] = {}
+
+	async def __resolve(self, name: str, type: config.DNS, timeout: float, retries: int, start: int) -> Answer | None:
+		"""
+		Resolve a domain name, and retry on timeout or `resolver.RETRY_STATUS` using the next DNS resolver.
+		"""
+		key = (name.lower(), type)
+		answer = self.__cache.get(key)
+		if not answer:
+			for attempt in range(retries + 1):
+				tmp = await self.__servers[(start + attempt) % len(self.__servers)].query(name, type, timeout)
+				if tmp:
+					answer = tmp
+					if answer.status not in RETRY_STATUS:
+						break
+			if answer:
+				self.__cache[key] = answer
+		return answer
+
+	async def __resolve_all(self, entries: list[str], type: config.DNS, threads: int, timeout: float, retries: int, checkpoint_key: str) -> dict[str, Answer]:
+		"""
+		Resolve all entries using a fixed number of concurrent workers, and rotate the DNS resolvers between the queries.\n
+		Answers are journaled in batches under the checkpoint key.
+		"""
+		tmp = {}
+		pending = {}
+		for server in self.__servers:
+			await server.open()
+		iterator = enumerate(entries)
+		async def worker():
+			for index, entry in iterator:
+				if (name := get_name(entry, type)) and (answer := await self.__resolve(name, type, timeout, retries, index)):
+					tmp[entry] = answer
+					pending[entry] = json.dumps([answer.status, *answer.records])
+					if len(pending) >= CHECKPOINT_BATCH:
+						checkpoint.checkpoint.add(checkpoint_key, pending.copy())
+						pending.clear()
+		await asyncio.gather(*[worker() for _ in range(max(1, min(threads, len(entries))))])
+		checkpoint.checkpoint.add(checkpoint_key, pending)
+		return tmp
+
+	def resolve(self, entries: list[str], type: config.DNS, threads = 100, timeout = 5, retries = 1, rate = 0, out: file.SafeFile = None) -> dict[str, Answer]:
+		"""
+		Resolve DNS records of the specified type for each entry, in parallel, without spawning any subprocesses.\n
+		For PTR queries, the entries must be IP addresses.\n
+		The rate limits the number of queries per second sent to each DNS resolver, zero means unlimited.\n
+		Entries that could not be resolved are omitted, while answers are cached for the lifetime of the resolver.\n
+		Answers are journaled, and when restoring a session, entries that were already resolved are not queried again, see `checkpoint.Checkpoint`.\n
+		If `out` is specified, answers are appended to it in the `entry type status records` format.
+		"""
+		tmp = {}
+		try:
+			for server in self.__servers:
+				server.rate = rate
+			checkpoint_key = checkpoint.get_key(run.get_context().name, [self.__class__.__name__, type.value])
+			journal, entries = checkpoint.checkpoint.restore(checkpoint_key, entries)
+			for entry, response in journal.items():
+				status, *records = json.loads(response)
+				tmp[entry] = Answer(status, records)
+			resolved = run.engine.run(self.__resolve_all(entries, type, threads, timeout, retries, checkpoint_key))
+			if out:
+				file.append([(" ").join([entry, type.value, answer.status, *answer.records]) for entry, answer in resolved.items()], out)
+			tmp.update(resolved)
+			debug.debug.log_debug(f"utils.resolver.Resolver().resolve() > {type.value}", f"Restored: {len(journal)}, queried: {len(entries)}, resolved: {len(resolved)}")
+		except Exception as ex:
+			debug.debug.log_error(f"utils.resolver.Resolver().resolve() > {type.value}", ex)
+		return tmp
+
+resolver = Resolver()
+"""
+Singleton class instance for resolving DNS records in-process.
+"""
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
-from . import array, config, debug, file
+from . import array, cache, checkpoint, config, context, debug, directory, dispatch, file
 
-import concurrent.futures, dataclasses, subprocess
+import asyncio, concurrent.futures, contextvars, dataclasses, functools, os, shlex, shutil, signal, subprocess, threading, time, typing
 
 QUOTE = '"'
 
@@ -34,6 +34,430 @@ def replace_placeholder(cmd: list[str], new = "") -> list[str]:
 		tmp.append(part)
 	return tmp
 
+def split(cmd: str) -> list[str]:
+	"""
+	Split a command into an argument list using shell-like syntax.\n
+	Quotes and escapes are resolved the same way `/bin/sh` would resolve them, but pipes, redirections, and expansions are not supported.
+	"""
+	return shlex.split(cmd)
+
+# ----------------------------------------
+
+@dataclasses.dataclass
+class Context:
+	"""
+	Class for storing details of the tool that is running in the current thread.\n
+	Use `timeout` attribute to specify the maximum number of seconds a single tool invocation may run, and `deadline` attribute to specify the monotonic time after which no tool invocation may run; zero means unlimited.\n
+	Use `cache_ttl` attribute to specify the maximum age in seconds of a cached tool output; zero means that tool outputs are not cached.\n
+	Use `progress` attribute to specify a callback to which the number of completed tool invocations and the number of all tool invocations of `run.many()` are reported.
+	"""
+	name        : str   = ""
+	subprocesses: int   = 0
+	queued      : float = 0
+	timeout     : float = 0
+	deadline    : float = 0
+	timeouts    : int   = 0
+	cache_ttl   : int   = 0
+	cache_hits  : int   = 0
+	progress    : typing.Callable[[int, int], None] = None
+
+	def get_timeout(self) -> float | None:
+		"""
+		Get the number of seconds the next tool invocation may run.\n
+		Returns `None` if unlimited.
+		"""
+		tmp = []
+		if self.timeout > 0:
+			tmp.append(self.timeout)
+		if self.deadline > 0:
+			tmp.append(self.deadline - time.monotonic())
+		return min(tmp) if tmp else None
+
+__context: contextvars.ContextVar[Context] = contextvars.ContextVar("context", default = None)
+
+def enter(name: str, invocation_timeout: float = 0, tool_timeout: float = 0, cache_ttl: int = 0, progress: typing.Callable[[int, int], None] = None):
+	"""
+	Set the tool that is running in the current thread, and return its context.\n
+	The tool timeout is a wall-clock budget shared by all tool invocations, starting now.
+	"""
+	context = Context(name, timeout = invocation_timeout, deadline = time.monotonic() + tool_timeout if tool_timeout > 0 else 0, cache_ttl = cache_ttl, progress = progress)
+	__context.set(context)
+	return context
+
+def get_context() -> Context:
+	"""
+	Get the context of the tool that is running in the current thread.\n
+	Returns an empty context if no tool is running.
+	"""
+	return __context.get() or Context()
+
+# ----------------------------------------
+
+MAX_PROCESSES = 50
+"""
+Default maximum number of concurrent subprocesses across all tools.
+"""
+
+KILL_GRACE = 5
+"""
+Number of seconds to wait for a timed out process group to exit after `SIGTERM`, before sending `SIGKILL`.
+"""
+
+class Engine:
+
+	def __init__(self):
+		"""
+		Initialize a class for running subprocesses from a single event loop.\n
+		The event loop runs in a background thread, which is started on the first use.
+		"""
+		self.__lock = threading.Lock()
+		self.__loop: asyncio.AbstractEventLoop = None
+		self.__limit = MAX_PROCESSES
+		self.__semaphore: asyncio.Semaphore = None
+		self.__processes: set[asyncio.subprocess.Process] = set()
+
+	def __get_loop(self):
+		"""
+		Get the event loop, and start it if not already started.
+		"""
+		with self.__lock:
+			if not self.__loop:
+				self.__loop = asyncio.new_event_loop()
+				threading.Thread(target = self.__loop.run_forever, daemon = True).start()
+		return self.__loop
+
+	def set_limit(self, limit: int):
+		"""
+		Set the maximum number of concurrent subprocesses across all tools.\n
+		Must be called before the first subprocess is started.
+		"""
+		self.__limit = limit
+
+	async def acquire(self, context: Context):
+		"""
+		Wait for a free slot in the process-wide subprocess budget, and add the waiting time to the context.\n
+		Must be called from the event loop, and must be followed by `release()`.
+		"""
+		if not self.__semaphore:
+			self.__semaphore = asyncio.Semaphore(self.__limit)
+		start = time.monotonic()
+		await self.__semaphore.acquire()
+		context.subprocesses += 1
+		context.queued += time.monotonic() - start
+
+	def release(self):
+		"""
+		Free a slot in the process-wide subprocess budget.\n
+		Must be called from the event loop.
+		"""
+		self.__semaphore.release()
+
+	def track(self, process: asyncio.subprocess.Process):
+		"""
+		Track a running subprocess, so that it can be killed on exit.
+		"""
+		self.__processes.add(process)
+
+	def untrack(self, process: asyncio.subprocess.Process):
+		"""
+		Stop tracking a subprocess.
+		"""
+		self.__processes.discard(process)
+
+	def kill_all(self):
+		"""
+		Kill the process groups of all running subprocesses.\n
+		Subprocesses run in their own sessions, so they do not receive the terminal's `SIGINT`.
+		"""
+		for process in list(self.__processes):
+			kill(process.pid, signal.SIGKILL)
+
+	def submit(self, coroutine: typing.Coroutine) -> concurrent.futures.Future:
+		"""
+		Submit a coroutine to the event loop, within the caller's context, see `context.within()`.
+		"""
+		return asyncio.run_coroutine_threadsafe(context.within(contextvars.copy_context(), coroutine), self.__get_loop())
+
+	def run(self, coroutine: typing.Coroutine):
+		"""
+		Submit a coroutine to the event loop and wait for its result.
+		"""
+		return self.submit(coroutine).result()
+
+engine = Engine()
+"""
+Singleton class instance for running subprocesses.
+"""
+
+CHUNK_SIZE = 65536
+"""
+Number of bytes to read from a streamed tool output at a time.
+"""
+
+MAX_LINE_SIZE = 16 * CHUNK_SIZE
+"""
+Number of bytes after which an unterminated line from a streamed tool output is passed on as is.
+"""
+
+class TimeoutExpired(TimeoutError):
+
+	def __init__(self, output: bytes):
+		"""
+		Exception raised when a tool invocation times out, carrying the output read so far.
+		"""
+		super().__init__("The tool invocation has timed out")
+		self.output = output
+
+class CalledProcessError(RuntimeError):
+
+	def __init__(self, returncode: int, output: bytes):
+		"""
+		Exception raised when a tool invocation exits with a non-zero exit code, carrying the exit code and the output.
+		"""
+		super().__init__(f"The tool invocation has exited with the exit code {returncode}")
+		self.returncode = returncode
+		self.output = output
+
+def kill(pid: int, sig: signal.Signals):
+	"""
+	Send a signal to a process group.\n
+	Returns `False` if the process group no longer exists.
+	"""
+	try:
+		os.killpg(pid, sig)
+		return True
+	except (ProcessLookupError, PermissionError):
+		return False
+
+async def __start(argv: list[str], stdin: str | bytes = None) -> asyncio.subprocess.Process:
+	"""
+	Start a subprocess without a shell, in a new session, in the root directory, with its standard error redirected to its standard output.\n
+	The subprocess leads its own process group, so that the subprocess and all of its children can be killed at once, see `__kill()`.\n
+	If `stdin` is a string, it is treated as a path to a file to read the standard input from; if bytes, the standard input is a pipe, see `__write()`.
+	"""
+	stream = subprocess.DEVNULL
+	if isinstance(stdin, bytes):
+		stream = subprocess.PIPE
+	elif stdin:
+		stream = open(stdin, "rb")
+	try:
+		process = await asyncio.create_subprocess_exec(*argv, stdin = stream, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, start_new_session = True, cwd = directory.directory.get_root() or None)
+	finally:
+		if not isinstance(stream, int):
+			stream.close()
+	return process
+
+async def __kill(process: asyncio.subprocess.Process):
+	"""
+	Terminate the process group of a subprocess, and kill it if it does not exit within `run.KILL_GRACE` seconds.
+	"""
+	if kill(process.pid, signal.SIGTERM):
+		try:
+			await asyncio.wait_for(process.wait(), KILL_GRACE)
+		except asyncio.TimeoutError:
+			pass
+		kill(process.pid, signal.SIGKILL)
+	await process.wait()
+
+async def __write(process: asyncio.subprocess.Process, data: bytes):
+	"""
+	Write data to the standard input of a subprocess, and close it.\n
+	Intended to run concurrently with reading the standard output, so that neither pipe fills up.
+	"""
+	try:
+		process.stdin.write(data)
+		await process.stdin.drain()
+	except (BrokenPipeError, ConnectionResetError):
+		pass
+	finally:
+		process.stdin.close()
+
+async def __communicate(process: asyncio.subprocess.Process, stdin: str | bytes, consume: typing.Callable[[bytes], typing.Awaitable[None]]):
+	"""
+	Write the standard input of a subprocess, and pass its output to an asynchronous callback in chunks of complete lines, until the subprocess exits.\n
+	Returns the exit code.
+	"""
+	writer = asyncio.ensure_future(__write(process, stdin)) if isinstance(stdin, bytes) else None
+	buffer = b""
+	while chunk := await process.stdout.read(CHUNK_SIZE):
+		buffer += chunk
+		index = buffer.rfind(b"\n") + 1
+		if index <= 0 and len(buffer) >= MAX_LINE_SIZE:
+			index = len(buffer)
+		if index > 0:
+			chunk, buffer = buffer[:index], buffer[index:]
+			await consume(chunk)
+	if buffer:
+		await consume(buffer)
+	if writer:
+		await writer
+	return await process.wait()
+
+async def __supervise(argv: list[str], stdin: str | bytes, consume: typing.Callable[[bytes], typing.Awaitable[None]], context: Context):
+	"""
+	Run a subprocess within the context's timeouts, after waiting for a free slot in the process-wide subprocess budget.\n
+	On timeout, the subprocess's process group is killed, the output read so far is kept, and the timeout is counted in the context.\n
+	If reading the output fails, for example, if a callback raises an exception, the subprocess's process group is killed before the exception is re-raised.\n
+	If the tool's wall-clock budget is already spent, the subprocess is not started at all.\n
+	Returns `True` if the subprocess has timed out, and its exit code, which is `None` on timeout.
+	"""
+	timed_out, returncode = False, None
+	await engine.acquire(context)
+	try:
+		timeout = context.get_timeout()
+		if timeout is not None and timeout <= 0:
+			context.timeouts += 1
+			raise TimeoutError("The tool timeout has expired, the subprocess was not started")
+		process = await __start(argv, stdin)
+		engine.track(process)
+		try:
+			task = asyncio.ensure_future(__communicate(process, stdin, consume))
+			done, ignored = await asyncio.wait([task], timeout = timeout)
+			if not done:
+				timed_out = True
+				context.timeouts += 1
+				debug.debug.log_error(f"utils.run.execute() > {array.join(argv)}", f"Timed out after {timeout:.2f}s, the process group was killed")
+				await __kill(process)
+				done, ignored = await asyncio.wait([task], timeout = KILL_GRACE)
+				if not done:
+					task.cancel()
+			elif task.exception():
+				await __kill(process)
+				task.result()
+			else:
+				returncode = task.result()
+		finally:
+			engine.untrack(process)
+	finally:
+		engine.release()
+	return timed_out, returncode
+
+async def execute(argv: list[str], stdin: str | bytes = None, context: Context = None) -> bytes:
+	"""
+	Run a subprocess without a shell, and return its combined standard output and standard error.\n
+	Waits for a free slot in the process-wide subprocess budget first.\n
+	On timeout, raises `run.TimeoutExpired` with the output read so far, see `__supervise()`, and on a non-zero exit code, raises `run.CalledProcessError` with the output.
+	"""
+	chunks = []
+	async def consume(chunk: bytes):
+		chunks.append(chunk)
+	timed_out, returncode = await __supervise(argv, stdin, consume, context or Context())
+	if timed_out:
+		raise TimeoutExpired(b"".join(chunks))
+	elif returncode:
+		raise CalledProcessError(returncode, b"".join(chunks))
+	return b"".join(chunks)
+
+async def stream(argv: list[str], stdin: str | bytes = None, callback: typing.Callable[[bytes], None] = None, context: Context = None) -> bytes:
+	"""
+	Run a subprocess without a shell, and pass its combined standard output and standard error to a callback in chunks of complete lines.\n
+	The callback is run in a worker thread, and the next chunk is not read until the callback returns, so memory usage does not grow with the output size.\n
+	Waits for a free slot in the process-wide subprocess budget first.\n
+	Returns an empty byte string; on timeout, raises `run.TimeoutExpired` with an empty output, see `__supervise()`, and on a non-zero exit code, raises `run.CalledProcessError` with an empty output.
+	"""
+	loop = asyncio.get_running_loop()
+	async def consume(chunk: bytes):
+		await loop.run_in_executor(None, functools.partial(contextvars.copy_context().run, callback, chunk))
+	timed_out, returncode = await __supervise(argv, stdin, consume, context or Context())
+	if timed_out:
+		raise TimeoutExpired(b"")
+	elif returncode:
+		raise CalledProcessError(returncode, b"")
+	return b""
+
+async def remote(argv: list[str], stdin: str | bytes = None, callback: typing.Callable[[bytes], None] = None, context: Context = None) -> bytes:
+	"""
+	Run a subprocess on a worker through the work queue, see `dispatch.Queue`, and copy the files it has written to the root directory back.\n
+	If `callback` is specified, the output is passed to it in chunks of complete lines, the same way as a streamed tool output, and an empty byte string is returned.\n
+	The subprocess does not take a slot in the process-wide subprocess budget, since it runs on another host.\n
+	On timeout, raises `run.TimeoutExpired` with the output read so far, and if the subprocess has exited with a non-zero exit code on the worker, raises `run.CalledProcessError` with the output.
+	"""
+	context = context or Context()
+	timeout = context.get_timeout()
+	if timeout is not None and timeout <= 0:
+		context.timeouts += 1
+		raise TimeoutError("The tool timeout has expired, the subprocess was not dispatched")
+	loop = asyncio.get_running_loop()
+	root = directory.directory.get_root()
+	id = await loop.run_in_executor(None, dispatch.queue.put, argv, stdin, timeout, root)
+	context.subprocesses += 1
+	try:
+		completion = await dispatch.queue.wait(id, timeout)
+		if completion.error:
+			raise RuntimeError(completion.error)
+		if root and os.path.isdir(completion.files):
+			await loop.run_in_executor(None, functools.partial(shutil.copytree, completion.files, root, dirs_exist_ok = True))
+		output = b""
+		if os.path.isfile(completion.output):
+			replay = functools.partial(contextvars.copy_context().run, lambda: __replay(completion.output, callback).result())
+			output = await loop.run_in_executor(None, replay)
+		if completion.timed_out:
+			context.timeouts += 1
+			debug.debug.log_error(f"utils.run.remote() > {array.join(argv)}", "Timed out on the worker, the process group was killed")
+			raise TimeoutExpired(output)
+		elif completion.returncode:
+			raise CalledProcessError(completion.returncode, output)
+	finally:
+		dispatch.queue.remove(id)
+	return output
+
+# ----------------------------------------
+
+class Extractor:
+
+	def __init__(self, out: file.SafeFile | str, batch = 10000):
+		"""
+		Initialize a class for extracting lines from a streamed tool output, and appending them to a file in batches.\n
+		If `batch` is zero, the matches are appended only once the tool invocation completes.\n
+		Override `extract()` to extract specific matches from each line, and `prepare()` to process the matches before they are appended.
+		"""
+		self.__lock = threading.Lock()
+		self.__out = out
+		self.__batch = batch
+		self.__buffer: list[str] = []
+
+	def extract(self, line: str) -> list[str]:
+		"""
+		Extract matches from a line.
+		"""
+		return [line]
+
+	def prepare(self, matches: list[str]) -> list[str]:
+		"""
+		Process the buffered matches before they are appended to the file.
+		"""
+		return matches
+
+	def get_path(self):
+		"""
+		Get the path to the file the matches are appended to.
+		"""
+		return file.get_path(self.__out)
+
+	def feed(self, lines: list[str]):
+		"""
+		Extract matches from each line, and append them to the file once the batch is full.
+		"""
+		with self.__lock:
+			for line in lines:
+				self.__buffer.extend(self.extract(line))
+			if self.__batch and len(self.__buffer) >= self.__batch:
+				self.__write()
+
+	def flush(self):
+		"""
+		Append the remaining matches to the file.
+		"""
+		with self.__lock:
+			self.__write()
+
+	def __write(self):
+		"""
+		Append the buffered matches to the file, and clear the buffer.
+		"""
+		file.append(self.prepare(self.__buffer), self.__out)
+		self.__buffer = []
+
 # ----------------------------------------
 
 @dataclasses.dataclass
@@ -44,29 +468,257 @@ class Result:
 	response: str
 	data: str
 
-def single(cmd: list[str], out: file.SafeFile = None, data = ""):
+@dataclasses.dataclass
+class Job:
+	"""
+	Class for storing a tool invocation.\n
+	Use `stdin` attribute to specify a path to a file, or bytes, to pass to the standard input.\n
+	Use `extractors` attribute to stream the output; each chunk is appended to the output file as is, and its lines are fed to the extractors as they arrive.\n
+	The response of a streamed tool invocation is always empty.\n
+	Use `checkpoint` attribute to specify a checkpoint key under which the tool invocation is journaled once completed, see `checkpoint.Checkpoint`.\n
+	The `writer` attribute is set when the tool output is to be cached, see `cache.Cache`.
+	"""
+	cmd       : list[str]
+	out       : file.SafeFile   = None
+	data      : str             = ""
+	stdin     : str | bytes     = None
+	extractors: list[Extractor] = None
+	checkpoint: str             = ""
+	writer    : cache.Writer    = None
+
+BATCH_DIRNAME = "batches"
+"""
+Name of the subdirectory in the tools directory for temporary files containing the batched entries.
+"""
+
+@dataclasses.dataclass
+class Batch:
 	"""
-	Run a tool.
+	Class for storing batch details.\n
+	Use `size` attribute to specify the maximum number of entries per tool invocation.\n
+	Set `stdin` attribute to `True` to pass the entries to the standard input; otherwise, `run.PLACEHOLDER` is replaced with a path to a temporary file containing the entries.\n
+	The data of each result contains the entries of its tool invocation, separated by newlines; use `grep.unbatch()` to map the responses back to each entry.
 	"""
-	cmd = array.join(cmd)
-	response = subprocess.run(cmd, shell = True, stdout = subprocess.PIPE, stderr = subprocess.STDOUT).stdout
-	if response:
-		response = response.decode(file.ENCODING)
-		if out:
-			file.append(response, out)
+	size : int
+	stdin: bool = False
+
+def __finalize(cmd: str, future: concurrent.futures.Future, job: Job):
+	"""
+	Decode the response, append it to the output file - if specified, and log it.\n
+	If the output was streamed, log only the command.\n
+	If the tool invocation has completed without a timeout and a checkpoint key is specified, flush its extractors, and the stores and files it has written to, and journal it.\n
+	The tool output is cached only if the tool invocation has completed with the exit code zero, see `cache.Writer.commit()`.
+	"""
+	response = ""
+	completed = False
+	returncode = 0
+	try:
+		response = future.result().decode(file.ENCODING)
+		completed = True
+	except TimeoutExpired as ex:
+		response = ex.output.decode(file.ENCODING)
+	except CalledProcessError as ex:
+		response = ex.output.decode(file.ENCODING)
+		completed = True
+		returncode = ex.returncode
+	except Exception as ex:
+		debug.debug.log_error(f"utils.run.execute() > {cmd}", ex)
+	if job.writer:
+		if not completed or returncode:
+			job.writer.discard()
+		else:
+			job.writer.write(response.encode(file.ENCODING))
+			job.writer.commit()
+	if response and job.out:
+		file.append(response, job.out)
+	if completed and job.checkpoint:
+		__flush([job])
+		file.file.flush(__get_paths(job))
+		checkpoint.checkpoint.add(job.checkpoint, {job.data: response})
 	debug.debug.log_debug(cmd, response)
-	return Result(response, data)
+	return Result(response, job.data)
 
-def multiple(cmd: list[str], key: config.TXT, out: file.SafeFile = None, threads = 5) -> list[Result]:
+def __sink(job: Job):
 	"""
-	Run a tool multiple times.
+	Get a callback that appends a chunk of a streamed tool output to the output file - if specified, and feeds its lines to the extractors.
+	"""
+	def callback(chunk: bytes):
+		text = chunk.decode(file.ENCODING)
+		if job.out:
+			file.append_chunk(text, job.out)
+		lines = array.remove_empty_strings(text.splitlines())
+		for extractor in job.extractors:
+			extractor.feed(lines)
+	return callback
+
+def __tee(writer: cache.Writer, callback: typing.Callable[[bytes], None]):
+	"""
+	Get a callback that writes a chunk of a streamed tool output to the cache, and then passes it on.
+	"""
+	def tee(chunk: bytes):
+		writer.write(chunk)
+		callback(chunk)
+	return tee
+
+def __replay(path: str, callback: typing.Callable[[bytes], None] = None) -> concurrent.futures.Future:
+	"""
+	Replay a cached tool output.\n
+	If `callback` is specified, the output is passed to it in chunks of complete lines, the same way as a streamed tool output.
+	"""
+	future = concurrent.futures.Future()
+	try:
+		with open(path, "rb") as stream:
+			if not callback:
+				future.set_result(stream.read())
+			else:
+				buffer = b""
+				while chunk := stream.read(CHUNK_SIZE):
+					buffer += chunk
+					index = buffer.rfind(b"\n") + 1
+					if index > 0:
+						chunk, buffer = buffer[:index], buffer[index:]
+						callback(chunk)
+				if buffer:
+					callback(buffer)
+				future.set_result(b"")
+	except Exception as ex:
+		future.set_exception(ex)
+	return future
+
+def __submit(job: Job):
+	"""
+	Submit a tool invocation to the engine, or dispatch it to a worker if the work queue is enabled, see `dispatch.Queue`.\n
+	Stores whose files are referenced by the command or the standard input are flushed first, see `file.Store`.\n
+	If the tool's context specifies a cache TTL, replay the cached tool output instead if present, or otherwise, cache the tool output, see `cache.Cache`.
+	"""
+	cmd = array.join(job.cmd)
+	try:
+		context = get_context()
+		argv = split(cmd)
+		file.file.flush(argv + [job.stdin] if isinstance(job.stdin, str) else argv)
+		callback = __sink(job) if job.extractors is not None else None
+		if context.cache_ttl > 0 and cache.cache.is_enabled():
+			key = cache.get_key(argv, job.stdin, job.data, directory.directory.get_root())
+			if path := cache.cache.get(key, context.cache_ttl):
+				context.cache_hits += 1
+				return cmd, __replay(path, callback)
+			job.writer = cache.cache.writer(key)
+			if callback:
+				callback = __tee(job.writer, callback)
+		if dispatch.queue.is_enabled():
+			future = engine.submit(remote(argv, job.stdin, callback, context))
+		elif callback is None:
+			future = engine.submit(execute(argv, job.stdin, context))
+		else:
+			future = engine.submit(stream(argv, job.stdin, callback, context))
+	except Exception as ex:
+		future = concurrent.futures.Future()
+		future.set_exception(ex)
+	return cmd, future
+
+def __get_paths(job: Job):
+	"""
+	Get the paths to the output file - if specified, and to the files of the extractors of a tool invocation.
+	"""
+	tmp = [file.get_path(job.out)] if job.out else []
+	for extractor in job.extractors or []:
+		tmp.append(extractor.get_path())
+	return tmp
+
+def __flush(jobs: list[Job]):
+	"""
+	Flush the extractors of all tool invocations.
+	"""
+	extractors: dict[int, Extractor] = {}
+	for job in jobs:
+		for extractor in job.extractors or []:
+			extractors[id(extractor)] = extractor
+	for extractor in extractors.values():
+		extractor.flush()
+
+def single(cmd: list[str], out: file.SafeFile = None, data = "", stdin: str | bytes = None, extractors: list[Extractor] = None):
+	"""
+	Run a tool.\n
+	If `extractors` are specified, the output is streamed, see `run.Job`.
+	"""
+	job = Job(cmd, out, data, stdin, extractors)
+	cmd, future = __submit(job)
+	concurrent.futures.wait([future])
+	result = __finalize(cmd, future, job)
+	__flush([job])
+	return result
+
+def __progress(completed: int, total: int):
+	"""
+	Report the progress of the tool that is running in the current thread, if a callback is set, see `run.Context`.
+	"""
+	context = get_context()
+	if context.progress:
+		context.progress(completed, total)
+
+def many(jobs: list[Job], threads = 5, completed = 0) -> list[Result]:
+	"""
+	Run multiple tool invocations, at most `threads` at a time, and report the progress as they complete.\n
+	`completed` is the number of tool invocations that were already completed before, for example, restored from the journal.
 	"""
 	tmp = []
-	with concurrent.futures.ThreadPoolExecutor(max_workers = threads) as executor:
-		subprocesses = []
-		for entry in file.read(file.file.get(key)):
-			subprocesses.append(executor.submit(single, replace_placeholder(cmd, entry), out, entry))
-		for subprocess in concurrent.futures.as_completed(subprocesses):
-			result: Result = subprocess.result()
-			tmp.append(result)
+	total = completed + len(jobs)
+	pending: dict[concurrent.futures.Future, tuple[str, Job]] = {}
+	for job in jobs:
+		if len(pending) >= threads:
+			tmp.extend(__complete(pending))
+			__progress(completed + len(tmp), total)
+		cmd, future = __submit(job)
+		pending[future] = (cmd, job)
+	while pending:
+		tmp.extend(__complete(pending))
+		__progress(completed + len(tmp), total)
+	__flush(jobs)
 	return tmp
+
+def __complete(pending: dict[concurrent.futures.Future, tuple[str, Job]]) -> list[Result]:
+	"""
+	Wait for at least one tool invocation to complete, and remove the completed ones from the pending tool invocations.
+	"""
+	tmp = []
+	done, ignored = concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED)
+	for future in done:
+		cmd, job = pending.pop(future)
+		tmp.append(__finalize(cmd, future, job))
+	return tmp
+
+def multiple(cmd: list[str], key: config.TXT, out: file.SafeFile = None, threads = 5, extractors: list[Extractor] = None, batch: Batch = None) -> list[Result]:
+	"""
+	Run a tool multiple times.\n
+	Completed tool invocations are journaled, and when restoring a session, entries that were already completed are not run again, see `checkpoint.Checkpoint`.\n
+	If `extractors` are specified, the output is streamed, see `run.Job`.\n
+	If `batch` is specified, the tool is run once per batch of entries, see `run.Batch`.\n
+	If the tool's context specifies a cache TTL, the tool is run once per entry instead, so that each entry is cached on its own, see `cache.get_key()`.
+	"""
+	context = get_context()
+	name = context.name
+	checkpoint_key = checkpoint.get_key(name, [key.value])
+	journal, entries = checkpoint.checkpoint.restore(checkpoint_key, file.read(file.file.get(key)))
+	tmp = [Result(response, data) for data, response in journal.items()]
+	if journal:
+		debug.debug.log_debug(f"utils.run.multiple() > {name}", f"Restored: {len(journal)}, remaining: {len(entries)}")
+	if batch and context.cache_ttl > 0 and cache.cache.is_enabled():
+		batch = Batch(1, batch.stdin)
+	if not batch:
+		return tmp + many([Job(replace_placeholder(cmd, entry), out, entry, extractors = extractors, checkpoint = checkpoint_key) for entry in entries], threads, len(tmp))
+	jobs, paths, prefix = [], [], ("_").join(filter(None, [name, key.value]))
+	for i in range(0, len(entries), batch.size):
+		data = ("\n").join(entries[i:i + batch.size])
+		if batch.stdin:
+			jobs.append(Job(replace_placeholder(cmd), out, data, f"{data}\n".encode(file.ENCODING), extractors, checkpoint_key))
+		else:
+			directory.directory.init_tools_subdirectory(BATCH_DIRNAME)
+			path = directory.directory.init_tools_file(f"{prefix}_{i // batch.size}", "txt", BATCH_DIRNAME).path
+			file.insert(data, path)
+			paths.append(path)
+			jobs.append(Job(replace_placeholder(cmd, path), out, data, extractors = extractors, checkpoint = checkpoint_key))
+	try:
+		return tmp + many(jobs, threads, len(tmp))
+	finally:
+		for path in paths:
+			file.remove_silent(path)
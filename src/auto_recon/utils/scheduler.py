@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+from . import config, exclusion, session
+
+class Scheduler:
+
+	def __init__(self, tools: list[session.Tool], stages: list[str]):
+		"""
+		Initialize a class for scheduling tools based on their inputs and outputs.\n
+		A tool depends on a tool from a previous stage if one writes a file that the other reads, or if the tool is listed in `config.IO.after`.\n
+		Intrusive tools additionally depend on intrusive tools from previous stages, in order to preserve the intrusiveness ordering.\n
+		A tool that is not listed in `config.IO_MAPPING` depends on all tools from previous stages, and vice versa.\n
+		Completed tools, for example, when restoring a session, are not scheduled.
+		"""
+		self.__tools: dict[int, session.Tool] = {tool.identifier: tool for tool in tools if tool.status != session.Status.COMPLETED}
+		self.__order: dict[str, int] = {stage: index for index, stage in enumerate(stages)}
+		self.__dependencies: dict[int, set[int]] = {}
+		for tool in self.__tools.values():
+			self.__dependencies[tool.identifier] = {other.identifier for other in self.__tools.values() if self.__depends(tool, other)}
+		self.__submitted: set[int] = set()
+		self.__dirty: set[config.TXT | config.JSON] = set(config.ALL)
+		self.__revision = exclusion.exclusion.get_revision()
+
+	def __depends(self, tool: session.Tool, other: session.Tool):
+		"""
+		Returns `True` if `tool` depends on `other`.
+		"""
+		if self.__order[other.stage] >= self.__order[tool.stage]:
+			return False
+		tool_io, other_io = get_io(tool), get_io(other)
+		if tool_io is None or other_io is None:
+			return True
+		if other.base.name in tool_io.after:
+			return True
+		if tool_io.inputs & other_io.outputs or tool_io.outputs & other_io.inputs:
+			return True
+		if tool.base.intrusive != config.Intrusive.NOT and other.base.intrusive != config.Intrusive.NOT:
+			return True
+		return False
+
+	def get_ready(self) -> list[session.Tool]:
+		"""
+		Get tools whose dependencies are completed and which have not yet been submitted, ordered by their IDs.
+		"""
+		tmp = []
+		for identifier in sorted(self.__tools):
+			if identifier not in self.__submitted and not self.__dependencies[identifier]:
+				self.__submitted.add(identifier)
+				tmp.append(self.__tools[identifier])
+		return tmp
+
+	def get_dirty(self, tool: session.Tool) -> list[config.TXT | config.JSON]:
+		"""
+		Get the tool's inputs that were written since they were last filtered, and mark them as filtered.\n
+		All files are considered dirty if the exclusions have changed.
+		"""
+		revision = exclusion.exclusion.get_revision()
+		if revision != self.__revision:
+			self.__revision = revision
+			self.__dirty.update(config.ALL)
+		io = get_io(tool)
+		tmp = [key for key in (io.inputs if io else set()) if key in self.__dirty]
+		self.__dirty.difference_update(tmp)
+		return sorted(tmp, key = lambda key: key.value)
+
+	def complete(self, identifier: int):
+		"""
+		Mark a tool as completed, and mark its outputs as dirty.
+		"""
+		if tool := self.__tools.get(identifier):
+			io = get_io(tool)
+			self.__dirty.update(io.outputs if io else config.ALL)
+		for dependencies in self.__dependencies.values():
+			dependencies.discard(identifier)
+
+def get_io(tool: session.Tool):
+	"""
+	Get the tool's inputs and outputs.\n
+	Returns `None` if the tool is not listed in `config.IO_MAPPING`.
+	"""
+	return config.IO_MAPPING.get(tool.base.name)
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
-from . import config, debug, file, general, jquery
+from . import config, context, debug, file, general, jquery
 
-import colorama, dataclasses, enum, os, platform, tabulate, threading
+import colorama, dataclasses, enum, json, os, sys, tabulate, threading, typing, uuid
 
 class Status(str, enum.Enum):
 	"""
@@ -34,6 +34,8 @@ class Tool:
 	status    : Status = Status.PENDING
 	start     : str    = ""
 	end       : str    = ""
+	timeouts  : int    = 0
+	progress  : str    = ""
 
 @dataclasses.dataclass
 class Runtime:
@@ -44,25 +46,50 @@ class Runtime:
 	stages : list[str ] = dataclasses.field(default_factory = list)
 	tools  : list[Tool] = dataclasses.field(default_factory = list)
 
+COMPACT_EVENTS = 100
+"""
+Number of events journaled before the journal is compacted into the session file, see `session.Session`.
+"""
+
+RENDER_INTERVAL = 0.25
+"""
+Minimum number of seconds between two redraws of the session table.
+"""
+
+CLEAR_SCREEN = "\x1b[H\x1b[J"
+"""
+ANSI escape sequence that moves the cursor to the top left corner, and clears the screen.
+"""
+
 class Session:
 
 	__SESSION_FILENAME = "session.json"
+	__JOURNAL_FILENAME = "session.jsonl"
 
 	def __init__(self):
 		"""
-		Initialize a class for managing the session.
+		Initialize a class for managing the session.\n
+		Each update is appended to the journal as an event containing the tool's new state, and the journal is periodically compacted into the session file, which is replaced atomically.\n
+		A restored session is the session file with the journal replayed on top; replaying an event more than once has no effect.\n
+		The session table is redrawn by a background thread, at most once per `session.RENDER_INTERVAL`, so updates only request a redraw.
 		"""
 		self.__lock = threading.Lock()
-		self.__clear = "cls" if platform.system().lower() == "windows" else "clear"
 		self.initialize("")
 
-	def initialize(self, root_directory: str):
+	def initialize(self, root_directory: str, display = True):
 		"""
-		[Re]initialize.
+		[Re]initialize.\n
+		Set `display` to `False` to not print the session on each update, for example, when running multiple domains at once; the session is also not printed if the standard output is not a terminal.
 		"""
 		self.__root_directory: str = root_directory
+		self.__display: bool = display and sys.stdout.isatty()
+		self.__redraw = threading.Event()
+		self.__stop = threading.Event()
+		self.__renderer: threading.Thread = None
 		self.__session_file: file.SafeFile = self.__init_safe_file(self.__SESSION_FILENAME)
+		self.__journal_file: file.SafeFile = self.__init_safe_file(self.__JOURNAL_FILENAME)
 		self.__session: Runtime = None
+		self.__events = 0
 
 	def __init_safe_file(self, filename: str):
 		"""
@@ -84,6 +111,8 @@ class Session:
 				for tool in tools:
 					self.__session.tools.append(Tool(tool, identifier, stage))
 					identifier += 1
+			self.__compact()
+			self.__start()
 		except Exception as ex:
 			success = False
 			message = "Cannot create a new session"
@@ -92,7 +121,7 @@ class Session:
 
 	def restore(self):
 		"""
-		Restore the session from the session file in the config directory.
+		Restore the session from the session file in the config directory, and replay the journal.
 		"""
 		success = True
 		message = ""
@@ -103,6 +132,13 @@ class Session:
 				self.__session.tools[i].status = Status(self.__session.tools[i].status)
 				self.__session.tools[i].base = config.Tool(**self.__session.tools[i].base)
 				self.__session.tools[i].base.intrusive = config.Intrusive(self.__session.tools[i].base.intrusive)
+			for line in file.read_lines(self.__journal_file):
+				try:
+					self.__apply(json.loads(line))
+				except Exception as ex:
+					debug.debug.log_error(f"utils.session.Session().restore() > {self.__journal_file.path}", ex)
+			self.__compact()
+			self.__start()
 		except Exception as ex:
 			success = False
 			message = f'Cannot restore the session from "{self.__session_file.path}"'
@@ -115,61 +151,141 @@ class Session:
 		"""
 		return self.__session.stages
 
-	def get_stage_tools(self, stage: str) -> list[Tool]:
+	def get_tools(self) -> list[Tool]:
 		"""
-		Get pending and running tools for the specified stage.
+		Get pending and running tools.
 		"""
 		tmp = []
 		for tool in self.__session.tools:
-			if tool.stage == stage and tool.status != Status.COMPLETED:
+			if tool.status != Status.COMPLETED:
 				tmp.append(tool)
 		return tmp
 
-	def update(self, identifier: int, completed = False):
+	def update(self, identifier: int, completed = False, timeouts = 0):
+		"""
+		Update a tool's status and start/end time for the specified ID, journal it, and request a redraw of the session table.\n
+		On completion, also record the number of the tool's timed out subprocesses.
+		"""
+		now = general.get_timestamp()
+		if completed:
+			event = {"id": identifier, "status": Status.COMPLETED.value, "end": now, "timeouts": timeouts}
+		else:
+			event = {"id": identifier, "status": Status.RUNNING.value, "start": now}
+		with self.__lock:
+			self.__journal(event)
+		file.writer.flush([self.__journal_file.path])
+		self.__redraw.set()
+
+	def progress(self, identifier: int, completed: int, total: int):
+		"""
+		Update a tool's progress for the specified ID, that is, the number of its completed tool invocations out of all, journal it, and request a redraw of the session table.\n
+		Progress is not guaranteed to be journaled if the main tool is interrupted.
+		"""
+		with self.__lock:
+			self.__journal({"id": identifier, "progress": f"{completed}/{total}"})
+		self.__redraw.set()
+
+	def __apply(self, event: dict[str, typing.Any]):
+		"""
+		Apply an event to the session.
+		"""
+		tool = self.__session.tools[event["id"]]
+		for key, value in event.items():
+			if key == "status":
+				tool.status = Status(value)
+			elif key != "id":
+				setattr(tool, key, value)
+
+	def __journal(self, event: dict[str, typing.Any]):
+		"""
+		Apply an event to the session, and append it to the journal in the config directory; the event is buffered, see `file.Writer`.\n
+		Once enough events are journaled, the journal is compacted.\n
+		Must be called while holding the lock.
+		"""
+		self.__apply(event)
+		file.append(json.dumps(event), self.__journal_file)
+		self.__events += 1
+		if self.__events >= COMPACT_EVENTS:
+			self.__compact()
+
+	def __compact(self):
+		"""
+		Atomically replace the session file in the config directory with the current session, and then clear the journal.
+		"""
+		temporary = f"{self.__session_file.path}.{uuid.uuid4().hex}.tmp"
+		try:
+			file.insert(jquery.jdump(dataclasses.asdict(self.__session)), temporary)
+			os.replace(temporary, self.__session_file.path)
+			file.remove_silent(self.__journal_file.path)
+			self.__events = 0
+		except Exception as ex:
+			file.remove_silent(temporary)
+			debug.debug.log_error(f"utils.session.Session().__compact() > {self.__session_file.path}", ex)
+
+	def compact(self):
 		"""
-		Update a tool's status and start/end time for the specified ID, and then save and print the session.
+		Compact the journal into the session file in the config directory.
 		"""
 		with self.__lock:
-			now = general.get_timestamp()
-			if completed:
-				self.__session.tools[identifier].status = Status.COMPLETED
-				self.__session.tools[identifier].end = now
-			else:
-				self.__session.tools[identifier].status = Status.RUNNING
-				self.__session.tools[identifier].start = now
-			self.__save()
+			self.__compact()
+
+	def __start(self):
+		"""
+		Start the renderer, if the session is displayed.
+		"""
+		if self.__display and not self.__renderer:
+			self.__redraw.set()
+			self.__renderer = threading.Thread(target = self.__render, daemon = True)
+			self.__renderer.start()
+
+	def __render(self):
+		"""
+		Redraw the session table whenever a redraw is requested, at most once per `session.RENDER_INTERVAL`.
+		"""
+		while not self.__stop.is_set():
+			self.__redraw.wait()
+			self.__redraw.clear()
 			self.__print_as_table()
+			self.__stop.wait(RENDER_INTERVAL)
 
-	def __save(self):
+	def stop(self):
 		"""
-		Save the session to the session file in the config directory.
+		Stop the renderer, and draw the session table for the last time.
 		"""
-		file.insert(jquery.jdump(dataclasses.asdict(self.__session)), self.__session_file)
+		if self.__renderer:
+			self.__stop.set()
+			self.__redraw.set()
+			self.__renderer.join()
+			self.__renderer = None
+			self.__print_as_table()
 
 	def __print_as_table(self):
 		"""
 		Print the session in table format.
 		"""
-		headers = ["id", "stage", "tool", "status", "start", "end", "active", "intrusive"]
+		headers = ["id", "stage", "tool", "status", "start", "end", "progress", "timeouts", "active", "intrusive"]
 		tmp = []
-		for tool in self.__session.tools:
-			color = tool.status.get_color()
-			row = {
-				headers[0]: tool.identifier,
-				headers[1]: tool.stage,
-				headers[2]: tool.base.name,
-				headers[3]: tool.status.value,
-				headers[4]: tool.start,
-				headers[5]: tool.end,
-				headers[6]: "yes" if tool.base.active else "",
-				headers[7]: tool.base.intrusive.value
-			}
-			tmp.append([color + str(row[key]) + colorama.Style.RESET_ALL for key in headers])
-		os.system(self.__clear)
-		print(tabulate.tabulate(tmp, headers, tablefmt = "outline", colalign = ("right", "left", "left", "left", "left", "left", "left", "left")))
-		print(config.HEADING)
-
-session = Session()
+		with self.__lock:
+			for tool in self.__session.tools:
+				color = tool.status.get_color()
+				row = {
+					headers[0]: tool.identifier,
+					headers[1]: tool.stage,
+					headers[2]: tool.base.name,
+					headers[3]: tool.status.value,
+					headers[4]: tool.start,
+					headers[5]: tool.end,
+					headers[6]: tool.progress,
+					headers[7]: tool.timeouts or "",
+					headers[8]: "yes" if tool.base.active else "",
+					headers[9]: tool.base.intrusive.value
+				}
+				tmp.append([color + str(row[key]) + colorama.Style.RESET_ALL for key in headers])
+		table = tabulate.tabulate(tmp, headers, tablefmt = "outline", colalign = ("right", "left", "left", "left", "left", "left", "right", "right", "left", "left"))
+		sys.stdout.write(f"{CLEAR_SCREEN}{table}\n{config.HEADING}\n")
+		sys.stdout.flush()
+
+session: Session = context.Proxy("session", Session)
 """
-Singleton class instance for managing the session.
+Context-specific singleton class instance for managing the session.
 """
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+from . import debug, file, run
+
+import asyncio, dataclasses, ipaddress, os, ssl, struct
+
+HTTPS_PORT = 443
+
+CIPHER_SUITES = [
+	0xC02F, 0xC030, 0xC02B, 0xC02C, 0xCCA8, 0xCCA9, 0xC013, 0xC014, 0xC009, 0xC00A,
+	0x009C, 0x009D, 0x002F, 0x0035, 0x0033, 0x0039, 0x000A
+]
+"""
+TLS 1.2 and older cipher suites to offer in the ClientHello.
+"""
+
+SUPPORTED_GROUPS = [0x001D, 0x0017, 0x0018, 0x0019]
+
+SIGNATURE_ALGORITHMS = [0x0403, 0x0503, 0x0603, 0x0804, 0x0805, 0x0806, 0x0401, 0x0501, 0x0601, 0x0203, 0x0201]
+
+class Record:
+	"""
+	TLS record content types.
+	"""
+	ALERT     = 21
+	HANDSHAKE = 22
+
+class Message:
+	"""
+	TLS handshake message types.
+	"""
+	CLIENT_HELLO      = 1
+	SERVER_HELLO      = 2
+	CERTIFICATE       = 11
+	SERVER_HELLO_DONE = 14
+
+class Extension:
+	"""
+	TLS extension types.
+	"""
+	SERVER_NAME          = 0
+	SUPPORTED_GROUPS     = 10
+	EC_POINT_FORMATS     = 11
+	SIGNATURE_ALGORITHMS = 13
+	HEARTBEAT            = 15
+	RENEGOTIATION_INFO   = 0xFF01
+
+MAX_RECORD_SIZE = 0x4800
+"""
+Maximum size of a TLS record, including some leeway for compression and encryption overhead.
+"""
+
+@dataclasses.dataclass
+class Handshake:
+	"""
+	Class for storing the outcome of a TLS handshake.\n
+	`heartbeat` is `True` if the server echoed the heartbeat extension, while `chain` contains the peer's certificates in DER format, leaf first.
+	"""
+	heartbeat: bool        = False
+	chain    : list[bytes] = dataclasses.field(default_factory = list)
+
+# ----------------------------------------
+
+def split_address(entry: str) -> tuple[str, int]:
+	"""
+	Split an entry in the `host` or `host:port` format.\n
+	Raises an exception if the port is invalid.
+	"""
+	host, port = entry, HTTPS_PORT
+	if entry.startswith("["):
+		host, _, port = entry[1:].partition("]")
+		port = port.lstrip(":") or HTTPS_PORT
+	elif entry.count(":") == 1:
+		host, port = entry.split(":")
+	return host, int(port)
+
+def is_ip(host: str):
+	"""
+	Returns `True` if the host is an IP address.
+	"""
+	try:
+		ipaddress.ip_address(host)
+		return True
+	except ValueError:
+		return False
+
+def __extension(type: int, data: bytes) -> bytes:
+	"""
+	Encode a TLS extension.
+	"""
+	return struct.pack("!HH", type, len(data)) + data
+
+def __vector(values: list[int], size = 2) -> bytes:
+	"""
+	Encode a list of 16-bit integers, prefixed with its length in bytes.
+	"""
+	data = b"".join(struct.pack("!H", value) for value in values)
+	return len(data).to_bytes(size, "big") + data
+
+def build_client_hello(host: str) -> bytes:
+	"""
+	Build a TLS 1.2 ClientHello record that advertises the heartbeat extension.\n
+	TLS 1.3 is not offered, so that the server sends its certificates in plaintext.
+	"""
+	extensions = b""
+	if host and not is_ip(host):
+		name = host.encode("idna")
+		extensions += __extension(Extension.SERVER_NAME, struct.pack("!HBH", len(name) + 3, 0, len(name)) + name)
+	extensions += __extension(Extension.SUPPORTED_GROUPS, __vector(SUPPORTED_GROUPS))
+	extensions += __extension(Extension.EC_POINT_FORMATS, b"\x01\x00")
+	extensions += __extension(Extension.SIGNATURE_ALGORITHMS, __vector(SIGNATURE_ALGORITHMS))
+	extensions += __extension(Extension.HEARTBEAT, b"\x01")
+	extensions += __extension(Extension.RENEGOTIATION_INFO, b"\x00")
+	body = b"\x03\x03" + os.urandom(32) + b"\x00" + __vector(CIPHER_SUITES) + b"\x01\x00" + struct.pack("!H", len(extensions)) + extensions
+	message = struct.pack("!B", Message.CLIENT_HELLO) + len(body).to_bytes(3, "big") + body
+	return struct.pack("!BHH", Record.HANDSHAKE, 0x0301, len(message)) + message
+
+def parse_server_hello(body: bytes) -> bool:
+	"""
+	Parse a ServerHello message.\n
+	Returns `True` if the server echoed the heartbeat extension.
+	"""
+	offset = 2 + 32
+	offset += 1 + body[offset]
+	offset += 2 + 1
+	if offset + 2 <= len(body):
+		end = offset + 2 + struct.unpack_from("!H", body, offset)[0]
+		offset += 2
+		while offset + 4 <= end:
+			type, length = struct.unpack_from("!HH", body, offset)
+			if type == Extension.HEARTBEAT:
+				return True
+			offset += 4 + length
+	return False
+
+def parse_certificate(body: bytes) -> list[bytes]:
+	"""
+	Parse a Certificate message into a list of DER certificates.
+	"""
+	tmp = []
+	offset = 3
+	end = 3 + int.from_bytes(body[:3], "big")
+	while offset + 3 <= end:
+		length = int.from_bytes(body[offset:offset + 3], "big")
+		offset += 3
+		tmp.append(body[offset:offset + length])
+		offset += length
+	return tmp
+
+async def __read_record(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+	"""
+	Read a single TLS record.\n
+	Raises an exception on EOF or an oversized record.
+	"""
+	type, _, length = struct.unpack("!BHH", await reader.readexactly(5))
+	if length > MAX_RECORD_SIZE:
+		raise ValueError(f"Oversized TLS record: {length}")
+	return type, await reader.readexactly(length)
+
+async def __handshake(host: str, port: int) -> Handshake:
+	"""
+	Send a TLS 1.2 ClientHello, and read the server's plaintext handshake messages up to the ServerHelloDone.\n
+	Returns `None` if the server did not send any certificates, for example, if it supports only TLS 1.3.
+	"""
+	tmp = Handshake()
+	reader, writer = await asyncio.open_connection(host, port)
+	try:
+		writer.write(build_client_hello(host))
+		await writer.drain()
+		buffer = b""
+		done = False
+		while not done:
+			type, data = await __read_record(reader)
+			if type != Record.HANDSHAKE:
+				break
+			buffer += data
+			while len(buffer) >= 4 and len(buffer) >= 4 + (length := int.from_bytes(buffer[1:4], "big")):
+				message, body, buffer = buffer[0], buffer[4:4 + length], buffer[4 + length:]
+				if message == Message.SERVER_HELLO:
+					tmp.heartbeat = parse_server_hello(body)
+				elif message == Message.CERTIFICATE:
+					tmp.chain = parse_certificate(body)
+				elif message == Message.SERVER_HELLO_DONE:
+					done = True
+					break
+	except (asyncio.IncompleteReadError, IndexError, struct.error, ValueError):
+		pass
+	finally:
+		writer.close()
+	return tmp if tmp.chain else None
+
+async def __handshake_ssl(host: str, port: int) -> Handshake:
+	"""
+	Perform a full TLS handshake using the `ssl` module, without certificate verification.\n
+	Only the leaf certificate is available, unless the `ssl` module supports `get_unverified_chain()`.
+	"""
+	context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+	context.check_hostname = False
+	context.verify_mode = ssl.CERT_NONE
+	_, writer = await asyncio.open_connection(host, port, ssl = context, server_hostname = None if is_ip(host) else host)
+	try:
+		connection: ssl.SSLObject = writer.get_extra_info("ssl_object")
+		chain = [cert for cert in getattr(connection, "get_unverified_chain", list)() or [] if isinstance(cert, bytes)]
+		if not chain and (cert := connection.getpeercert(binary_form = True)):
+			chain = [cert]
+	finally:
+		writer.close()
+	return Handshake(chain = chain)
+
+async def collect(entry: str, timeout: float) -> Handshake | None:
+	"""
+	Collect the certificate chain and the heartbeat extension support from a single TLS handshake.\n
+	If the server does not complete a TLS 1.2 handshake, fall back to the `ssl` module.\n
+	Returns `None` on failure.
+	"""
+	tmp = None
+	try:
+		host, port = split_address(entry)
+		tmp = await asyncio.wait_for(__handshake(host, port), timeout)
+		if not tmp:
+			tmp = await asyncio.wait_for(__handshake_ssl(host, port), timeout)
+	except (asyncio.TimeoutError, OSError, ssl.SSLError, ValueError):
+		pass
+	return tmp
+
+async def __collect_all(entries: list[str], threads: int, timeout: float) -> dict[str, Handshake]:
+	"""
+	Collect handshakes from all entries using a fixed number of concurrent workers.
+	"""
+	tmp = {}
+	iterator = iter(entries)
+	async def worker():
+		for entry in iterator:
+			if handshake := await collect(entry, timeout):
+				tmp[entry] = handshake
+	await asyncio.gather(*[worker() for _ in range(max(1, min(threads, len(entries))))])
+	return tmp
+
+def collect_all(entries: list[str], threads = 5, timeout = 10, out: file.SafeFile = None) -> dict[str, Handshake]:
+	"""
+	Collect handshakes from all entries in the `host` or `host:port` format, in parallel, without spawning any subprocesses.\n
+	Entries whose handshake failed are omitted.\n
+	If `out` is specified, a summary of each handshake is appended to it.
+	"""
+	tmp = {}
+	try:
+		tmp = run.engine.run(__collect_all(entries, threads, timeout))
+		if out:
+			file.append([f"{entry} heartbeat={str(handshake.heartbeat).lower()} certificates={len(handshake.chain)}" for entry, handshake in tmp.items()], out)
+		debug.debug.log_debug("utils.tls.collect_all()", f"Connected: {len(entries)}, collected: {len(tmp)}")
+	except Exception as ex:
+		debug.debug.log_error("utils.tls.collect_all()", ex)
+	return tmp
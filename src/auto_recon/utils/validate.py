@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from . import config, directory, file, general, url
+from . import array, config, directory, file, general, run, url
 
 import argparse, os, sys
 
@@ -11,12 +11,21 @@ class MyArgParser(argparse.ArgumentParser):
 		print("")
 		print("Usage:   auto-recon -d domain      -o out     [-s subdomains    ] [-r resolvers    ] [-w wordlist    ]")
 		print("Example: auto-recon -d example.com -o results [-s subdomains.txt] [-r resolvers.txt] [-w wordlist.txt]")
+		print("Example: auto-recon -D domains.txt -o results [-s subdomains.txt] [-r resolvers.txt] [-w wordlist.txt]")
 		print("")
 		print("DESCRIPTION")
 		print("    Not another auto-reconnaissance framework")
 		print("DOMAIN")
 		print("    Fully qualified domain name to search")
 		print("    -d, --domain = example.com | etc.")
+		print("DOMAINS")
+		print("    File containing fully qualified domain names to search at once, in a single process")
+		print("    Each domain is stored in its own subdirectory of the output directory")
+		print("    -D, --domains = domains.txt | etc.")
+		print("PARALLEL DOMAINS")
+		print("    Number of domains to search in parallel")
+		print("    Default: 5")
+		print("    -pd, --parallel-domains = 10 | etc.")
 		print("EXCLUSIONS")
 		print("    File containing [wildcard] domains, subdomains, and IPs to exclude from the scope")
 		print("    If restoring a session, the exclusions file from the output directory has priority over the specified file")
@@ -38,9 +47,47 @@ class MyArgParser(argparse.ArgumentParser):
 		print("    Collaborator URL")
 		print("    -c, --collaborator = https://xyz.interact.sh | https://xyz.burpcollaborator.net | etc.")
 		print("THREADS")
-		print("    Number of parallel tools to run per stage")
+		print("    Number of parallel tools to run")
 		print("    Default: 5")
 		print("    -th, --threads = 10 | etc.")
+		print("MAX PROCESSES")
+		print("    Maximum number of concurrent subprocesses across all tools")
+		print(f"    Default: {run.MAX_PROCESSES}")
+		print("    -mp, --max-processes = 100 | etc.")
+		print("INVOCATION TIMEOUT")
+		print("    Maximum number of seconds a single tool invocation may run before it is killed")
+		print("    Tools with their own invocation timeout keep it")
+		print("    Default: 0 (unlimited)")
+		print("    -it, --invocation-timeout = 10800 | etc.")
+		print("TOOL TIMEOUT")
+		print("    Maximum number of seconds all tool invocations of a single tool may run in total")
+		print("    Tools with their own tool timeout keep it")
+		print("    Default: 0 (unlimited)")
+		print("    -tt, --tool-timeout = 28800 | etc.")
+		print("NO CACHE")
+		print("    Do not read or write the cache of tool outputs")
+		print("    -nc, --no-cache")
+		print("REFRESH CACHE")
+		print("    Do not read the cache of tool outputs, but overwrite it with new outputs")
+		print("    -rc, --refresh-cache")
+		print("QUEUE")
+		print("    Directory shared with workers on other hosts, for example, over NFS, to dispatch tool invocations to")
+		print("    Start workers with: auto-recon-worker -q queue")
+		print("    -q, --queue = queue | etc.")
+		print("DATABASE")
+		print("    SQLite database to record results in, alongside the TXT and JSON files")
+		print("    Share it across runs to query results across runs and domains")
+		print("    -db, --database = results.db | etc.")
+		print("EXPORT")
+		print("    Directory to generate the TXT and JSON files of each domain from the database to, once the run completes")
+		print("    Each domain is exported to its own subdirectory")
+		print("    Requires the database")
+		print("    -ex, --export = export | etc.")
+		print("COMPRESS")
+		print("    Compress each tool's files in the tools directory once the tool completes, and the logs once the run completes")
+		print("    Compressed files are decompressed transparently when read")
+		print("    zstd requires the zstandard package")
+		print("    -z, --compress = gzip | zstd")
 		print("OUT")
 		print("    Output directory")
 		print("    -o, --out = results | etc.")
@@ -50,7 +97,7 @@ class MyArgParser(argparse.ArgumentParser):
 
 	def error(self, message: str):
 		if len(sys.argv) > 1:
-			print("Missing a mandatory option (-d, -o) and/or optional (-e, -nf, -s, -r, -w, -c, -th, -rs)")
+			print("Missing a mandatory option (-d or -D, -o) and/or optional (-pd, -e, -nf, -s, -r, -w, -c, -th, -mp, -it, -tt, -nc, -rc, -q, -db, -ex, -z, -rs)")
 			print("Use -h or --help for more info")
 		else:
 			self.print_help()
@@ -63,16 +110,27 @@ class Validate:
 		Initialize a class for validating and managing CLI arguments.
 		"""
 		self.__parser = MyArgParser()
-		self.__parser.add_argument("-d" , "--domain"         , required = True , type   = str         , default = ""   )
-		self.__parser.add_argument("-e" , "--exclusions"     , required = False, type   = str         , default = ""   )
-		self.__parser.add_argument("-nf", "--no-filtering"   , required = False, action = "store_true", default = False)
-		self.__parser.add_argument("-s" , "--subdomains"     , required = False, type   = str         , default = ""   )
-		self.__parser.add_argument("-r" , "--resolvers"      , required = False, type   = str         , default = ""   )
-		self.__parser.add_argument("-w" , "--wordlist"       , required = False, type   = str         , default = ""   )
-		self.__parser.add_argument("-c" , "--collaborator"   , required = False, type   = str         , default = ""   )
-		self.__parser.add_argument("-th", "--threads"        , required = False, type   = str         , default = ""   )
-		self.__parser.add_argument("-o" , "--out"            , required = True , type   = str         , default = ""   )
-		self.__parser.add_argument("-rs", "--restore-session", required = False, action = "store_true", default = False)
+		self.__parser.add_argument("-d" , "--domain"            , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-D" , "--domains"           , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-pd", "--parallel-domains"  , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-e" , "--exclusions"        , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-nf", "--no-filtering"      , required = False, action = "store_true", default = False)
+		self.__parser.add_argument("-s" , "--subdomains"        , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-r" , "--resolvers"         , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-w" , "--wordlist"          , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-c" , "--collaborator"      , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-th", "--threads"           , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-mp", "--max-processes"     , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-it", "--invocation-timeout", required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-tt", "--tool-timeout"      , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-nc", "--no-cache"          , required = False, action = "store_true", default = False)
+		self.__parser.add_argument("-rc", "--refresh-cache"     , required = False, action = "store_true", default = False)
+		self.__parser.add_argument("-q" , "--queue"             , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-db", "--database"          , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-ex", "--export"            , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-z" , "--compress"          , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-o" , "--out"               , required = True , type   = str         , default = ""   )
+		self.__parser.add_argument("-rs", "--restore-session"   , required = False, action = "store_true", default = False)
 
 	def validate_args(self) -> tuple[bool, argparse.Namespace]:
 		"""
@@ -81,12 +139,20 @@ class Validate:
 		self.__success = True
 		self.__args = self.__parser.parse_args()
 		self.__validate_domain()
+		self.__validate_parallel_domains()
 		self.__validate_exclusions()
 		self.__validate_subdomains()
 		self.__validate_resolvers()
 		self.__validate_wordlist()
 		self.__validate_collaborator()
 		self.__validate_threads()
+		self.__validate_max_processes()
+		self.__validate_invocation_timeout()
+		self.__validate_tool_timeout()
+		self.__validate_queue()
+		self.__validate_database()
+		self.__validate_export()
+		self.__validate_compress()
 		self.__validate_out()
 		return self.__success, self.__args
 
@@ -101,11 +167,40 @@ class Validate:
 
 	def __validate_domain(self):
 		"""
-		Validate a domain name.
+		Validate a domain name, or a file containing domain names.
+		"""
+		if not self.__args.domain and not self.__args.domains:
+			self.__error("Either a domain name or a file containing domain names is required")
+		elif self.__args.domain and self.__args.domains:
+			self.__error("A domain name and a file containing domain names cannot be used together")
+		elif self.__args.domain:
+			tmp = url.extract_fqdn(self.__args.domain)
+			if not tmp:
+				self.__error(f"Invalid domain name: {self.__args.domain}")
+			self.__args.domains = []
+		else:
+			success, message = file.validate(self.__args.domains)
+			if not success:
+				self.__error(message)
+			else:
+				self.__args.domains = array.unique(file.read(self.__args.domains), sort = False)
+				for domain in self.__args.domains:
+					if not url.extract_fqdn(domain):
+						self.__error(f"Invalid domain name: {domain}")
+
+	def __validate_parallel_domains(self):
+		"""
+		Validate a number of domains to search in parallel.
 		"""
-		tmp = url.extract_fqdn(self.__args.domain)
-		if not tmp:
-			self.__error(f"Invalid domain name: {self.__args.domain}")
+		tmp = 5
+		if self.__args.parallel_domains:
+			if not self.__args.parallel_domains.isdigit():
+				self.__error("Number of domains to search in parallel must be numeric")
+			else:
+				tmp = int(self.__args.parallel_domains)
+				if tmp <= 0:
+					self.__error("Number of domains to search in parallel must be greater than zero")
+		self.__args.parallel_domains = tmp
 
 	def __validate_exclusions(self):
 		"""
@@ -174,6 +269,87 @@ class Validate:
 					self.__error("Number of parallel tools to run must be greater than zero")
 		self.__args.threads = tmp
 
+	def __validate_max_processes(self):
+		"""
+		Validate a maximum number of concurrent subprocesses.
+		"""
+		tmp = run.MAX_PROCESSES
+		if self.__args.max_processes:
+			if not self.__args.max_processes.isdigit():
+				self.__error("Maximum number of concurrent subprocesses must be numeric")
+			else:
+				tmp = int(self.__args.max_processes)
+				if tmp <= 0:
+					self.__error("Maximum number of concurrent subprocesses must be greater than zero")
+		self.__args.max_processes = tmp
+
+	def __validate_invocation_timeout(self):
+		"""
+		Validate a number of seconds a single tool invocation may run.
+		"""
+		tmp = config.TIMEOUT_INVOCATION
+		if self.__args.invocation_timeout:
+			if not self.__args.invocation_timeout.isdigit():
+				self.__error("Invocation timeout must be numeric")
+			else:
+				tmp = int(self.__args.invocation_timeout)
+		self.__args.invocation_timeout = tmp
+
+	def __validate_tool_timeout(self):
+		"""
+		Validate a number of seconds all tool invocations of a single tool may run in total.
+		"""
+		tmp = config.TIMEOUT_TOOL
+		if self.__args.tool_timeout:
+			if not self.__args.tool_timeout.isdigit():
+				self.__error("Tool timeout must be numeric")
+			else:
+				tmp = int(self.__args.tool_timeout)
+		self.__args.tool_timeout = tmp
+
+	def __validate_queue(self):
+		"""
+		Validate a queue directory.
+		"""
+		if self.__args.queue:
+			if os.path.exists(self.__args.queue) and not os.path.isdir(self.__args.queue):
+				self.__error(f'"{self.__args.queue}" is not a directory')
+			else:
+				self.__args.queue = os.path.abspath(self.__args.queue)
+
+	def __validate_database(self):
+		"""
+		Validate an SQLite database.
+		"""
+		if self.__args.database:
+			if os.path.isdir(self.__args.database):
+				self.__error(f'"{self.__args.database}" is a directory')
+			else:
+				self.__args.database = os.path.abspath(self.__args.database)
+
+	def __validate_export(self):
+		"""
+		Validate an export directory.
+		"""
+		if self.__args.export:
+			if not self.__args.database:
+				self.__error("Export directory requires the database")
+			elif os.path.exists(self.__args.export) and not os.path.isdir(self.__args.export):
+				self.__error(f'"{self.__args.export}" is not a directory')
+			else:
+				self.__args.export = os.path.abspath(self.__args.export)
+
+	def __validate_compress(self):
+		"""
+		Validate a compression format.
+		"""
+		if self.__args.compress:
+			self.__args.compress = self.__args.compress.lower()
+			if self.__args.compress not in file.COMPRESSIONS:
+				self.__error(f"Compression format must be one of: {(', ').join(file.COMPRESSIONS)}")
+			elif self.__args.compress == "zstd" and not file.zstandard:
+				self.__error('Compression format "zstd" requires the zstandard package')
+
 	def __validate_out(self):
 		"""
 		Validate an output directory.
@@ -196,3 +372,83 @@ class Validate:
 					self.__error(message)
 				else:
 					self.__args.out = os.path.abspath(self.__args.out)
+
+# ----------------------------------------
+
+class MyWorkerArgParser(argparse.ArgumentParser):
+
+	def print_help(self):
+		print(config.HEADING)
+		print("")
+		print("Usage:   auto-recon-worker -q queue      [-th threads]")
+		print("Example: auto-recon-worker -q /mnt/queue [-th 10     ]")
+		print("")
+		print("DESCRIPTION")
+		print("    Claim and run tool invocations dispatched by auto-recon through a shared queue directory")
+		print("QUEUE")
+		print("    Directory shared with the coordinator, for example, over NFS")
+		print("    -q, --queue = queue | etc.")
+		print("THREADS")
+		print("    Number of work items to run in parallel")
+		print("    Default: 5")
+		print("    -th, --threads = 10 | etc.")
+
+	def error(self, message: str):
+		if len(sys.argv) > 1:
+			print("Missing a mandatory option (-q) and/or optional (-th)")
+			print("Use -h or --help for more info")
+		else:
+			self.print_help()
+		exit()
+
+class ValidateWorker:
+
+	def __init__(self):
+		"""
+		Initialize a class for validating and managing the worker's CLI arguments.
+		"""
+		self.__parser = MyWorkerArgParser()
+		self.__parser.add_argument("-q" , "--queue"  , required = True , type = str, default = "")
+		self.__parser.add_argument("-th", "--threads", required = False, type = str, default = "")
+
+	def validate_args(self) -> tuple[bool, argparse.Namespace]:
+		"""
+		Validate and return the worker's CLI arguments.
+		"""
+		self.__success = True
+		self.__args = self.__parser.parse_args()
+		self.__validate_queue()
+		self.__validate_threads()
+		return self.__success, self.__args
+
+	def __error(self, message: str):
+		"""
+		Set the success flag to `False` to prevent the worker from starting, and print an error message.
+		"""
+		self.__success = False
+		general.print_error(message)
+
+	# ------------------------------------
+
+	def __validate_queue(self):
+		"""
+		Validate a queue directory.
+		"""
+		if os.path.exists(self.__args.queue) and not os.path.isdir(self.__args.queue):
+			self.__error(f'"{self.__args.queue}" is not a directory')
+		else:
+			self.__args.queue = os.path.abspath(self.__args.queue)
+
+	def __validate_threads(self):
+		"""
+		Validate a number of work items to run in parallel.
+		"""
+		tmp = 5
+		if self.__args.threads:
+			if not self.__args.threads.isdigit():
+				self.__error("Number of work items to run in parallel must be numeric")
+			else:
+				tmp = int(self.__args.threads)
+				if tmp <= 0:
+					self.__error("Number of work items to run in parallel must be greater than zero")
+		self.__args.threads = tmp
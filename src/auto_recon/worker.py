@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+from .utils import config, directory, dispatch, general, run, validate
+
+import concurrent.futures, contextvars, os, shutil, tempfile, threading
+
+def snapshot(root_directory: str) -> dict[str, tuple[int, int]]:
+	"""
+	Get the size and the modification time of each file in a directory, recursively.
+	"""
+	tmp = {}
+	for path, directories, files in os.walk(root_directory):
+		for filename in files:
+			current = os.path.join(path, filename)
+			stat = os.stat(current)
+			tmp[current] = (stat.st_size, stat.st_mtime_ns)
+	return tmp
+
+def collect(root_directory: str, before: dict[str, tuple[int, int]], out: str):
+	"""
+	Move the files that were created or modified since the snapshot into the output directory, keeping their paths relative to the root directory.
+	"""
+	for current, stat in snapshot(root_directory).items():
+		if before.get(current) != stat:
+			destination = os.path.join(out, os.path.relpath(current, root_directory))
+			os.makedirs(os.path.dirname(destination), exist_ok = True)
+			shutil.move(current, destination)
+
+def process(item: dispatch.Item):
+	"""
+	Run a work item in a scratch directory, renew its lease while it runs, and return the output and the files it has written.
+	"""
+	scratch = tempfile.mkdtemp(prefix = f"{config.APP_NAME}-")
+	try:
+		root = os.path.join(scratch, "root")
+		shutil.copytree(dispatch.queue.get_root(item), root)
+		directory.directory.bind().initialize(root)
+		before = snapshot(root)
+		argv = [arg.replace(dispatch.ROOT_PLACEHOLDER, root) for arg in item.argv]
+		timed_out = False
+		error = ""
+		returncode = 0
+		with open(dispatch.queue.get_output(item), "wb") as stream:
+			future = run.engine.submit(run.stream(argv, item.stdin, stream.write, run.Context(timeout = item.timeout or 0)))
+			while not concurrent.futures.wait([future], timeout = dispatch.LEASE / 3).done:
+				try:
+					dispatch.queue.renew(item.id)
+				except FileNotFoundError:
+					pass
+			try:
+				future.result()
+			except run.TimeoutExpired:
+				timed_out = True
+			except run.CalledProcessError as ex:
+				returncode = ex.returncode
+			except Exception as ex:
+				error = str(ex)
+		files = os.path.join(scratch, "files")
+		collect(root, before, files)
+		dispatch.queue.complete(item, files, timed_out, error, returncode)
+		print(f"{item.id}: {'timed out' if timed_out else 'failed' if error else f'exited with {returncode}' if returncode else 'done'}")
+	finally:
+		shutil.rmtree(scratch, ignore_errors = True)
+
+def fail(item: dispatch.Item, error: Exception):
+	"""
+	Mark a work item that could not be run as done, so that the coordinator gets a result instead of waiting for the lease to expire.
+	"""
+	general.print_error(f"{item.id}: {error}")
+	try:
+		dispatch.queue.complete(item, error = str(error) or error.__class__.__name__)
+	except Exception as ex:
+		general.print_error(f"{item.id}: {ex}")
+
+def work(stop: threading.Event):
+	"""
+	Claim and run work items until stopped.\n
+	If a work item fails, the worker moves on to the next one, see `fail()`.
+	"""
+	while not stop.is_set():
+		item = None
+		try:
+			if item := dispatch.queue.claim():
+				contextvars.copy_context().run(process, item)
+			else:
+				stop.wait(dispatch.POLL_INTERVAL)
+		except Exception as ex:
+			if item:
+				fail(item, ex)
+			else:
+				general.print_error(ex)
+				stop.wait(dispatch.POLL_INTERVAL)
+
+# ----------------------------------------
+
+def main():
+	success, args = validate.ValidateWorker().validate_args()
+	if not success:
+		return
+	dispatch.queue.initialize(args.queue)
+	run.engine.set_limit(args.threads)
+	print(f"Waiting for work items in {args.queue}, press CTRL + C to stop")
+	stop = threading.Event()
+	threads = [threading.Thread(target = work, args = (stop,), daemon = True) for _ in range(args.threads)]
+	for thread in threads:
+		thread.start()
+	try:
+		while any(thread.is_alive() for thread in threads):
+			threads[0].join(1)
+	except KeyboardInterrupt:
+		stop.set()
+		run.engine.kill_all()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+from auto_recon import worker
+from auto_recon.utils import directory, dispatch, run
+
+import pytest, threading
+
+TIMEOUT = 30
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+	monkeypatch.setattr(dispatch, "POLL_INTERVAL", 0.1)
+	dispatch.queue.initialize(str(tmp_path / "queue"))
+	stop = threading.Event()
+	def start(count: int):
+		for _ in range(count):
+			threading.Thread(target = worker.work, args = (stop,), daemon = True).start()
+	yield start
+	stop.set()
+	dispatch.queue.initialize("")
+
+@pytest.fixture
+def root(tmp_path):
+	tmp = tmp_path / "root"
+	tmp.mkdir()
+	directory.directory.bind().initialize(str(tmp))
+	return tmp
+
+def remote(argv: list[str]):
+	return run.engine.submit(run.remote(argv, context = run.Context(timeout = TIMEOUT)))
+
+def test_items_complete_on_multiple_workers(workers, root, tmp_path):
+	workers(3)
+	wordlist = tmp_path / "wordlist.txt"
+	wordlist.write_text("shared\n")
+	futures = []
+	for i in range(6):
+		(root / f"in_{i}.txt").write_text(f"entry {i}\n")
+		futures.append(remote(["sh", "-c", 'cat "$1" "${3#-w=}" > "${2#--out=}" && echo done', "sh", str(root / f"in_{i}.txt"), f"--out={root}/tools/out_{i}.txt", f"-w={wordlist}"]))
+	for i, future in enumerate(futures):
+		assert future.result(TIMEOUT) == b"done\n"
+		assert (root / "tools" / f"out_{i}.txt").read_text() == f"entry {i}\nshared\n"
+
+def test_failed_item_does_not_stop_the_worker(workers, root, monkeypatch):
+	process = worker.process
+	failures = []
+	def fail_once(item: dispatch.Item):
+		if not failures:
+			failures.append(item.id)
+			raise OSError("Cannot copy the root directory")
+		process(item)
+	monkeypatch.setattr(worker, "process", fail_once)
+	workers(1)
+	with pytest.raises(RuntimeError, match = "Cannot copy the root directory"):
+		remote(["echo", "first"]).result(TIMEOUT)
+	assert remote(["echo", "second"]).result(TIMEOUT) == b"second\n"
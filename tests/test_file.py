@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+from auto_recon.utils import jquery, file
+
+import pytest
+
+COMPRESSIONS = ["gzip"] + (["zstd"] if file.zstandard else [])
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_rerun_supersedes_compressed_output(tmp_path, compression):
+	path = str(tmp_path / "out.json")
+	file.insert(jquery.jdump([{"a": 1}]), path)
+	file.compress(path, compression)
+	assert file.is_compressed(path)
+	assert jquery.jload(path) == [{"a": 1}]
+	file.insert(jquery.jdump([{"b": 2}]), path)
+	assert not file.is_compressed(path)
+	assert jquery.jload(path) == [{"b": 2}]
+	file.compress(path, compression)
+	assert jquery.jload(path) == [{"b": 2}]
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_append_keeps_compressed_lines(tmp_path, compression):
+	path = str(tmp_path / "debug.log")
+	file.insert("first", path)
+	file.compress(path, compression, append = True)
+	file.insert("second", path)
+	file.compress(path, compression, append = True)
+	assert file.read(path) == ["first", "second"]
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+
+from auto_recon.utils import jquery, file, grep
+
+import pytest
+
+@pytest.mark.parametrize("text, query", [
+	("café\nCAFÉ\nnaïve résumé\n", r"caf\w"),
+	("café\nCAFÉ\nnaïve résumé\n", r"\b\w+\b"),
+	("café\nCAFÉ\nnaïve résumé\n", r"café"),
+	("www.example.com\nWWW.EXAMPLE.COM\n", r"\bwww\.\w+\.com\b")
+])
+def test_mmap_matches_str(tmp_path, text, query):
+	path = str(tmp_path / "text.txt")
+	with open(path, "w", encoding = "utf-8") as stream:
+		stream.write(text)
+	with file.read_mmap(path) as buffer:
+		assert buffer
+		assert grep.find(buffer, query) == grep.find(file.read(path, array = False), query)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+from auto_recon.utils import checkpoint, config, resolver
+
+import asyncio, pytest, struct, threading
+
+RECORDS = {
+	"a.test"  : [(config.DNS.A, b"\x01\x02\x03\x04")],
+	"big.test": [(config.DNS.A, b"\x05\x06\x07\x08")],
+	"srv.test": [(config.DNS.SRV, struct.pack("!HHH", 10, 60, 5060) + b"\x03sip\x04test\x00"), (config.DNS.SRV, struct.pack("!HHH", 0, 0, 0) + b"\x00")],
+	"txt.test": [(config.DNS.TXT, b"\x05v=spf\x0c1 -all split")]
+}
+
+def respond(query: bytes, tcp: bool) -> bytes | None:
+	"""
+	Build a response to a DNS query; `nx.test` does not exist, `slow.test` is never answered, and `big.test` is truncated over UDP.
+	"""
+	identifier, = struct.unpack_from("!H", query)
+	offset, labels = 12, []
+	while length := query[offset]:
+		labels.append(query[offset + 1:offset + 1 + length].decode())
+		offset += 1 + length
+	name, question = (".").join(labels), query[12:offset + 5]
+	if name == "slow.test":
+		return None
+	flags, answers = 0x8180, []
+	if name == "nx.test":
+		flags |= 3
+	elif name == "big.test" and not tcp:
+		flags |= resolver.FLAG_TRUNCATED
+	else:
+		answers = RECORDS.get(name, [])
+	response = struct.pack("!HHHHHH", identifier, flags, 1, len(answers), 0, 0) + question
+	for type, data in answers:
+		response += struct.pack("!HHHIH", 0xC00C, resolver.TYPE[type], resolver.CLASS_IN, 60, len(data)) + data
+	return response
+
+class Stub(asyncio.DatagramProtocol):
+
+	def connection_made(self, transport: asyncio.DatagramTransport):
+		self.transport = transport
+
+	def datagram_received(self, data: bytes, address: tuple):
+		if response := respond(data, False):
+			self.transport.sendto(response, address)
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+	length, = struct.unpack("!H", await reader.readexactly(2))
+	if response := respond(await reader.readexactly(length), True):
+		writer.write(struct.pack("!H", len(response)) + response)
+		await writer.drain()
+	writer.close()
+
+@pytest.fixture
+def server():
+	loop = asyncio.new_event_loop()
+	threading.Thread(target = loop.run_forever, daemon = True).start()
+	async def start():
+		transport, ignored = await loop.create_datagram_endpoint(Stub, local_addr = ("127.0.0.1", 0))
+		port = transport.get_extra_info("sockname")[1]
+		return transport, await asyncio.start_server(handle, "127.0.0.1", port), port
+	transport, tcp, port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+	yield port
+	loop.call_soon_threadsafe(transport.close)
+	loop.call_soon_threadsafe(tcp.close)
+	loop.call_soon_threadsafe(loop.stop)
+
+@pytest.fixture
+def stub_resolver(tmp_path, server):
+	(tmp_path / config.Directory.CONFIG.value).mkdir()
+	checkpoint.checkpoint.bind().initialize(str(tmp_path))
+	resolvers = tmp_path / "resolvers.txt"
+	resolvers.write_text(f"127.0.0.1:{server}\n")
+	tmp = resolver.Resolver()
+	tmp.initialize(str(resolvers))
+	return tmp
+
+def test_noerror(stub_resolver: resolver.Resolver):
+	assert stub_resolver.resolve(["a.test"], config.DNS.A, timeout = 1, retries = 0) == {"a.test": resolver.Answer("NOERROR", ["1.2.3.4"])}
+
+def test_nxdomain(stub_resolver: resolver.Resolver):
+	assert stub_resolver.resolve(["nx.test"], config.DNS.A, timeout = 1, retries = 0) == {"nx.test": resolver.Answer("NXDOMAIN", [])}
+
+def test_timeout(stub_resolver: resolver.Resolver):
+	assert stub_resolver.resolve(["slow.test", "a.test"], config.DNS.A, timeout = 0.5, retries = 1) == {"a.test": resolver.Answer("NOERROR", ["1.2.3.4"])}
+
+def test_truncated_retries_over_tcp(stub_resolver: resolver.Resolver):
+	assert stub_resolver.resolve(["big.test"], config.DNS.A, timeout = 1, retries = 0) == {"big.test": resolver.Answer("NOERROR", ["5.6.7.8"])}
+
+def test_srv(stub_resolver: resolver.Resolver):
+	assert stub_resolver.resolve(["srv.test"], config.DNS.SRV, timeout = 1, retries = 0) == {"srv.test": resolver.Answer("NOERROR", ["sip.test:5060"])}
+
+def test_txt_multiple_strings(stub_resolver: resolver.Resolver):
+	assert stub_resolver.resolve(["txt.test"], config.DNS.TXT, timeout = 1, retries = 0) == {"txt.test": resolver.Answer("NOERROR", ["v=spf1 -all split"])}
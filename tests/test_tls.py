@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+from auto_recon.utils import tls
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+import datetime, pytest, socket, ssl, struct, threading
+
+def issue(name: str, issuer: tuple[x509.Certificate, ec.EllipticCurvePrivateKey] = None) -> tuple[x509.Certificate, ec.EllipticCurvePrivateKey]:
+	"""
+	Issue a certificate signed by the issuer, or a self-signed CA certificate if no issuer is specified.
+	"""
+	key = ec.generate_private_key(ec.SECP256R1())
+	subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)])
+	now = datetime.datetime.now(datetime.timezone.utc)
+	builder = x509.CertificateBuilder().subject_name(subject).public_key(key.public_key()).serial_number(x509.random_serial_number())
+	builder = builder.not_valid_before(now - datetime.timedelta(days = 1)).not_valid_after(now + datetime.timedelta(days = 1))
+	if issuer:
+		builder = builder.issuer_name(issuer[0].subject).add_extension(x509.SubjectAlternativeName([x509.DNSName(name)]), critical = False)
+	else:
+		builder = builder.issuer_name(subject).add_extension(x509.BasicConstraints(ca = True, path_length = None), critical = True)
+	return builder.sign(issuer[1] if issuer else key, hashes.SHA256()), key
+
+@pytest.fixture(scope = "module")
+def chain(tmp_path_factory) -> tuple[str, str, list[bytes]]:
+	ca = issue("Test CA")
+	leaf, key = issue("localhost", ca)
+	directory = tmp_path_factory.mktemp("certificates")
+	certificates, private_key = directory / "chain.pem", directory / "key.pem"
+	certificates.write_bytes(leaf.public_bytes(serialization.Encoding.PEM) + ca[0].public_bytes(serialization.Encoding.PEM))
+	private_key.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+	return str(certificates), str(private_key), [leaf.public_bytes(serialization.Encoding.DER), ca[0].public_bytes(serialization.Encoding.DER)]
+
+def serve(handler) -> socket.socket:
+	"""
+	Accept connections on a random local port, and handle each in its own thread.
+	"""
+	listener = socket.create_server(("127.0.0.1", 0))
+	def accept():
+		while True:
+			try:
+				connection, ignored = listener.accept()
+			except OSError:
+				return
+			threading.Thread(target = handler, args = (connection,), daemon = True).start()
+	threading.Thread(target = accept, daemon = True).start()
+	return listener
+
+def serve_ssl(chain: tuple[str, str, list[bytes]], version: ssl.TLSVersion) -> socket.socket:
+	"""
+	Run a TLS server that supports only the specified TLS version.
+	"""
+	context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+	context.load_cert_chain(chain[0], chain[1])
+	context.minimum_version = context.maximum_version = version
+	def handle(connection: socket.socket):
+		with connection:
+			try:
+				with context.wrap_socket(connection, server_side = True) as stream:
+					stream.recv(1)
+			except (OSError, ssl.SSLError):
+				pass
+	return serve(handle)
+
+def serve_heartbeat(leaf: bytes) -> socket.socket:
+	"""
+	Run a fake TLS 1.2 server that echoes the heartbeat extension, sends its certificate, and stops at the ServerHelloDone.
+	"""
+	def message(type: int, body: bytes):
+		return struct.pack("!B", type) + len(body).to_bytes(3, "big") + body
+	extensions = struct.pack("!HHB", tls.Extension.HEARTBEAT, 1, 1)
+	hello = b"\x03\x03" + bytes(32) + b"\x00" + struct.pack("!HB", 0xC02F, 0) + struct.pack("!H", len(extensions)) + extensions
+	certificates = len(leaf).to_bytes(3, "big") + leaf
+	data = message(tls.Message.SERVER_HELLO, hello) + message(tls.Message.CERTIFICATE, len(certificates).to_bytes(3, "big") + certificates) + message(tls.Message.SERVER_HELLO_DONE, b"")
+	def handle(connection: socket.socket):
+		with connection:
+			try:
+				connection.recv(4096)
+				connection.sendall(struct.pack("!BHH", tls.Record.HANDSHAKE, 0x0303, len(data)) + data)
+				connection.recv(1)
+			except OSError:
+				pass
+	return serve(handle)
+
+def collect(listener: socket.socket) -> tls.Handshake | None:
+	entry = f"127.0.0.1:{listener.getsockname()[1]}"
+	return tls.collect_all([entry], timeout = 5).get(entry)
+
+def test_tls12_chain(chain):
+	with serve_ssl(chain, ssl.TLSVersion.TLSv1_2) as listener:
+		assert collect(listener) == tls.Handshake(heartbeat = False, chain = chain[2])
+
+def test_tls13_falls_back_to_ssl(chain):
+	with serve_ssl(chain, ssl.TLSVersion.TLSv1_3) as listener:
+		handshake = collect(listener)
+	assert handshake and not handshake.heartbeat
+	assert handshake.chain[0] == chain[2][0]
+
+def test_heartbeat(chain):
+	with serve_heartbeat(chain[2][0]) as listener:
+		assert collect(listener) == tls.Handshake(heartbeat = True, chain = chain[2][:1])
+
+def test_closed_port_is_omitted():
+	with socket.create_server(("127.0.0.1", 0)) as listener:
+		port = listener.getsockname()[1]
+	assert tls.collect_all([f"127.0.0.1:{port}"], timeout = 5) == {}